@@ -0,0 +1,60 @@
+"""Micro-benchmark: เวลาสร้าง figure ต่อกราฟ และขนาด JSON ที่ส่งไป Browser
+
+รันจาก root ของโปรเจกต์:  python -m benchmarks.figure_factory [--repeat 500]
+
+เทียบ 2 แบบด้วยข้อมูลสรุปชุดเดียวกัน (5 สาขา / 60 หมวดหมู่):
+  legacy  = go.Bar(...) แบบ validate + template "plotly" + update_layout/update_xaxes/update_yaxes
+  factory = components.figures (template "coop" + สร้างจาก dict โดยไม่ validate)
+"""
+import argparse
+import timeit
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from src.components.figures import bar_figure
+from src.components.theme import THEME
+
+LAYOUT = dict(height=340, margin=dict(t=40, b=35, l=45, r=30), font=dict(size=13), transition=dict(duration=0))
+
+
+def legacy_bar(categories, values):
+    fig = go.Figure(go.Bar(x=categories, y=values, text=values, textposition="outside"), layout=dict(template="plotly"))
+    fig.update_layout(
+        height=340,
+        margin=dict(t=40, b=35, l=45, r=30),
+        paper_bgcolor=THEME["paper"],
+        plot_bgcolor=THEME["bg_plot"],
+        font=dict(family="Sarabun, sans-serif", color=THEME["text"], size=13),
+        transition_duration=0,
+    )
+    fig.update_xaxes(showgrid=False)
+    fig.update_yaxes(gridcolor=THEME["grid"])
+    return fig
+
+
+def factory_bar(categories, values):
+    return bar_figure(categories, values, text=values, textposition="outside", layout=LAYOUT)
+
+
+def run(repeat):
+    rng = np.random.default_rng(0)
+    cases = {
+        "5 สาขา": ([f"สาขา {i}" for i in range(1, 6)], rng.integers(50, 500, 5)),
+        "60 หมวดหมู่": ([f"หมวด {i}" for i in range(60)], rng.integers(1, 10_000, 60)),
+    }
+    print(f"{'case':<14}{'builder':<10}{'build ms':>10}{'to_json ms':>12}{'JSON KB':>10}")
+    for case, (categories, values) in cases.items():
+        for name, build in [("legacy", legacy_bar), ("factory", factory_bar)]:
+            fig = build(categories, values)
+            build_ms = timeit.timeit(lambda: build(categories, values), number=repeat) / repeat * 1e3
+            json_ms = timeit.timeit(lambda: pio.to_json(fig, validate=False), number=repeat) / repeat * 1e3
+            size_kb = len(pio.to_json(fig, validate=False)) / 1024
+            print(f"{case:<14}{name:<10}{build_ms:>10.3f}{json_ms:>12.3f}{size_kb:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=500)
+    run(parser.parse_args().repeat)
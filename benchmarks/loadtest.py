@@ -0,0 +1,508 @@
+"""Load test: เจ้าหน้าที่หลายคนใช้ Dashboard พร้อมกัน ยิง /_dash-update-component แบบเดียวกับ Browser
+
+รันจาก root ของโปรเจกต์:
+    python -m benchmarks.loadtest --url http://127.0.0.1:8050 --users 20 --duration 120
+    python -m benchmarks.loadtest --embedded --rows 100k --users 10 --think 0.5,2
+
+--url       ยิงไปที่เซิร์ฟเวอร์ที่รันอยู่แล้ว (เช่น gunicorn -c gunicorn.conf.py src.app:server ต่อ Postgres จริง)
+            เลขบัตรประชาชนที่ใช้ค้นหา: --national-ids ไฟล์ (บรรทัดละเลข) หรือสุ่มจาก credit_scoring.customers ตาม DB_*
+--embedded  เปิดแอปใน process แยก ใช้ข้อมูลจำลอง (src.ingest.synthetic) แทน Postgres ไม่ต้องมีฐานข้อมูล
+
+ผู้ใช้จำลองแต่ละคนทำ session ซ้ำจนหมดเวลา: เปิดหน้า -> สุ่มทำ (เปลี่ยนหน้า, เปลี่ยนปีหน้าสมาชิก,
+เจาะพื้นที่, ค้นหาคะแนนเครดิต, คลิก Tab) คั่นด้วย think time ทำตัวเหมือน Dash renderer:
+อ่าน /_dash-dependencies แล้วยิง Callback ที่ Input เปลี่ยน/ถูกสร้างใหม่ ตามลำดับ (ทีละ Request ต่อผู้ใช้)
+รายงาน throughput และ p50/p95/p99 ต่อ Callback (เขียน JSON ได้ด้วย --output)
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import requests
+
+from src.ingest import synthetic
+
+# ==================================================
+# 1. Config
+# ==================================================
+DEFAULT_THINK = "1,3"      # วินาที (ต่ำสุด,สูงสุด) ระหว่างการกระทำแต่ละครั้งของผู้ใช้
+ACTIONS_PER_SESSION = 8
+REQUEST_TIMEOUT = 120      # เท่ากับ timeout ของ gunicorn
+MISSING_ID_SHARE = 0.1     # สัดส่วนการค้นหาเลขที่ไม่มีในระบบ (พิมพ์ผิด)
+PAGES = ["/overview", "/member", "/branches", "/address", "/amount", "/performance", "/credit-score"]
+ACTIONS = {  # น้ำหนักการสุ่มการกระทำ
+    "route": 3,
+    "member_year": 2,
+    "drilldown": 2,
+    "credit_search": 2,
+    "tab_click": 1,
+}
+OTHER_LABEL = "อื่นๆ"  # กล่องรวมใน Treemap (components.figures.OTHER_LABEL) เจาะต่อไม่ได้
+
+
+def _key(component_id, prop):
+    return f"{component_id}.{prop}"
+
+# ==================================================
+# 2. Callback ของแอป (จาก /_dash-dependencies)
+# ==================================================
+class Callback:
+    def __init__(self, spec, name=None):
+        self.output = spec["output"]
+        self.multi = self.output.startswith("..")
+        parts = self.output.strip(".").split("...") if self.multi else [self.output]
+        # allow_duplicate ต่อท้าย "@hash" ใน output key แต่ไม่อยู่ใน outputs ที่ส่งจริง
+        self.outputs = [tuple(part.split("@")[0].rsplit(".", 1)) for part in parts]
+        self.inputs = [(i["id"], i["property"]) for i in spec["inputs"]]
+        self.state = [(s["id"], s["property"]) for s in spec["state"]]
+        self.prevent_initial_call = spec.get("prevent_initial_call", False)
+        self.name = name or _key(*self.outputs[0])
+
+    def body(self, props, changed):
+        def values(pairs):
+            return [{"id": i, "property": p, "value": props.get((i, p))} for i, p in pairs]
+
+        outputs = [{"id": i, "property": p} for i, p in self.outputs]
+        return {
+            "output": self.output,
+            "outputs": outputs if self.multi else outputs[0],
+            "inputs": values(self.inputs),
+            "state": values(self.state),
+            "changedPropIds": [_key(*pair) for pair in self.inputs if pair in changed],
+        }
+
+
+def load_callbacks(base_url, names=None) -> list:
+    """Callback ฝั่ง Server ที่ยิงได้ (ข้าม clientside และ pattern-matching id)"""
+    specs = requests.get(f"{base_url}/_dash-dependencies", timeout=REQUEST_TIMEOUT).json()
+    names = names or {}
+    return [
+        Callback(spec, names.get(spec["output"]))
+        for spec in specs
+        if not spec.get("clientside_function")
+        and all(isinstance(i["id"], str) for i in spec["inputs"] + spec["state"])
+    ]
+
+# ==================================================
+# 3. ผลการวัด
+# ==================================================
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)   # ชื่อ callback -> [(วินาที, bytes, ok)]
+        self.sessions = 0
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, size, ok):
+        with self._lock:
+            self.samples[name].append((seconds, size, ok))
+
+    def session_done(self):
+        with self._lock:
+            self.sessions += 1
+
+    def report(self, elapsed) -> dict:
+        rows = []
+        for name, samples in sorted(self.samples.items(), key=lambda item: -len(item[1])):
+            latency = np.array([s[0] for s in samples]) * 1e3
+            p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+            rows.append({
+                "callback": name,
+                "requests": len(samples),
+                "errors": sum(not s[2] for s in samples),
+                "p50_ms": round(float(p50), 1),
+                "p95_ms": round(float(p95), 1),
+                "p99_ms": round(float(p99), 1),
+                "max_ms": round(float(latency.max()), 1),
+                "avg_kb": round(sum(s[1] for s in samples) / len(samples) / 1024, 1),
+            })
+        total = sum(r["requests"] for r in rows)
+        return {
+            "seconds": round(elapsed, 1),
+            "sessions": self.sessions,
+            "requests": total,
+            "errors": sum(r["errors"] for r in rows),
+            "throughput_rps": round(total / max(elapsed, 1e-9), 2),
+            "callbacks": rows,
+        }
+
+# ==================================================
+# 4. ผู้ใช้จำลอง 1 คน (เลียนแบบ Dash renderer แบบย่อ)
+# ==================================================
+def _walk(node, found):
+    """เก็บ props ของทุก component ที่มี id ใน layout JSON"""
+    if isinstance(node, list):
+        for child in node:
+            _walk(child, found)
+    elif isinstance(node, dict):
+        props = node.get("props")
+        if isinstance(props, dict) and "type" in node:
+            if isinstance(props.get("id"), str):
+                found[props["id"]] = props
+            for value in props.values():
+                _walk(value, found)
+
+
+class VirtualUser:
+    def __init__(self, base_url, callbacks, recorder, national_ids, think, rng):
+        self.base_url = base_url
+        self.callbacks = callbacks
+        self.recorder = recorder
+        self.national_ids = national_ids
+        self.think = think
+        self.rng = rng
+        self.http = requests.Session()
+        self.props = {}      # (id, prop) -> ค่าปัจจุบันฝั่ง Browser
+        self.children = {}   # id -> children ของ component (ใช้หา dbc.Tab ใน dbc.Tabs)
+        self.ids = set()
+        self.page_ids = set()
+        self.page = None
+
+    # ---------- สถานะของหน้า ----------
+    def _register(self, tree, page=False):
+        """เก็บ props ของ component ใน tree (page=True: เนื้อหาหน้าใหม่แทนที่ component ของหน้าเดิม)"""
+        found = {}
+        _walk(tree, found)
+        if page:
+            self.props = {pair: value for pair, value in self.props.items() if pair[0] not in self.page_ids}
+            self.ids -= self.page_ids
+            self.page_ids = set(found)
+        for component_id, props in found.items():
+            self.ids.add(component_id)
+            for prop, value in props.items():
+                if prop == "children":
+                    self.children[component_id] = value
+                else:
+                    self.props[(component_id, prop)] = value
+        return set(found)
+
+    def open_app(self):
+        layout = self.http.get(f"{self.base_url}/_dash-layout", timeout=REQUEST_TIMEOUT).json()
+        self.props, self.children, self.ids, self.page_ids, self.page = {}, {}, set(), set(), None
+        self.dispatch(set(), self._register(layout))  # Callback เริ่มต้นของ Sidebar/ตัวกรอง
+
+    # ---------- ยิง Callback ----------
+    def fire(self, callback, changed):
+        started = time.perf_counter()
+        try:
+            response = self.http.post(
+                f"{self.base_url}/_dash-update-component", json=callback.body(self.props, changed), timeout=REQUEST_TIMEOUT,
+            )
+            ok = response.status_code in (200, 204)  # 204 = PreventUpdate
+            size = len(response.content)
+        except requests.RequestException:
+            response, ok, size = None, False, 0
+        self.recorder.add(callback.name, time.perf_counter() - started, size, ok)
+        if response is None or response.status_code != 200:
+            return set(), set()
+
+        updated, new_ids = set(), set()
+        for component_id, props in response.json().get("response", {}).items():
+            for prop, value in props.items():
+                self.props[(component_id, prop)] = value
+                updated.add((component_id, prop))
+                if prop == "children":
+                    # แทนที่เนื้อหาหน้า (Routing) = component ของหน้าเดิมหายไปทั้งหมด
+                    new_ids |= self._register(value, page=component_id == "page-content")
+        return updated, new_ids
+
+    def dispatch(self, changed, new_ids):
+        """ยิง Callback ที่ Input เปลี่ยน หรือ Input/Output อยู่ใน component ที่เพิ่งสร้าง แล้วไล่ต่อจนนิ่ง"""
+        fired = set()
+        while changed or new_ids:
+            due = [
+                cb for cb in self.callbacks
+                if cb.output not in fired
+                and all(i in self.ids for i, _ in cb.inputs + cb.outputs)
+                and (any(pair in changed for pair in cb.inputs)
+                     or (not cb.prevent_initial_call and any(i in new_ids for i, _ in cb.inputs + cb.outputs)))
+            ]
+            triggers = {cb.output: {pair for pair in cb.inputs if pair in changed} for cb in due}
+            changed, new_ids = set(), set()
+            for cb in due:
+                fired.add(cb.output)
+                updated, created = self.fire(cb, triggers[cb.output])
+                changed |= updated
+                new_ids |= created
+
+    def set_prop(self, component_id, prop, value):
+        self.props[(component_id, prop)] = value
+        self.dispatch({(component_id, prop)}, set())
+
+    # ---------- การกระทำของผู้ใช้ ----------
+    def route(self, path=None):
+        self.page = path or self.rng.choice(PAGES)
+        self.set_prop("url", "pathname", self.page)
+
+    def _ensure(self, path):
+        if self.page != path:
+            self.route(path)
+
+    def member_year(self):
+        self._ensure("/member")
+        options = self.props.get(("member-year-dropdown", "options")) or []
+        if options:
+            choice = self.rng.choice(options)
+            self.set_prop("member-year-dropdown", "value", choice["value"] if isinstance(choice, dict) else choice)
+
+    def drilldown(self):
+        self._ensure("/address")
+        for _ in range(self.rng.randint(1, 3)):  # จังหวัด -> อำเภอ -> ตำบล
+            figure = self.props.get(("drill-graph", "figure")) or {}
+            traces = figure.get("data") or [{}]
+            labels = [label for label in traces[0].get("labels", []) if label != OTHER_LABEL]
+            if not labels:
+                break
+            self.set_prop("drill-graph", "clickData", {"points": [{"label": self.rng.choice(labels)}]})
+            self._pause(0.3)
+        clicks = self.props.get(("btn-icon-reset", "n_clicks")) or 0
+        self.set_prop("btn-icon-reset", "n_clicks", clicks + 1)
+
+    def credit_search(self):
+        self._ensure("/credit-score")
+        if self.national_ids and self.rng.random() > MISSING_ID_SHARE:
+            national_id = self.rng.choice(self.national_ids)
+        else:
+            national_id = "".join(self.rng.choice("0123456789") for _ in range(13))
+        self.props[("national-id-input", "value")] = national_id
+        self.set_prop("search-btn", "n_clicks", (self.props.get(("search-btn", "n_clicks")) or 0) + 1)
+        if "view-detail-btn" in self.ids:
+            self._pause(0.3)
+            self.set_prop("view-detail-btn", "n_clicks", (self.props.get(("view-detail-btn", "n_clicks")) or 0) + 1)
+
+    def tab_click(self):
+        if "member-detail-tabs" not in self.ids:
+            self.credit_search()
+        tabs = [props.get("tab_id") for props in self._components("member-detail-tabs") if props.get("tab_id")]
+        if tabs:
+            self.set_prop("member-detail-tabs", "active_tab", self.rng.choice(tabs))
+
+    def _components(self, parent_id):
+        """props ของ component ลูกใน children ของ parent_id (เช่น dbc.Tab ใน dbc.Tabs)"""
+        children = self.children.get(parent_id) or []
+        return [child.get("props", {}) for child in children if isinstance(child, dict)]
+
+    def _pause(self, seconds):
+        time.sleep(seconds * self.rng.uniform(0.5, 1.5))
+
+    def session(self, actions=ACTIONS_PER_SESSION):
+        self.open_app()
+        self.route("/overview")
+        names, weights = zip(*ACTIONS.items())
+        for _ in range(actions):
+            self._pause(self.rng.uniform(*self.think) if self.think[1] else 0)
+            getattr(self, self.rng.choices(names, weights)[0])()
+        self.recorder.session_done()
+
+
+def run_users(base_url, users, duration, think, national_ids, seed=42, names=None) -> dict:
+    callbacks = load_callbacks(base_url, names)
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+
+    def user_loop(number):
+        user = VirtualUser(base_url, callbacks, recorder, national_ids, think, random.Random(seed * 1000 + number))
+        while time.monotonic() < deadline:
+            try:
+                user.session()
+            except (requests.RequestException, ValueError) as e:
+                print(f"[WARN] ผู้ใช้ {number}: {e}")
+                time.sleep(1)
+
+    print(f"⚡ ผู้ใช้ {users} คน {duration:g}s think {think[0]:g}-{think[1]:g}s -> {base_url}")
+    started = time.monotonic()
+    threads = [threading.Thread(target=user_loop, args=(n,), daemon=True) for n in range(users)]
+    for thread in threads:
+        thread.start()
+        time.sleep(min(1.0, duration / max(users, 1) / 10))  # ทยอยเข้าเหมือนผู้ใช้จริง
+    for thread in threads:
+        thread.join()
+    return recorder.report(time.monotonic() - started)
+
+# ==================================================
+# 5. เซิร์ฟเวอร์จำลอง (--embedded): ข้อมูลจำลองแทน Postgres
+# ==================================================
+def credit_profiles(samples, customers) -> dict:
+    """เลขบัตร -> dict รูปเดียวกับ data_manager.get_full_member_data (ข้อมูลลูกค้า + บัญชีแรก + accounts)"""
+    import pandas as pd
+
+    from benchmarks.suite import SEED
+
+    profiles = {}
+    credit = pd.concat(synthetic.iter_credit(samples, customers, SEED), ignore_index=True)
+    for record in credit.to_dict("records"):
+        profile = profiles.get(record["national_id"])
+        if profile is None:
+            profile = profiles[record["national_id"]] = {**record, "accounts": []}
+        profile["accounts"].append(record)
+    return profiles
+
+
+def serve(rows, customers, port, names_path=None):
+    import logging
+
+    from dash._callback import GLOBAL_CALLBACK_MAP
+    from werkzeug.serving import make_server
+
+    from benchmarks import suite
+    from src import data_manager
+
+    samples = synthetic.load_samples()
+    suite.install_dataset(suite.dataset_frame(rows, samples))
+    profiles = credit_profiles(samples, customers)
+    data_manager.get_full_member_data = lambda national_id: dict(profiles.get(str(national_id).strip()) or {}) or None
+    data_manager.get_dataset_version = lambda name=data_manager.MEMBER_DATASET: None  # ไม่มี DB ให้เช็ค version
+
+    from src.app import app
+
+    if names_path:
+        callbacks = {**GLOBAL_CALLBACK_MAP, **app.callback_map}
+        with open(names_path, "w", encoding="utf-8") as f:
+            json.dump({output: spec["callback"].__name__ for output, spec in callbacks.items()}, f)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # ไม่พิมพ์ log ทุก Request
+    print(f"✅ เซิร์ฟเวอร์จำลอง http://127.0.0.1:{port} (สมาชิก {rows:,} / ลูกค้าเครดิต {customers:,})", flush=True)
+    make_server("127.0.0.1", port, app.server, threaded=True).serve_forever()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_embedded(rows, customers, names_path, wait=600):
+    port = _free_port()
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.loadtest", "--serve", "--rows", str(rows),
+        "--customers", str(customers), "--port", str(port), "--names-out", names_path,
+    ])
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"เซิร์ฟเวอร์จำลองหยุดทำงาน (exit {process.returncode})")
+        try:
+            if requests.get(f"{base_url}/_dash-layout", timeout=5).ok:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    process.terminate()
+    raise RuntimeError("รอเซิร์ฟเวอร์จำลองนานเกินไป")
+
+
+def embedded_national_ids(customers) -> list:
+    """เลขบัตรของลูกค้าจำลองชุดแรก (ตรงกับเซิร์ฟเวอร์จำลองเพราะใช้ seed เดียวกัน)"""
+    from benchmarks.suite import SEED
+
+    first_chunk = next(synthetic.iter_credit(synthetic.load_samples(), customers, SEED))
+    return first_chunk["national_id"].unique().tolist()
+
+
+def database_national_ids(limit=5000) -> list:
+    from sqlalchemy import text
+    from sqlalchemy.exc import SQLAlchemyError
+
+    from src.data_manager import get_pg_engine
+
+    engine = get_pg_engine()
+    if engine is None:
+        return []
+    try:
+        with engine.connect() as conn:
+            return [row[0] for row in conn.execute(
+                text("SELECT national_id FROM credit_scoring.customers ORDER BY random() LIMIT :n"), {"n": limit},
+            )]
+    except SQLAlchemyError as e:
+        print(f"[WARN] ดึงเลขบัตรจากฐานข้อมูลไม่ได้: {e}")
+        return []
+
+# ==================================================
+# 6. CLI
+# ==================================================
+def print_report(report):
+    print(f"\n{'callback':<34}{'req':>7}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'KB':>8}")
+    for r in report["callbacks"]:
+        print(f"{r['callback'][:33]:<34}{r['requests']:>7,}{r['errors']:>5}{r['p50_ms']:>10,.1f}{r['p95_ms']:>10,.1f}"
+              f"{r['p99_ms']:>10,.1f}{r['max_ms']:>10,.1f}{r['avg_kb']:>8.1f}")
+    status = "✅" if not report["errors"] else "⚠️"
+    print(f"{status} {report['requests']:,} requests / {report['sessions']:,} sessions ใน {report['seconds']:g}s "
+          f"= {report['throughput_rps']:,.1f} req/s (error {report['errors']:,})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="URL ของแอปที่รันอยู่ (เช่น http://127.0.0.1:8050)")
+    target.add_argument("--embedded", action="store_true", help="เปิดแอปพร้อมข้อมูลจำลองใน process แยก (ไม่ต้องมี Postgres)")
+    target.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)  # process ลูกของ --embedded
+    parser.add_argument("--rows", default="100k", help="จำนวนสมาชิกจำลองสำหรับ --embedded (เช่น 10k, 1M)")
+    parser.add_argument("--customers", help="จำนวนลูกค้าเครดิตจำลอง (ค่าเริ่มต้น = --rows)")
+    parser.add_argument("--users", type=int, default=10, help="จำนวนผู้ใช้พร้อมกัน")
+    parser.add_argument("--duration", type=float, default=60, help="ระยะเวลาทดสอบ (วินาที)")
+    parser.add_argument("--think", default=DEFAULT_THINK, help="think time ต่ำสุด,สูงสุด (วินาที) เช่น 0,0 = ยิงต่อเนื่อง")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--national-ids", help="ไฟล์เลขบัตรประชาชนที่ใช้ค้นหา (บรรทัดละเลข)")
+    parser.add_argument("--output", help="เขียนผลเป็น JSON")
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--names-out", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    from benchmarks.suite import parse_scale
+
+    rows = parse_scale(args.rows)
+    customers = parse_scale(args.customers) if args.customers else rows
+    if args.serve:
+        serve(rows, customers, args.port, args.names_out)
+        return 0
+    if not (args.url or args.embedded):
+        parser.error("ระบุ --url หรือ --embedded")
+    think = tuple(float(x) for x in args.think.split(","))
+
+    process, names = None, {}
+    names_path = os.path.join(synthetic.SYNTHETIC_DIR, f"loadtest-callbacks-{os.getpid()}.json")
+    try:
+        if args.embedded:
+            os.makedirs(synthetic.SYNTHETIC_DIR, exist_ok=True)
+            print(f"⚡ เปิดเซิร์ฟเวอร์จำลอง (สมาชิก {rows:,}) ...")
+            process, base_url = start_embedded(rows, customers, names_path)
+            with open(names_path, encoding="utf-8") as f:
+                names = json.load(f)
+            national_ids = embedded_national_ids(customers)
+        else:
+            base_url = args.url.rstrip("/")
+            if args.national_ids:
+                with open(args.national_ids, encoding="utf-8") as f:
+                    national_ids = [line.strip() for line in f if line.strip()]
+            else:
+                national_ids = database_national_ids()
+            if not national_ids:
+                print("[WARN] ไม่มีเลขบัตรให้ค้นหา การค้นหาคะแนนเครดิตจะเป็นกรณีไม่พบข้อมูลทั้งหมด")
+        report = run_users(base_url, args.users, args.duration, think, national_ids, args.seed, names)
+    except (OSError, RuntimeError, requests.RequestException) as e:
+        print(f"❌ Load test ไม่สำเร็จ: {e}")
+        return 1
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if os.path.exists(names_path):
+            os.remove(names_path)
+
+    report.update(target=base_url, users=args.users, think=list(think))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"✅ บันทึกผลที่ {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""Benchmark ทั้งเส้นทางข้อมูล: โหลด -> preprocess -> KPI -> กราฟ -> drill-down + คำนวณคะแนนเครดิต
+
+รันจาก root ของโปรเจกต์:
+    python -m benchmarks.suite                          # 10k, 100k, 1M จากข้อมูลจำลองในหน่วยความจำ
+    python -m benchmarks.suite --scales 10k,100k --save-baseline
+    BENCH_DB_NAME=coopdash_bench python -m benchmarks.suite --db   # วัด load_data() จาก Postgres ด้วย
+
+ข้อมูลมาจาก src.ingest.synthetic (seed คงที่) แปลงเป็น DataFrame รูปเดียวกับ data_manager.load_data()
+--db: นำเข้าไฟล์จำลองแต่ละขนาดเข้าฐานข้อมูล BENCH_DB_NAME (--truncate ล้างตารางเดิม) แล้ววัด load_data() จริง
+     ต้องตั้ง BENCH_DB_NAME และห้ามเป็นฐานเดียวกับ DB_NAME ของ Dashboard (ใช้ host/user เดียวกับ DB_*)
+
+วัดแบบ steady state ของ Worker: ไม่ใช้ figure cache (ทุกรอบสร้างกราฟใหม่) แต่ view ที่กรองแล้วอุ่นไว้ก่อน
+ผลลัพธ์เขียนเป็น JSON ใน data/benchmarks/ แล้วเทียบกับ baseline.json ช้าลงเกินเกณฑ์ = exit code 1
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from plotly.basedatatypes import BaseFigure
+
+from src import data_manager
+from src.files import DATA_DIR, atomic_write
+from src.ingest import synthetic
+
+# ==================================================
+# 1. Config
+# ==================================================
+BENCHMARK_DIR = os.getenv("BENCHMARK_DIR", os.path.join(DATA_DIR, "benchmarks"))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_SCALES = "10k,100k,1M"
+SEED = 42
+REGRESSION_PCT = 20.0     # ช้ากว่า baseline เกินกี่ % ถือว่าถดถอย
+NOISE_FLOOR_MS = 2.0      # ต่างจาก baseline ไม่ถึงเท่านี้ ถือว่าเป็น noise (งานเล็กมาก)
+SCORE_SAMPLE = 1_000      # จำนวนลูกค้าที่ใช้วัด calculate_all ต่อครั้ง
+COMPARE_STAT = "min_ms"   # เทียบด้วยรอบที่เร็วที่สุด (ทนต่อเครื่องที่มีงานอื่นแทรกกว่าค่ามัธยฐาน)
+BENCH_DB_NAME = os.getenv("BENCH_DB_NAME")  # ฐานข้อมูลที่ --db ล้างแล้วเติมข้อมูลจำลอง
+
+
+def parse_scale(text: str) -> int:
+    text = text.strip().lower()
+    units = {"k": 1_000, "m": 1_000_000}
+    if text[-1:] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def scale_label(rows: int) -> str:
+    if rows >= 1_000_000 and rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}M"
+    if rows >= 1_000 and rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+# ==================================================
+# 2. ข้อมูล: ข้อมูลจำลอง -> DataFrame รูปเดียวกับ load_data()
+# ==================================================
+def _dates(text: pd.Series) -> pd.Series:
+    """'YYYY-MM-DD' -> datetime.date (psycopg2 คืนคอลัมน์ DATE เป็น object แบบนี้)"""
+    return pd.to_datetime(text, format="%Y-%m-%d").dt.date.astype(object).where(text.notna(), None)
+
+
+def _ids(values: pd.Series) -> np.ndarray:
+    return pd.factorize(values, sort=True)[0] + 1
+
+
+def dataset_frame(rows: int, samples: dict) -> pd.DataFrame:
+    members = pd.concat(synthetic.iter_members(samples, rows, SEED), ignore_index=True)
+    amount = pd.concat(synthetic.iter_amount(samples, rows, SEED), ignore_index=True)
+    used_pct = amount["credit_limit_used(%)"].astype(float)
+    branch_no = members["branch_no"].astype(np.int64)
+    return pd.DataFrame({
+        "member_id": members["member_id"].astype(np.int64),
+        "first_name": members["first_name"],
+        "last_name": members["last_name"],
+        "gender_id": _ids(members["gender"]),
+        "branch_id": _ids(branch_no),
+        **{col: _dates(members[col]) for col in synthetic.MEMBER_DATES},
+        "career_id": _ids(members["career"]),
+        "income": members["income"].astype(float),
+        "rn": np.arange(1, rows + 1),
+        "net_yearly_income": amount["net_yearly_income"],
+        "yearly_debt_payments": amount["yearly_debt_payments"],
+        "credit_limit": amount["credit_limit"],
+        "credit_limit_used_pct": used_pct,
+        "is_npl": (used_pct > 95).astype(np.int64),
+        "career_name": members["career"],
+        "branch_no": branch_no,
+        "gender_name": members["gender"],
+        "province_name": members["province"],
+        "district_name": members["district_area"],
+        "subdistrict_name": members["sub_area"],
+        "village_moo": members["village_no"],
+    })
+
+
+def credit_records(customers: int, samples: dict) -> list:
+    """ลูกค้า 1 ราย = dict รูปเดียวกับ get_full_member_data (ข้อมูลลูกค้า + บัญชีแรก + ประวัติ/สรุป)"""
+    credit = pd.concat(synthetic.iter_credit(samples, customers, SEED), ignore_index=True)
+    return credit.drop_duplicates("customer_id").to_dict("records")
+
+
+def use_benchmark_database():
+    """สลับ data_manager ไปใช้ BENCH_DB_NAME คืนข้อความผิดพลาดถ้าไม่ได้ตั้ง/ชี้ไปที่ฐานของ Dashboard"""
+    if not BENCH_DB_NAME:
+        return "--db ต้องตั้ง BENCH_DB_NAME เป็นฐานข้อมูลสำหรับ benchmark (ตารางในฐานนั้นจะถูกล้าง)"
+    if BENCH_DB_NAME == data_manager.PG_CONFIG["database"]:
+        return f"BENCH_DB_NAME ({BENCH_DB_NAME}) เป็นฐานเดียวกับ DB_NAME ของ Dashboard ไม่ล้างข้อมูลจริง"
+    data_manager.PG_CONFIG["database"] = BENCH_DB_NAME
+    data_manager.get_pg_engine.cache_clear()
+    return None
+
+
+def load_into_database(rows: int, out_dir: str) -> bool:
+    """นำเข้าข้อมูลจำลองขนาด rows เข้าฐาน BENCH_DB_NAME (แทนที่ข้อมูลเดิมทั้งหมด ดู use_benchmark_database)"""
+    from src.ingest.__main__ import main as ingest
+
+    paths = {kind: path for kind, (path, _) in synthetic.generate(out_dir, rows, rows, SEED, "parquet").items()}
+    return ingest(["--members", paths["members"], "--amount", paths["amount"], "--credit", paths["credit"], "--truncate"]) == 0
+
+
+def install_dataset(df: pd.DataFrame):
+    """ให้ get_dataset() ของทุกหน้าคืน df นี้ แล้วล้าง Cache ทุกชั้น
+
+    ตัด dataset_version ออก: tag_frame จึงไม่ผูก df กับ figure cache และทุกรอบวัดการสร้างกราฟจริง
+    """
+    df.attrs.pop("dataset_version", None)
+    data_manager._base_dataset = lambda: df
+    data_manager.invalidate_dataset_caches()
+
+# ==================================================
+# 3. การจับเวลา
+# ==================================================
+def measure(func, repeat: int, budget: float) -> dict:
+    """รอบแรกเป็น warm-up (ไม่นับ) แล้ววัดสูงสุด repeat รอบ หยุดก่อนถ้าใช้เวลารวมเกิน budget วินาที"""
+    result = func()
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < repeat and (not samples or time.perf_counter() - started < budget):
+        t0 = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        # ขนาด JSON ที่ส่งไป Browser (เฉพาะกราฟ)
+        "bytes": len(pio.to_json(result, validate=False)) if isinstance(result, BaseFigure) else None,
+    }
+
+
+def geo_drilldown(address, province):
+    """เรียก handle_geo_drilldown แบบเดียวกับตอนผู้ใช้คลิกกล่องจังหวัดใน Treemap"""
+    from dash._callback_context import context_value
+    from dash._utils import AttributeDict
+
+    click = {"points": [{"label": province}]}
+    context_value.set(AttributeDict(triggered_inputs=[{"prop_id": "drill-graph.clickData", "value": click}]))
+    return address.handle_geo_drilldown(click, None, {"level": "province", "filters": {}}, {"display": "none"}, {})
+
+# ==================================================
+# 4. รายการที่วัด (group, ชื่อ, ฟังก์ชัน) ต่อขนาดข้อมูล
+# ==================================================
+def cases(df: pd.DataFrame, records: list):
+    from src import timeseries
+    from src.components import kpi_cards
+    from src.forecasting import weighted_drift, FORECAST_HORIZON
+    from src.pages import address, amount, branches, member, overview, performance
+    from src.scoring_logic import CreditScoreCalculator
+
+    fresh = lambda: df.copy(deep=False)  # preprocess บางหน้าแก้คอลัมน์ใน df ที่ส่งเข้าไป
+    views = {
+        "overview": overview.preprocess_overview(fresh()),
+        "amount": amount.preprocess_amount(fresh()),
+        "branches": branches.process_branch(fresh()),
+        "address": address.preprocess_geographic(fresh()),
+        "member": member.process_member(fresh()),
+        "performance": performance.preprocess_performance(fresh()),
+    }
+    cube = member.build_member_cube(views["member"])["slices"][member.ALL_YEARS]
+    rollups = timeseries.build_rollups(df)
+    monthly = rollups["M"]
+    income = monthly["income"].cumsum()
+    forecast = weighted_drift(income, FORECAST_HORIZON)
+    calculator = CreditScoreCalculator()
+    sample = records[:SCORE_SAMPLE]
+    province = df["province_name"].mode().iat[0]
+
+    yield "preprocess", "overview.preprocess_overview", lambda: overview.preprocess_overview(fresh())
+    yield "preprocess", "amount.preprocess_amount", lambda: amount.preprocess_amount(fresh())
+    yield "preprocess", "branches.process_branch", lambda: branches.process_branch(fresh())
+    yield "preprocess", "address.preprocess_geographic", lambda: address.preprocess_geographic(fresh())
+    yield "preprocess", "member.process_member", lambda: member.process_member(fresh())
+    yield "preprocess", "member.build_member_cube", lambda: member.build_member_cube(views["member"])
+    yield "preprocess", "performance.preprocess_performance", lambda: performance.preprocess_performance(fresh())
+    yield "preprocess", "timeseries.build_rollups", lambda: timeseries.build_rollups(df)
+
+    yield "kpis", "render_overview_kpis", lambda: kpi_cards.render_overview_kpis(views["overview"])
+    yield "kpis", "render_member_kpis", lambda: kpi_cards.render_member_kpis(views["member"])
+    yield "kpis", "render_branch_kpis", lambda: kpi_cards.render_branch_kpis(views["branches"])
+    yield "kpis", "render_address_kpis", lambda: kpi_cards.render_address_kpis(views["address"])
+    yield "kpis", "render_amount_kpis", lambda: kpi_cards.render_amount_kpis(views["amount"])
+    yield "kpis", "render_performance_kpis", lambda: kpi_cards.render_performance_kpis(monthly)
+
+    for name, page, charts in [
+        ("overview", overview, ["chart_gender_pie", "chart_branch_bar", "chart_province_bar", "chart_income_funnel"]),
+        ("amount", amount, ["chart_debt_health_donut", "chart_avg_loan_by_branch", "chart_top_npl_branches", "chart_occupation_debt"]),
+        ("branches", branches, ["chart_member_column", "chart_income_line", "chart_approval_mode", "chart_member_income_dual"]),
+    ]:
+        for chart in charts:
+            yield "charts", f"{name}.{chart}", lambda build=getattr(page, chart), view=views[name]: build(view)
+    yield "charts", "address.get_drilldown_chart", lambda: address.get_drilldown_chart(views["address"], "province")
+    yield "charts", "member.chart_growth_time", lambda: member.chart_growth_time(rollups["M"]["members"])
+    yield "charts", "member.chart_gender_career", lambda: member.chart_gender_career(cube["careers"])
+    yield "charts", "member.chart_income_pie", lambda: member.chart_income_pie(cube["income"])
+    yield "charts", "member.chart_gen_area", lambda: member.chart_gen_area(cube["gen_prov"])
+    yield "charts", "member.chart_monthly_members", lambda: member.chart_monthly_members(cube["monthly"])
+    yield "charts", "performance.chart_business_forecast", lambda: performance.chart_business_forecast(forecast, income)
+
+    yield "callbacks", "address.handle_geo_drilldown", lambda: geo_drilldown(address, province)
+
+    yield "scoring", f"calculate_all x{len(sample):,}", lambda: [calculator.calculate_all(r) for r in sample]
+    yield "scoring", "batch scoring (ลูกค้าทั้งหมด)", lambda: [calculator.calculate_all(r) for r in records]
+
+# ==================================================
+# 5. รัน / บันทึก / เทียบ baseline
+# ==================================================
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, repeat, budget, use_db=False, only=None) -> dict:
+    samples = synthetic.load_samples()
+    results = []
+    for rows in scales:
+        label = scale_label(rows)
+        print(f"\n⚡ ขนาด {label} ({rows:,} แถว)")
+        started = time.perf_counter()
+        if use_db:
+            if not load_into_database(rows, os.path.join(synthetic.SYNTHETIC_DIR, f"bench-{label}")):
+                raise SystemExit("❌ นำเข้าข้อมูลจำลองเข้า Postgres ไม่สำเร็จ")
+            loaded = {}
+
+            def load():
+                loaded["df"] = data_manager.load_data()
+
+            timing = measure(load, repeat, budget)
+            results.append({"scale": rows, "group": "load", "case": "data_manager.load_data", **timing})
+            print(f"  {'load':<11}{'data_manager.load_data':<44}{timing['median_ms']:>12,.1f} ms")
+            df = loaded["df"]
+        else:
+            df = dataset_frame(rows, samples)
+        records = credit_records(rows, samples)
+        install_dataset(df)
+        print(f"  เตรียมข้อมูล {time.perf_counter() - started:.1f}s")
+
+        for group, name, func in cases(df, records):
+            if only and only not in name:
+                continue
+            timing = measure(func, repeat, budget)
+            results.append({"scale": rows, "group": group, "case": name, **timing})
+            size = f"{timing['bytes'] / 1024:>9.1f} KB" if timing["bytes"] else ""
+            print(f"  {group:<11}{name:<44}{timing['median_ms']:>12,.1f} ms{size}")
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPU)",
+        "source": "postgres" if use_db else "synthetic",
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold_pct=REGRESSION_PCT) -> list:
+    """คืนรายการที่ช้าลงเกิน threshold_pct % (และเกิน NOISE_FLOOR_MS) เทียบกับ baseline"""
+    before = {(r["scale"], r["case"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        old = before.get((result["scale"], result["case"]))
+        if old is None:
+            continue
+        delta = result[COMPARE_STAT] - old[COMPARE_STAT]
+        change = delta / old[COMPARE_STAT] * 100 if old[COMPARE_STAT] else 0.0
+        result["baseline_ms"], result["change_pct"] = old[COMPARE_STAT], round(change, 1)
+        if change > threshold_pct and delta > NOISE_FLOOR_MS:
+            regressions.append(result)
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with atomic_write(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="จำนวนสมาชิก/ลูกค้า คั่นด้วย , (เช่น 10k,100k,1M)")
+    parser.add_argument("--repeat", type=int, default=5, help="จำนวนรอบที่วัดต่อรายการ (ไม่นับรอบ warm-up)")
+    parser.add_argument("--budget", type=float, default=10.0, help="เวลาสูงสุด (วินาที) ต่อรายการ งานช้าจะวัดน้อยรอบลง")
+    parser.add_argument("--only", help="วัดเฉพาะรายการที่ชื่อมีข้อความนี้")
+    parser.add_argument("--db", action="store_true",
+                        help="นำเข้าข้อมูลจำลองเข้าฐาน BENCH_DB_NAME (ล้างตารางเดิม) แล้ววัด load_data() ด้วย")
+    parser.add_argument("--output", help="ไฟล์ผลลัพธ์ JSON (ค่าเริ่มต้น data/benchmarks/<เวลา>.json)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="ไฟล์ baseline ที่ใช้เทียบ")
+    parser.add_argument("--save-baseline", action="store_true", help="บันทึกผลรอบนี้เป็น baseline ใหม่")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_PCT, help="ช้าลงเกินกี่ %% ถือว่าถดถอย")
+    args = parser.parse_args(argv)
+    if args.db:
+        error = use_benchmark_database()
+        if error:
+            print(f"❌ {error}")
+            return 1
+        print(f"⚠️ ใช้ฐานข้อมูล {BENCH_DB_NAME} สำหรับ benchmark (ตารางเดิมถูกล้าง)")
+
+    report = run([parse_scale(s) for s in args.scales.split(",")], args.repeat, args.budget, args.db, args.only)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        print(f"\nเทียบกับ baseline {args.baseline} (commit {baseline.get('commit')}, {baseline.get('created')})")
+        for r in regressions:
+            print(f"⚠️ ช้าลง {r['change_pct']:+.1f}%  [{scale_label(r['scale'])}] {r['case']}: "
+                  f"{r['baseline_ms']:,.1f} -> {r[COMPARE_STAT]:,.1f} ms")
+        if not regressions:
+            print(f"✅ ไม่มีรายการที่ช้าลงเกิน {args.threshold:g}%")
+
+    output = args.output or os.path.join(BENCHMARK_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    write_json(output, report)
+    print(f"✅ บันทึกผลที่ {output}")
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"✅ บันทึกเป็น baseline ที่ {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
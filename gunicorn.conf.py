@@ -0,0 +1,21 @@
+# ==================================================
+# Gunicorn Config: gunicorn -c gunicorn.conf.py src.app:server
+# ==================================================
+# Callback ของแต่ละกราฟถูกยิงแยกกันจาก Browser
+# ใช้ gthread เพื่อให้แต่ละ Worker ตอบหลาย Callback พร้อมกันได้
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 8050)}"
+workers = int(os.getenv("WEB_WORKERS", 2))
+threads = int(os.getenv("WEB_THREADS", 4))
+worker_class = "gthread"
+timeout = 120
+
+
+def on_starting(server):
+    # Leader (master) โหลดข้อมูลจาก DB ครั้งเดียวแล้ว publish เป็นไฟล์ Arrow
+    # ให้ทุก Worker memory-map ใช้ร่วมกัน (ต้องตั้ง SHARED_DATASET_DIR)
+    from src import shared_dataset
+    if shared_dataset.is_enabled():
+        from src.data_manager import publish_from_database
+        publish_from_database()
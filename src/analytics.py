@@ -0,0 +1,217 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # ไม่มี duckdb = สรุปข้อมูลด้วย pandas ตามเดิม
+    duckdb = None
+
+# ==================================================
+# 1. Config
+# ==================================================
+# pandas (ค่าเริ่มต้น) | duckdb = รัน Group By เป็น SQL ใน DuckDB บน DataFrame เดียวกัน (ใช้ทุก Core)
+ANALYTICS_BACKEND = os.getenv("ANALYTICS_BACKEND", "pandas").lower()
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", 0))  # 0 = ให้ DuckDB เลือกตามจำนวน Core
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT")  # เช่น "1GB" (เกินแล้ว spill ลงดิสก์)
+
+
+def is_duckdb() -> bool:
+    return ANALYTICS_BACKEND == "duckdb" and duckdb is not None
+
+# ==================================================
+# 2. นิยามคอลัมน์ที่คำนวณ (ให้ผลตรงกับ preprocess_* ของแต่ละหน้า)
+# ==================================================
+INCOME_SQL = "COALESCE(TRY_CAST(REPLACE(CAST(income AS VARCHAR), ',', '') AS DOUBLE), 0)"
+DEBT_SQL = "credit_limit * (credit_limit_used_pct / 100)"
+REG_DATE_SQL = "TRY_CAST(registration_date AS DATE)"
+GEN_SQL = """
+    CASE
+        WHEN TRY_CAST(birthday AS DATE) IS NULL THEN 'Unknown'
+        WHEN year(TRY_CAST(birthday AS DATE)) <= 1964 THEN 'Baby Boomer'
+        WHEN year(TRY_CAST(birthday AS DATE)) <= 1980 THEN 'Gen X'
+        WHEN year(TRY_CAST(birthday AS DATE)) <= 1996 THEN 'Gen Y'
+        ELSE 'Gen Z'
+    END
+"""
+NPL_THRESHOLD = 90  # ใช้วงเงินเกิน 90% นับเป็นหนี้เสี่ยง (NPL)
+
+
+def _income(df):
+    if "Income_Clean" in df.columns:
+        return df["Income_Clean"]
+    return df["income"].astype(str).str.replace(",", "").pipe(pd.to_numeric, errors="coerce").fillna(0)
+
+
+def _debt(df):
+    if "actual_debt" in df.columns:
+        return df["actual_debt"]
+    return df["credit_limit"] * (df["credit_limit_used_pct"] / 100)
+
+
+def _reg_date(df):
+    if "reg_date" in df.columns:
+        return df["reg_date"]
+    return pd.to_datetime(df["registration_date"], errors="coerce")
+
+
+def _gen(df):
+    if "Gen" in df.columns:
+        return df["Gen"]
+    year = pd.to_datetime(df["birthday"], errors="coerce").dt.year
+    gen = np.select(
+        [year.isna(), year <= 1964, year <= 1980, year <= 1996],
+        ["Unknown", "Baby Boomer", "Gen X", "Gen Y"],
+        default="Gen Z",
+    )
+    return pd.Series(gen, index=df.index)
+
+# ==================================================
+# 3. DuckDB Runner (1 connection ต่อ thread)
+# ==================================================
+_local = threading.local()
+
+
+def _connection():
+    con = getattr(_local, "con", None)
+    if con is None:
+        config = {}
+        if DUCKDB_THREADS:
+            config["threads"] = DUCKDB_THREADS
+        if DUCKDB_MEMORY_LIMIT:
+            config["memory_limit"] = DUCKDB_MEMORY_LIMIT
+        con = duckdb.connect(config=config)
+        _local.con = con
+    return con
+
+
+def _dataset(df):
+    if df is not None:
+        return df
+    from .data_manager import get_dataset
+    return get_dataset()
+
+
+def run_sql(sql: str, df: pd.DataFrame = None) -> pd.DataFrame:
+    """รัน SQL โดยอ้างตาราง {source} = df ที่ส่งมา (None = get_dataset() ชุดเดียวกับ backend pandas)"""
+    con = _connection()
+    # register = สแกน DataFrame ตรงๆ (ไม่คัดลอก) และอ่านเฉพาะคอลัมน์ที่ SQL ใช้
+    con.register("members", _dataset(df))
+    try:
+        return con.execute(sql.format(source="members")).df()
+    finally:
+        con.unregister("members")
+
+# ==================================================
+# 4. Aggregations (df=None = ทั้งชุดข้อมูล)
+# ==================================================
+def branch_summary(df: pd.DataFrame = None) -> pd.DataFrame:
+    """สรุปต่อสาขา: จำนวนสมาชิก, รายได้รวม/เฉลี่ย, หนี้เฉลี่ย และสัดส่วน NPL (%)"""
+    if is_duckdb():
+        summary = run_sql(f"""
+            SELECT branch_no,
+                   COUNT(*) AS members,
+                   SUM({INCOME_SQL}) AS total_income,
+                   AVG({INCOME_SQL}) AS avg_income,
+                   AVG({DEBT_SQL}) AS avg_debt,
+                   AVG(CASE WHEN credit_limit_used_pct > {NPL_THRESHOLD} THEN 1 ELSE 0 END) * 100 AS npl_pct
+            FROM {{source}}
+            WHERE branch_no IS NOT NULL
+            GROUP BY branch_no
+        """, df)
+        return summary.sort_values("branch_no", ignore_index=True)
+
+    df = _dataset(df)
+    frame = pd.DataFrame({
+        "branch_no": df["branch_no"],
+        "income": _income(df),
+        "debt": _debt(df),
+        "over": (df["credit_limit_used_pct"] > NPL_THRESHOLD).astype(int),
+    })
+    summary = frame.groupby("branch_no").agg(
+        members=("income", "size"),
+        total_income=("income", "sum"),
+        avg_income=("income", "mean"),
+        avg_debt=("debt", "mean"),
+        npl_pct=("over", "mean"),
+    ).reset_index()
+    summary["npl_pct"] *= 100
+    return summary
+
+
+def province_gen_counts(df: pd.DataFrame = None) -> pd.DataFrame:
+    """จำนวนสมาชิกต่อ (ปีที่สมัคร, จังหวัด, Gen) — ปีที่ไม่ทราบเป็น 0"""
+    if is_duckdb():
+        counts = run_sql(f"""
+            SELECT COALESCE(year({REG_DATE_SQL}), 0)::INTEGER AS year,
+                   province_name,
+                   {GEN_SQL} AS Gen,
+                   COUNT(*) AS count
+            FROM {{source}}
+            WHERE province_name IS NOT NULL
+            GROUP BY ALL
+        """, df)
+        return counts.sort_values(["year", "province_name", "Gen"], ignore_index=True)
+
+    df = _dataset(df)
+    year = _reg_date(df).dt.year.fillna(0).astype(int).rename("year")
+    return df.groupby([year, df["province_name"], _gen(df).rename("Gen")], observed=True).size().reset_index(name="count")
+
+
+def monthly_trend(df: pd.DataFrame = None) -> pd.DataFrame:
+    """สมาชิกใหม่และรายได้รวมต่อเดือนที่สมัคร (month = วันแรกของเดือน)"""
+    if is_duckdb():
+        trend = run_sql(f"""
+            SELECT date_trunc('month', {REG_DATE_SQL})::TIMESTAMP AS month,
+                   COUNT(*) AS members,
+                   SUM({INCOME_SQL}) AS income
+            FROM {{source}}
+            WHERE {REG_DATE_SQL} IS NOT NULL
+            GROUP BY 1
+        """, df)
+        trend["month"] = trend["month"].astype("datetime64[ns]")
+        return trend.sort_values("month", ignore_index=True)
+
+    df = _dataset(df)
+    reg_date = _reg_date(df)
+    month = reg_date.dt.to_period("M").dt.to_timestamp().rename("month")
+    frame = pd.DataFrame({"month": month, "income": _income(df)})[reg_date.notna()]
+    return frame.groupby("month").agg(members=("income", "size"), income=("income", "sum")).reset_index()
+
+
+def daily_trend(df: pd.DataFrame = None) -> pd.DataFrame:
+    """สมาชิกใหม่และรายได้รวมต่อวันที่สมัคร (ฐานของ Rollup ใน timeseries.py)"""
+    if is_duckdb():
+        trend = run_sql(f"""
+            SELECT {REG_DATE_SQL}::TIMESTAMP AS day,
+                   COUNT(*) AS members,
+                   SUM({INCOME_SQL}) AS income
+            FROM {{source}}
+            WHERE {REG_DATE_SQL} IS NOT NULL
+            GROUP BY 1
+        """, df)
+        trend["day"] = trend["day"].astype("datetime64[ns]")
+        return trend.sort_values("day", ignore_index=True)
+
+    df = _dataset(df)
+    reg_date = _reg_date(df)
+    frame = pd.DataFrame({"day": reg_date.dt.normalize(), "income": _income(df)})[reg_date.notna()]
+    return frame.groupby("day").agg(members=("income", "size"), income=("income", "sum")).reset_index()
+
+
+def occupation_debt(df: pd.DataFrame = None) -> pd.DataFrame:
+    """ยอดหนี้รวมต่ออาชีพ (นับเฉพาะสมาชิกที่มีหนี้)"""
+    if is_duckdb():
+        debt = run_sql(f"""
+            SELECT career_name, SUM({DEBT_SQL}) AS actual_debt
+            FROM {{source}}
+            WHERE {DEBT_SQL} > 0 AND career_name IS NOT NULL
+            GROUP BY career_name
+        """, df)
+        return debt.sort_values("career_name", ignore_index=True)
+
+    df = _dataset(df)
+    debt = _debt(df)
+    return debt[debt > 0].groupby(df["career_name"]).sum().rename("actual_debt").reset_index()
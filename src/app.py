@@ -1,12 +1,17 @@
 import os
-from dash import Dash, dcc, html
+from dash import Dash, dcc, html, ctx
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output
+from dash.exceptions import PreventUpdate
 from dotenv import load_dotenv
 
 # Import หน้าที่จำเป็น
 from .components.sidebar import render_sidebar
+from .components.cross_filter import render_cross_filter_bar, render_cross_filter_store
 from .pages import overview, creditscore, member, branches, address, performance, amount
+from .data_manager import check_dataset_version
+from .filter_index import filter_signature
+from . import metrics
 
 load_dotenv()  
 
@@ -24,6 +29,17 @@ app = Dash(
 )
 
 app.title = "I-Corp Dash"
+server = app.server  # สำหรับ gunicorn (ดู gunicorn.conf.py)
+metrics.install(app)  # เวลา/ขนาดของทุก Callback + SQL ที่ /metrics (Prometheus)
+
+
+@server.before_request
+def refresh_dataset_caches():
+    # เช็ค dataset_version ใน DB (อย่างมากทุกไม่กี่วินาที) ถ้าเปลี่ยนจะล้าง Cache ของ Worker นี้
+    check_dataset_version()
+
+# หน้าที่สร้างกราฟตอนสร้าง Layout ต้องสร้างใหม่เมื่อตัวกรองเปลี่ยน (หน้าอื่นมี Callback รับตัวกรองเอง)
+FILTERED_LAYOUT_PAGES = {"/branches", "/address"}
 
 CONTENT_STYLE = {
     "margin-left": "285px", 
@@ -33,8 +49,12 @@ CONTENT_STYLE = {
 app.layout = html.Div(
     [
         dcc.Location(id="url", refresh=False, pathname="/overview"),
+        render_cross_filter_store(),
         render_sidebar(),
-        html.Div(id="page-content", style=CONTENT_STYLE),
+        html.Div(
+            [render_cross_filter_bar(), html.Div(id="page-content")],
+            style=CONTENT_STYLE,
+        ),
     ]
 )
 
@@ -46,24 +66,29 @@ app.layout = html.Div(
      Output("nav-overview", "active"),
      Output("nav-credit", "active"),
      Output("nav-performance", "active")],
-    [Input("url", "pathname")]
+    [Input("url", "pathname"),
+     Input("cross-filter", "data")]
 )
-def render_and_update_sidebar(pathname):
-    # 1. เลือก Layout ที่จะแสดงผลตาม URL
+def render_and_update_sidebar(pathname, filters):
+    if ctx.triggered_id == "cross-filter" and pathname not in FILTERED_LAYOUT_PAGES:
+        raise PreventUpdate
+    signature = filter_signature(filters)
+
+    # 1. เลือก Layout ที่จะแสดงผลตาม URL (สร้างใหม่ทุกครั้งเพื่อให้ตามทันข้อมูลล่าสุด กราฟดึงจาก Cache)
     if pathname == "/" or pathname == "/overview":
-        content = overview.layout
+        content = overview.overview_layout()
     elif pathname == "/credit-score":
         content = creditscore.layout
     elif pathname == "/member":
-        content = member.layout
+        content = member.member_layout()
     elif pathname == "/branches":
-        content = branches.layout
+        content = branches.branch_layout(signature)
     elif pathname == "/address":
-        content = address.layout
+        content = address.address_layout(signature)
     elif pathname == "/amount":   
-        content = amount.layout
+        content = amount.amount_layout()
     elif pathname == "/performance":
-        content = performance.layout
+        content = performance.performance_layout()
     else:
         content = html.Div([
             html.H1("404: Not found", className="text-danger"),
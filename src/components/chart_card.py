@@ -1,20 +1,27 @@
 from dash import dcc, html
+from dash.development.base_component import Component
 import dash_bootstrap_components as dbc
 
+def chart_graph(graph_id=None, figure=None, height=None):
+    """dcc.Graph มาตรฐานของการ์ด (ใส่ graph_id เมื่อต้องให้ Callback เติม figure / รับคลิก)"""
+    props = {"id": graph_id} if graph_id else {}
+    return dcc.Graph(
+        figure=figure if figure is not None else {},
+        config={
+            "displayModeBar": False, 
+            "responsive": True,
+            # เพิ่มพารามิเตอร์เพื่อให้ Plotly วาดใหม่เมื่อขนาดจอเปลี่ยน
+            "autosizable": True 
+        },
+        # กำหนดความสูงที่แน่นอนให้ dcc.Graph เพื่อไม่ให้คำนวณผิดพลาด
+        style={"height": f"{height}px"} if height else {"height": "100%"},
+        **props,
+    )
+
 def chart_card(fig, title=None, height=None):
     graph = (
-        fig if isinstance(fig, dcc.Graph)
-        else dcc.Graph(
-            figure=fig,
-            config={
-                "displayModeBar": False, 
-                "responsive": True,
-                # เพิ่มพารามิเตอร์เพื่อให้ Plotly วาดใหม่เมื่อขนาดจอเปลี่ยน
-                "autosizable": True 
-            },
-            # กำหนดความสูงที่แน่นอนให้ dcc.Graph เพื่อไม่ให้คำนวณผิดพลาด
-            style={"height": f"{height}px"} if height else {"height": "100%"},
-        )
+        fig if isinstance(fig, Component)  # dcc.Graph หรือ dcc.Loading ที่ห่อ Graph ไว้
+        else chart_graph(figure=fig, height=height)
     )
 
     return dbc.Card(
@@ -24,7 +31,7 @@ def chart_card(fig, title=None, height=None):
                     title, 
                     className="fw-bold mb-3",
                     style={"color": "#1e293b", "fontSize": "15px"} # ล็อกสีและขนาดหัวข้อ
-                ) if title else None,
+                ) if title is not None else None,  # Component ว่าง (เช่น Span ที่ Callback เติม) มีค่าเป็น False
                 # ห่อหุ้ม Graph ด้วย Div ที่คุม Overflow
                 html.Div(graph, style={"overflow": "hidden"}) 
             ],
@@ -0,0 +1,129 @@
+from dash import dcc, html, Input, Output, callback
+import dash_bootstrap_components as dbc
+
+from ..filter_index import DIMENSIONS, RANGE_DIMENSIONS, format_value, get_index
+from .theme import THEME
+
+# ==================================================
+# Filter State (ตัวกรองใน Sidebar = ตัวกรองของทุกหน้า, คลิกกราฟ = เลือกค่าในตัวกรอง)
+# ==================================================
+STORE_ID = "cross-filter"
+SIDEBAR_FILTERS = ["branch", "province", "career", "gender", "risk"]
+DATE_FILTER = "reg_date"
+
+
+def filter_control_id(dim):
+    return f"filter-{dim.replace('_', '-')}"
+
+
+def render_cross_filter_store():
+    # {dimension: [ค่า], "reg_date": [เริ่ม, สิ้นสุด]} สร้างจาก Sidebar เท่านั้น ทุกหน้าอ่านจากที่นี่
+    return dcc.Store(id=STORE_ID, storage_type="session", data={})
+
+
+def render_filter_controls():
+    """ตัวกรองใน Sidebar (ตัวเลือกเติมผ่าน Callback ตามข้อมูลล่าสุด)"""
+    dropdowns = [
+        dcc.Dropdown(
+            id=filter_control_id(dim),
+            placeholder=f"ทุก{DIMENSIONS[dim]}",
+            multi=True,
+            value=[],
+            persistence=True,
+            persistence_type="session",
+            className="mb-2",
+            style={"fontSize": "14px"},
+        )
+        for dim in SIDEBAR_FILTERS
+    ]
+    return html.Div(
+        [
+            html.Div([html.I(className="fas fa-filter me-2"), "ตัวกรองข้อมูล"], className="fw-bold small text-muted mb-2"),
+            *dropdowns,
+            dcc.DatePickerRange(
+                id=filter_control_id(DATE_FILTER),
+                start_date_placeholder_text="สมัครตั้งแต่",
+                end_date_placeholder_text="ถึง",
+                display_format="DD/MM/YYYY",
+                clearable=True,
+                persistence=True,
+                persistence_type="session",
+                className="mb-2",
+            ),
+        ],
+        className="px-1",
+    )
+
+
+def render_cross_filter_bar():
+    return html.Div(
+        [
+            html.Span([html.I(className="fas fa-filter me-2"), "กรองอยู่:"], className="small text-muted me-2"),
+            html.Div(id="cross-filter-chips", className="d-flex flex-wrap gap-2"),
+            dbc.Button("ล้างตัวกรอง", id="cross-filter-clear", size="sm", color="link", className="ms-auto"),
+        ],
+        id="cross-filter-bar",
+        className="align-items-center mb-3 px-3 py-2 bg-white rounded-3 shadow-sm",
+        style={"display": "none"},
+    )
+
+# ==================================================
+# Callbacks
+# ==================================================
+@callback(
+    [Output(filter_control_id(dim), "options") for dim in SIDEBAR_FILTERS]
+    + [Output(filter_control_id(DATE_FILTER), "min_date_allowed"),
+       Output(filter_control_id(DATE_FILTER), "max_date_allowed")],
+    Input("url", "pathname")
+)
+def update_filter_options(_):
+    index = get_index()
+    options = [
+        [{"label": format_value(dim, v), "value": v} for v in index.values(dim)]
+        for dim in SIDEBAR_FILTERS
+    ]
+    return (*options, *index.date_bounds())
+
+
+@callback(
+    Output(STORE_ID, "data"),
+    [Input(filter_control_id(dim), "value") for dim in SIDEBAR_FILTERS]
+    + [Input(filter_control_id(DATE_FILTER), "start_date"),
+       Input(filter_control_id(DATE_FILTER), "end_date")]
+)
+def sync_filter_store(*values):
+    *selected, start_date, end_date = values
+    filters = {dim: value for dim, value in zip(SIDEBAR_FILTERS, selected) if value}
+    if start_date or end_date:
+        filters[DATE_FILTER] = [start_date, end_date]
+    return filters
+
+
+@callback(
+    [Output("cross-filter-chips", "children"),
+     Output("cross-filter-bar", "style")],
+    Input(STORE_ID, "data")
+)
+def update_cross_filter_bar(filters):
+    labels = {**DIMENSIONS, **RANGE_DIMENSIONS}
+    chips = [
+        dbc.Badge(
+            f"{labels[dim]}: "
+            + (format_value(dim, values) if dim in RANGE_DIMENSIONS else ", ".join(format_value(dim, v) for v in values)),
+            color="light", text_color="dark", className="border", style={"fontSize": "13px", "borderColor": THEME["grid"]},
+        )
+        for dim, values in (filters or {}).items()
+        if dim in labels and values
+    ]
+    return chips, {"display": "flex"} if chips else {"display": "none"}
+
+
+@callback(
+    [Output(filter_control_id(dim), "value", allow_duplicate=True) for dim in SIDEBAR_FILTERS]
+    + [Output(filter_control_id(DATE_FILTER), "start_date", allow_duplicate=True),
+       Output(filter_control_id(DATE_FILTER), "end_date", allow_duplicate=True)],
+    Input("cross-filter-clear", "n_clicks"),
+    prevent_initial_call=True
+)
+def clear_cross_filter(_):
+    return [[] for _ in SIDEBAR_FILTERS] + [None, None]
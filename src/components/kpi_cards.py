@@ -5,6 +5,8 @@ from typing import Any
 from datetime import datetime
 
 from .theme import THEME
+from ..figure_cache import memoize
+from ..metrics import figure_timer
 
 # ==================================================
 # KPI Card (Theme-based)
@@ -79,6 +81,7 @@ def render_kpi_card(
 # ==================================================
 # Overview KPI
 # ==================================================
+@memoize
 def render_overview_kpis(df: pd.DataFrame) -> dbc.Row:
     if df.empty:
         return dbc.Alert("ไม่พบข้อมูล Overview", color="warning")
@@ -108,27 +111,30 @@ def render_overview_kpis(df: pd.DataFrame) -> dbc.Row:
 # ==================================================
 # 3. KPI member 
 # ==================================================
-def render_member_kpis(df: pd.DataFrame) -> dbc.Row:
-    if df.empty:
+def member_kpi_gen(birthday: pd.Series) -> pd.Series:
+    """แปลงวันเกิดเป็นกลุ่ม Gen สำหรับ KPI (ค่าว่าง = None)"""
+    years = pd.to_datetime(birthday, errors="coerce").dt.year
+    gen = pd.Series("Gen Z", index=birthday.index, dtype=object)
+    gen[years.between(1981, 1996)] = "Gen Y"
+    gen[years.between(1965, 1980)] = "Gen X"
+    gen[years.between(1946, 1964)] = "Baby Boomer"
+    gen[years.isna()] = None
+    return gen
+
+
+def popular_gen_from_counts(gen_counts: pd.Series) -> str:
+    """เลือก Gen ที่พบมากที่สุด (เสมอกันเลือกตามตัวอักษร เหมือน Series.mode)"""
+    gen_counts = gen_counts[gen_counts > 0]
+    if gen_counts.empty:
+        return "N/A"
+    return min(gen_counts[gen_counts == gen_counts.max()].index)
+
+
+@figure_timer
+def render_member_kpi_row(total_members: int, male_count: int, female_count: int, popular_gen: str) -> dbc.Row:
+    if total_members == 0:
         return dbc.Alert("ไม่พบข้อมูล member", color="warning", className="text-center")
 
-    total_members = len(df)
-    male_count = len(df[df["gender_name"] == "นาย"]) if "gender_name" in df.columns else 0
-    female_count = len(df[df["gender_name"].isin(["นาง", "นางสาว"])]) if "gender_name" in df.columns else 0
-
-    popular_gen = "N/A"
-    if "birthday" in df.columns and not df["birthday"].isnull().all():
-        df['birthday'] = pd.to_datetime(df['birthday'], errors='coerce')
-        def get_gen(b_date):
-            if pd.isnull(b_date): return None
-            y = b_date.year
-            if 1946 <= y <= 1964: return "Baby Boomer"
-            if 1965 <= y <= 1980: return "Gen X"
-            if 1981 <= y <= 1996: return "Gen Y"
-            return "Gen Z"
-        df['gen_temp'] = df['birthday'].apply(get_gen)
-        popular_gen = df['gen_temp'].mode()[0] if not df['gen_temp'].mode().empty else "N/A"
-
     return dbc.Row([
         dbc.Col(render_kpi_card("สมาชิกทั้งหมด", f"{total_members:,}", "คน", "fa-users", "red"), lg=3, md=6),
         dbc.Col(render_kpi_card("เพศชาย", f"{male_count:,}", "คน", "fa-mars", "success"), lg=3, md=6),
@@ -136,6 +142,22 @@ def render_member_kpis(df: pd.DataFrame) -> dbc.Row:
         dbc.Col(render_kpi_card("กลุ่ม Gen หลัก", popular_gen, "ส่วนใหญ่", "fa-id-card", "purple"), lg=3, md=6),
     ], className="g-3 mb-4")
 
+
+@memoize
+def render_member_kpis(df: pd.DataFrame) -> dbc.Row:
+    if df.empty:
+        return dbc.Alert("ไม่พบข้อมูล member", color="warning", className="text-center")
+
+    total_members = len(df)
+    male_count = int((df["gender_name"] == "นาย").sum()) if "gender_name" in df.columns else 0
+    female_count = int(df["gender_name"].isin(["นาง", "นางสาว"]).sum()) if "gender_name" in df.columns else 0
+
+    popular_gen = "N/A"
+    if "birthday" in df.columns:
+        popular_gen = popular_gen_from_counts(member_kpi_gen(df["birthday"]).value_counts())
+
+    return render_member_kpi_row(total_members, male_count, female_count, popular_gen)
+
 import pandas as pd
 from dash import html
 import dash_bootstrap_components as dbc
@@ -143,6 +165,7 @@ import dash_bootstrap_components as dbc
 # ==================================================
 # Branch KPI (เวอร์ชันสมบูรณ์)
 # ==================================================
+@memoize
 def render_branch_kpis(df: pd.DataFrame) -> dbc.Row:
     if df.empty:
         return dbc.Alert("ไม่พบข้อมูลสาขา", color="warning", className="text-center")
@@ -179,8 +202,8 @@ def render_branch_kpis(df: pd.DataFrame) -> dbc.Row:
     latest_month_label = ""
 
     if "registration_date" in df.columns:
-        df["registration_date"] = pd.to_datetime(df["registration_date"], errors="coerce")
-        valid_dates = df["registration_date"].dropna()
+        reg_date = pd.to_datetime(df["registration_date"], errors="coerce")  # ไม่แก้ df ที่แชร์มาจาก Cache
+        valid_dates = reg_date.dropna()
 
         if not valid_dates.empty:
             latest_date = valid_dates.max()
@@ -188,8 +211,8 @@ def render_branch_kpis(df: pd.DataFrame) -> dbc.Row:
 
             latest_members_count = len(
                 df[
-                    (df["registration_date"].dt.year == y) &
-                    (df["registration_date"].dt.month == m)
+                    (reg_date.dt.year == y) &
+                    (reg_date.dt.month == m)
                 ]
             )
 
@@ -240,6 +263,7 @@ def render_branch_kpis(df: pd.DataFrame) -> dbc.Row:
 # ==================================================
 # 5. KPI Address 
 # ==================================================
+@memoize
 def render_address_kpis(df: pd.DataFrame) -> dbc.Row:
     if df.empty:
         return dbc.Alert("ไม่พบข้อมูลที่อยู่", color="warning", className="text-center")
@@ -271,6 +295,7 @@ def render_address_kpis(df: pd.DataFrame) -> dbc.Row:
 # ==================================================
 # 6. KPI Amount 
 # ==================================================
+@memoize
 def render_amount_kpis(df: pd.DataFrame) -> dbc.Row:
     if df.empty:
         return dbc.Alert("ยังไม่มีข้อมูลทางการเงิน", color="warning")
@@ -285,11 +310,11 @@ def render_amount_kpis(df: pd.DataFrame) -> dbc.Row:
     # 3. ยอดที่เพิ่งจ่ายออก (โอนกู้ใหม่) เดือนนี้
     new_disbursement = 0
     if 'registration_date' in df.columns:
-        df['registration_date'] = pd.to_datetime(df['registration_date'])
-        latest = df['registration_date'].max()
+        reg_date = pd.to_datetime(df['registration_date'])  # ไม่แก้ df ที่แชร์มาจาก Cache
+        latest = reg_date.max()
         new_disbursement = df[
-            (df['registration_date'].dt.month == latest.month) & 
-            (df['registration_date'].dt.year == latest.year)
+            (reg_date.dt.month == latest.month) & 
+            (reg_date.dt.year == latest.year)
         ]['credit_limit'].sum()
 
     # 4. เป้าหมายที่ต้องตามเก็บให้ได้เดือนนี้
@@ -332,41 +357,30 @@ def render_amount_kpis(df: pd.DataFrame) -> dbc.Row:
 # ==================================================
 # 6. KPI : สรุปภาพรวมความเติบโตขององค์กร 
 # ==================================================
-def render_performance_kpis(df: pd.DataFrame) -> dbc.Row:
+@figure_timer
+def render_performance_kpis(monthly: pd.DataFrame) -> dbc.Row:
+    """monthly = Rollup รายเดือน (index = เดือน, members, income) จาก timeseries.rollup()"""
     # 1. ตรวจสอบความว่างเปล่าของข้อมูล
-    if df.empty:
+    if monthly.empty or monthly["members"].sum() == 0:
         return dbc.Alert("ไม่พบข้อมูลสำหรับการวิเคราะห์", color="warning")
 
-    # 2. เตรียมข้อมูลวันที่
-    temp_df = df.copy()
-    # ตรวจสอบคอลัมน์และแปลงเป็น Datetime
-    reg_col = 'registration_date' if 'registration_date' in temp_df.columns else 'reg_date'
-    temp_df['reg_date_clean'] = pd.to_datetime(temp_df[reg_col], errors='coerce')
-    temp_df = temp_df.dropna(subset=['reg_date_clean']).sort_values('reg_date_clean')
-
-    # ทำความสะอาดข้อมูลรายได้ (Income)
-    if "income" in temp_df.columns:
-        temp_df["Income_Clean"] = (
-            temp_df["income"].astype(str).str.replace(",", "")
-            .pipe(pd.to_numeric, errors="coerce").fillna(0)
-        )
-
     # --------------------------------------------------
-    # 3. ตรรกะการคำนวณ (Logic Calculation)
+    # 2. ตรรกะการคำนวณ (Logic Calculation) จากตารางรายเดือน ไม่ต้องสแกนข้อมูลดิบ
     # --------------------------------------------------
     
     # ก. ยอดสมาชิกใหม่เฉลี่ย (คำนวณจาก 6 เดือนล่าสุดที่มีข้อมูล)
-    monthly_new = temp_df.set_index('reg_date_clean').resample('ME').size()
-    avg_monthly_new = monthly_new.tail(6).mean() if not monthly_new.empty else 0
+    monthly_new = monthly["members"]
+    avg_monthly_new = monthly_new.tail(6).mean()
 
     # ข. เป้าหมายสมาชิกในอีก 12 เดือนข้างหน้า
-    current_total = len(temp_df)
+    current_total = int(monthly_new.sum())
     target_next_year = current_total + (avg_monthly_new * 12)
 
     # ค. ความเร็วการเติบโต (FIX: เปลี่ยนจาก 2026 เป็นปี 2025 ตามที่คุณต้องการ)
     analysis_year = 2025 
-    count_this_year = len(temp_df[temp_df['reg_date_clean'].dt.year == analysis_year])
-    count_last_year = len(temp_df[temp_df['reg_date_clean'].dt.year == analysis_year - 1])
+    yearly = monthly_new.groupby(monthly_new.index.year).sum()
+    count_this_year = yearly.get(analysis_year, 0)
+    count_last_year = yearly.get(analysis_year - 1, 0)
 
     growth_pct = 0
     if count_last_year > 0:
@@ -376,11 +390,11 @@ def render_performance_kpis(df: pd.DataFrame) -> dbc.Row:
         growth_pct = 100.0 # กรณีปีที่แล้วไม่มีแต่ปีนี้มีสมาชิก
 
     # ง. มูลค่าธุรกิจรวมที่คาดหวัง (อ้างอิงจากรายได้เฉลี่ยต่อหัว)
-    avg_income = temp_df["Income_Clean"].mean() if "Income_Clean" in temp_df.columns else 0
+    avg_income = monthly["income"].sum() / current_total
     total_value_forecast = target_next_year * avg_income
 
     # --------------------------------------------------
-    # 4. การแสดงผล (UI Rendering)
+    # 3. การแสดงผล (UI Rendering)
     # --------------------------------------------------
     return dbc.Row(
         [
@@ -1,6 +1,8 @@
 from dash import html
 import dash_bootstrap_components as dbc
 
+from .cross_filter import render_filter_controls
+
 SIDEBAR_STYLE = {
     "position": "fixed",
     "top": 0, "left": 0, "bottom": 0,
@@ -103,6 +105,8 @@ def render_sidebar():
                 pills=True,
                 className="w-100"
             ),
+            html.Hr(className="my-3"),
+            render_filter_controls(),
         ],
         style=SIDEBAR_STYLE,
         id="sidebar",
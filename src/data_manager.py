@@ -1,8 +1,18 @@
 import pandas as pd
 import os
+import sys
+import time
+import hashlib
+import threading
+from functools import lru_cache
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 from .scoring_logic import CreditScoreCalculator
+from .figure_cache import figure_cache
+from .metrics import instrument_engine
+from .ingest.schema import DATASET_VERSION_DDL
+from . import shared_dataset
+from . import snapshot
 
 # ==================================================
 # 1. Database Configuration & Engine
@@ -15,7 +25,9 @@ PG_CONFIG = {
     "database": os.getenv("DB_NAME", "mydatabase"),
 }
 
+@lru_cache(maxsize=1)
 def get_pg_engine():
+    # ใช้ engine (และ connection pool) ตัวเดียวต่อ process
     try:
         engine = create_engine(
             f"postgresql+psycopg2://{PG_CONFIG['user']}:{PG_CONFIG['password']}"
@@ -23,7 +35,7 @@ def get_pg_engine():
             pool_pre_ping=True,
             pool_recycle=3600,
         )
-        return engine
+        return instrument_engine(engine)  # เวลาของทุกคำสั่ง SQL -> /metrics
     except Exception as e:
         print(f"[ERROR] สร้าง engine ไม่สำเร็จ: {e}")
         return None
@@ -40,8 +52,17 @@ def _get_range(rating):
     }
     return ranges.get(rating, '300-900')
 
+def _dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Hash เนื้อหาข้อมูล ใช้เป็น dataset version ของ Cache (ข้อมูลเปลี่ยน = version ใหม่)"""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).values
+    return hashlib.sha1(row_hashes.tobytes() + ",".join(df.columns).encode("utf-8")).hexdigest()[:16]
+
 def _save_calculated_score(customer_id, score, rating, risk):
-    """ฟังก์ชันสำหรับ Upsert ข้อมูลคะแนนลงฐานข้อมูล"""
+    """ฟังก์ชันสำหรับ Upsert ข้อมูลคะแนนลงฐานข้อมูล
+
+    ไม่ bump dataset version: ไม่มี Cache ของ Dashboard ที่อ่าน credit_scores
+    (bump ทุกการค้นหาทำให้ทุก Transaction แย่ง lock แถวเดียวกันใน dataset_version)
+    """
     engine = get_pg_engine()
     if not engine: return
     try:
@@ -69,7 +90,79 @@ def _save_calculated_score(customer_id, score, rating, risk):
         print(f"❌ บันทึกคะแนนล้มเหลว: {e}")
 
 # ==================================================
-# 3. Main Data Functions
+# 3. Dataset Version (ให้ทุก Worker รู้ว่าข้อมูลเปลี่ยน)
+# ==================================================
+MEMBER_DATASET = "members"          # ข้อมูลที่ load_data() ใช้ (Dashboard ทุกหน้า)
+CREDIT_DATASET = "credit_scoring"   # ข้อมูลคะแนนเครดิต
+VERSION_CHECK_INTERVAL = float(os.getenv("DATASET_VERSION_CHECK_SEC", 5))
+
+_dataset_caches = []
+_version_lock = threading.Lock()
+_version_state = {"version": None, "checked_at": 0.0}
+
+def bump_dataset_version(name: str = MEMBER_DATASET, conn=None):
+    """เพิ่ม version ของชุดข้อมูล (เรียกหลัง import ใน transaction เดียวกันได้)
+
+    ตาราง dataset_version สร้างครั้งเดียวตอน ingest หรือ `python -m src.data_manager bump` ไม่สร้างที่นี่
+    """
+    bump_sql = text("""
+        INSERT INTO dataset_version (name, version, updated_at) VALUES (:name, 1, NOW())
+        ON CONFLICT (name) DO UPDATE SET
+            version = dataset_version.version + 1,
+            updated_at = NOW()
+    """)
+    if conn is not None:
+        conn.execute(bump_sql, {"name": name})
+        return
+    engine = get_pg_engine()
+    if engine is None: return
+    try:
+        with engine.begin() as conn:
+            conn.execute(bump_sql, {"name": name})
+    except SQLAlchemyError as e:
+        print(f"[ERROR] bump_dataset_version: {e}")
+
+def get_dataset_version(name: str = MEMBER_DATASET):
+    """อ่าน version ปัจจุบันจากฐานข้อมูล (คืน None ถ้ายังไม่มีตาราง/ต่อไม่ได้)"""
+    engine = get_pg_engine()
+    if engine is None: return None
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                text("SELECT version FROM dataset_version WHERE name = :name"), {"name": name}
+            ).scalar()
+    except SQLAlchemyError:
+        return None
+
+def register_dataset_cache(func):
+    """ลงทะเบียน Cache ที่ต้องล้างเมื่อข้อมูลเปลี่ยน (ใช้ซ้อนบน @lru_cache ได้)"""
+    _dataset_caches.append(func)
+    return func
+
+def invalidate_dataset_caches():
+    for func in _dataset_caches:
+        func.cache_clear()
+    figure_cache.clear(disk=True)
+
+def check_dataset_version() -> bool:
+    """เช็ค version จาก DB ไม่บ่อยกว่าทุก VERSION_CHECK_INTERVAL วินาที ล้าง Cache ถ้าเปลี่ยน"""
+    now = time.monotonic()
+    if now - _version_state["checked_at"] < VERSION_CHECK_INTERVAL:
+        return False
+    with _version_lock:
+        if now - _version_state["checked_at"] < VERSION_CHECK_INTERVAL:
+            return False
+        _version_state["checked_at"] = now
+        version = get_dataset_version()
+        if version is None or version == _version_state["version"]:
+            return False
+        _version_state["version"] = version
+    print(f"🔄 dataset version เปลี่ยนเป็น {version} ล้าง Cache ของ Worker นี้")
+    invalidate_dataset_caches()
+    return True
+
+# ==================================================
+# 4. Main Data Functions
 # ==================================================
 
 def get_full_member_data(national_id: str):
@@ -178,6 +271,9 @@ def load_data() -> pd.DataFrame:
     engine = get_pg_engine()
     if engine is None: return pd.DataFrame()
 
+    # จำ version ก่อนดึงข้อมูล ถ้ามีการ bump ระหว่างดึง รอบเช็คถัดไปจะโหลดใหม่
+    _version_state["version"] = get_dataset_version()
+
     try:
         query = """
         SELECT 
@@ -213,8 +309,89 @@ def load_data() -> pd.DataFrame:
         print(f"[ERROR] load_data: {e}")
         return pd.DataFrame()
 
+    df.attrs["dataset_version"] = _dataset_fingerprint(df)
+    snapshot.save_snapshot(df)
     return df
 
+# ==================================================
+# 5. Snapshot: เปิดเร็วจากไฟล์ Parquet แล้วค่อย refresh จาก Postgres เบื้องหลัง
+# ==================================================
+_refresh_state = {"started": False, "frame": None}
+_refresh_lock = threading.Lock()
+
+def _background_refresh(snapshot_version):
+    df = load_data()
+    if df.empty or df.attrs.get("dataset_version") == snapshot_version:
+        return
+    with _refresh_lock:
+        _refresh_state["frame"] = df
+    print("🔄 ได้ข้อมูลล่าสุดจาก Postgres แล้ว สลับจาก snapshot")
+    invalidate_dataset_caches()
+
+def load_data_with_fallback() -> pd.DataFrame:
+    """โหลดชุดข้อมูลหลัก: snapshot ก่อน (cold start) / Postgres / snapshot เมื่อ DB ล่ม"""
+    with _refresh_lock:
+        fresh, _refresh_state["frame"] = _refresh_state["frame"], None
+        start_refresh = not _refresh_state["started"]
+        _refresh_state["started"] = True
+    if fresh is not None:
+        return fresh
+
+    # อ่าน snapshot (Parquet ทั้งชุด) เฉพาะตอน cold start หรือเมื่อ Postgres ใช้ไม่ได้
+    # reload ปกติ (version เปลี่ยน) โหลดจาก DB อย่างเดียว ไม่อ่านไฟล์ทิ้ง
+    if start_refresh:
+        snap = snapshot.load_snapshot()
+        if snap is not None:
+            threading.Thread(
+                target=_background_refresh, args=(snap.attrs.get("dataset_version"),),
+                name="dataset-refresh", daemon=True,
+            ).start()
+            return snap
+
+    connected = test_connection()
+    df = load_data() if connected else pd.DataFrame()
+    if not df.empty or start_refresh:  # cold start ไม่มี snapshot ให้ใช้อยู่แล้ว
+        return df
+
+    snap = snapshot.load_snapshot()
+    if snap is None:
+        return df
+    if not connected:
+        print("[WARN] ต่อฐานข้อมูลไม่ได้ ใช้ snapshot ล่าสุดแทน")
+    return snap
+
+# ==================================================
+# 6. Dataset หลัก (โหลดครั้งเดียว ใช้ร่วมกันทุกหน้า และทุก Worker ถ้าเปิด SHARED_DATASET_DIR)
+# ==================================================
+@register_dataset_cache
+@lru_cache(maxsize=1)
+def _base_dataset() -> pd.DataFrame:
+    if not shared_dataset.is_enabled():
+        return load_data_with_fallback()
+    db_version = get_dataset_version()
+    _version_state["version"] = db_version
+    return shared_dataset.load_or_publish(load_data_with_fallback, db_version)
+
+def get_dataset() -> pd.DataFrame:
+    """คืนชุดข้อมูลหลักแบบ shallow copy (เพิ่ม/แทนที่คอลัมน์ได้โดยไม่กระทบหน้าอื่น)"""
+    return _base_dataset().copy(deep=False)
+
+def publish_from_database():
+    """ให้ process หลัก (เช่น gunicorn master) โหลดจาก DB แล้ว publish ให้ Worker ทุกตัว
+
+    publish ไม่สำเร็จ (เช่น SHARED_DATASET_DIR เขียนไม่ได้/ดิสก์เต็ม) ไม่หยุด master
+    Worker จะโหลดหรือ publish เองผ่าน shared_dataset.load_or_publish
+    """
+    df = load_data()
+    if not df.empty:
+        try:
+            shared_dataset.publish_dataset(df, _version_state["version"])
+        except (shared_dataset.pa.ArrowException, OSError) as e:
+            print(f"[WARN] publish ชุดข้อมูลจาก master ไม่สำเร็จ ให้ Worker โหลดเอง: {e}")
+    engine = get_pg_engine()
+    if engine is not None:
+        engine.dispose()  # ไม่ส่ง connection ที่เปิดค้างต่อให้ Worker หลัง fork
+
 def test_connection() -> bool:
     engine = get_pg_engine()
     if engine is None: return False
@@ -226,4 +403,14 @@ def test_connection() -> bool:
         return False
 
 if __name__ == "__main__":
-    print(f"Database Connection: {test_connection()}")
\ No newline at end of file
+    if sys.argv[1:2] == ["bump"]:
+        # python -m src.data_manager bump [members|credit_scoring]
+        name = sys.argv[2] if len(sys.argv) > 2 else MEMBER_DATASET
+        engine = get_pg_engine()
+        if engine is not None:
+            with engine.begin() as conn:
+                conn.execute(text(DATASET_VERSION_DDL))
+                bump_dataset_version(name, conn)
+        print(f"{name} version: {get_dataset_version(name)}")
+    else:
+        print(f"Database Connection: {test_connection()}")
\ No newline at end of file
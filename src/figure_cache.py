@@ -0,0 +1,261 @@
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+from dash.development.base_component import Component
+from plotly.basedatatypes import BaseFigure
+from plotly.utils import PlotlyJSONEncoder
+
+from .files import atomic_write
+from .metrics import figure_timer
+
+# ==================================================
+# 1. Config
+# ==================================================
+CACHE_MAX_BYTES = int(float(os.getenv("FIGURE_CACHE_MAX_MB", 64)) * 1024 * 1024)
+CACHE_DIR = os.getenv("FIGURE_CACHE_DIR")  # ว่าง = เก็บเฉพาะใน Memory
+DISK_MAX_BYTES = int(float(os.getenv("FIGURE_CACHE_DISK_MAX_MB", 512)) * 1024 * 1024)
+
+# ==================================================
+# 2. Frame Keys: ผูก (dataset version, filters) กับ DataFrame ที่ส่งเข้ากราฟ
+# ==================================================
+# เก็บตาม id ของ object เท่านั้น ไม่ใช้ df.attrs เพราะ attrs ถูกคัดลอกไปยัง
+# DataFrame ที่กรองต่อ ทำให้ได้กราฟของชุดข้อมูลผิดตัวจาก Cache
+_frame_keys = {}
+
+
+def tag_frame(df, *filters):
+    """ระบุว่า df นี้คือข้อมูลเวอร์ชันไหนภายใต้ filter อะไร แล้วคืน df ตัวเดิม"""
+    version = df.attrs.get("dataset_version")
+    if version is None:
+        return df
+    frame_id = id(df)
+    if frame_id not in _frame_keys:
+        weakref.finalize(df, _frame_keys.pop, frame_id, None)
+    _frame_keys[frame_id] = (version, filters)
+    return df
+
+
+def frame_key(df):
+    return _frame_keys.get(id(df))
+
+# ==================================================
+# 3. LRU Cache (จำกัดขนาดเป็น byte ทั้งใน Memory และในโฟลเดอร์)
+# ==================================================
+# เก็บเป็น JSON เท่านั้น (figure = plotly JSON, component = JSON แบบที่ Dash ส่งให้ Browser)
+# ไฟล์ใน FIGURE_CACHE_DIR ที่ Process อื่นเขียนจึงไม่ถูกรันเป็นโค้ดตอนอ่าน (ไม่ใช้ pickle)
+def _dumps(value):
+    """คืน None ถ้าเป็นชนิดที่ไม่ได้เก็บ (คำนวณใหม่ทุกครั้ง)"""
+    if isinstance(value, BaseFigure):
+        return b"F" + pio.to_json(value, validate=False).encode("utf-8")
+    if isinstance(value, Component):
+        return b"C" + json.dumps(value, cls=PlotlyJSONEncoder).encode("utf-8")
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def _component_classes():
+    classes, stack = {}, [Component]
+    while stack:
+        cls = stack.pop()
+        stack.extend(cls.__subclasses__())
+        if getattr(cls, "_type", None):
+            classes[(cls._namespace, cls._type)] = cls
+    return classes
+
+
+def _component(node):
+    """JSON ของ component (dict ที่มี type/namespace/props) -> object ของ Dash แบบซ้อนกันทั้งต้น"""
+    if isinstance(node, list):
+        return [_component(child) for child in node]
+    if not isinstance(node, dict):
+        return node
+    if node.keys() == {"type", "namespace", "props"}:
+        key = (node["namespace"], node["type"])
+        cls = _component_classes().get(key)
+        if cls is None:
+            _component_classes.cache_clear()  # คลาสที่ import หลังสร้างตาราง
+            cls = _component_classes()[key]
+        return cls(**{name: _component(value) for name, value in node["props"].items()})
+    return {name: _component(value) for name, value in node.items()}
+
+
+def _loads(blob):
+    if blob[:1] == b"F":
+        # figure ผ่านการ validate ตอนสร้างครั้งแรกแล้ว ไม่ต้องตรวจซ้ำ
+        return go.Figure(json.loads(blob[1:]), _validate=False)
+    return _component(json.loads(blob[1:]))
+
+
+def _file_prefix(version) -> str:
+    return re.sub(r"[^\w.]", "_", str(version)) + "-"
+
+
+class FigureCache:
+    """เก็บ figure/component แบบ serialize แล้ว ตัดตัวที่ใช้ล่าสุดน้อยที่สุดออกเมื่อเกินขนาด
+
+    ไฟล์ชื่อ <dataset version>-<sha1 ของ key>.bin ใช้ร่วมกันได้ทุก Worker เกิน disk_max_bytes
+    ลบไฟล์ที่ใช้ล่าสุดนานที่สุด (mtime) และหลัง clear(disk=True) ไฟล์ของ version อื่นถูกลบเมื่อเห็น version ใหม่
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, directory=CACHE_DIR, disk_max_bytes=DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._disk_size = None  # ประมาณจากการเขียนของ Process นี้ สแกนจริงเมื่อเกินงบ
+        self._prune_pending = False
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, version):
+        return os.path.join(self.directory, _file_prefix(version) + hashlib.sha1(key.encode("utf-8")).hexdigest() + ".bin")
+
+    def get(self, key, version=None):
+        with self._lock:
+            blob = self._items.get(key)
+            if blob is not None:
+                self._items.move_to_end(key)
+                return blob
+        if self.directory:
+            path = self._path(key, version)
+            try:
+                with open(path, "rb") as f:
+                    blob = f.read()
+                os.utime(path)  # ใช้ล่าสุด (ลำดับการลบเมื่อเกินงบ)
+            except OSError:
+                return None
+            self._remember(key, blob)
+            return blob
+        return None
+
+    def put(self, key, blob, version=None):
+        self._remember(key, blob)
+        if self.directory:
+            self._prune_versions(version)
+            path = self._path(key, version)
+            try:
+                with atomic_write(path) as f:
+                    f.write(blob)
+            except OSError as e:
+                print(f"[WARN] เขียน figure cache ลงไฟล์ไม่สำเร็จ: {e}")
+                return
+            self._account_disk(len(blob))
+
+    def _remember(self, key, blob):
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = blob
+            self._size += len(blob)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _cache_files(self):
+        """[(mtime, ขนาด, path)] ของไฟล์ cache ทั้งหมดในโฟลเดอร์"""
+        files = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return files
+        for entry in entries:
+            if entry.name.endswith(".bin"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _account_disk(self, added):
+        with self._lock:
+            if self._disk_size is not None:
+                self._disk_size += added
+                if self._disk_size <= self.disk_max_bytes:
+                    return
+        files = sorted(self._cache_files())
+        total = sum(size for _, size, _ in files)
+        # ลบจนเหลือ 80% ของงบ จะได้ไม่ต้องสแกนโฟลเดอร์ทุกครั้งที่เขียน
+        target = self.disk_max_bytes * 0.8 if total > self.disk_max_bytes else total
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_size = total
+
+    def _prune_versions(self, version):
+        """ครั้งแรกที่เขียนหลัง clear(disk=True): ลบไฟล์ของ version อื่นทั้งหมด"""
+        if not self._prune_pending or version is None:
+            return
+        with self._lock:
+            if not self._prune_pending:
+                return
+            self._prune_pending = False
+        prefix = _file_prefix(version)
+        for _, _, path in self._cache_files():
+            if not os.path.basename(path).startswith(prefix):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        with self._lock:
+            self._disk_size = None
+
+    def get_or_build(self, key, builder, version=None):
+        blob = self.get(key, version)
+        if blob is not None:
+            return _loads(blob)
+        value = builder()
+        blob = _dumps(value)
+        if blob is not None:
+            self.put(key, blob, version)
+        return value
+
+    def clear(self, disk=False):
+        """ล้าง Memory disk=True: ไฟล์ของ version อื่นจะถูกลบเมื่อเขียน version ใหม่ครั้งแรก"""
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+            if disk and self.directory:
+                self._prune_pending = True
+
+
+figure_cache = FigureCache()
+
+# ==================================================
+# 4. Decorator สำหรับ chart_* / render_*_kpis
+# ==================================================
+def memoize(func):
+    """Cache ผลลัพธ์ตาม (ฟังก์ชัน, dataset version, filters ของ df, อาร์กิวเมนต์อื่น)
+
+    ถ้า df ไม่ได้ผ่าน tag_frame() จะคำนวณใหม่ตามปกติ (ไม่เสี่ยงได้ผลลัพธ์ผิดชุดข้อมูล)
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(df, *args, **kwargs):
+        key = frame_key(df)
+        if key is None:
+            return func(df, *args, **kwargs)
+        cache_key = repr((name, key, args, sorted(kwargs.items())))
+        return figure_cache.get_or_build(cache_key, lambda: func(df, *args, **kwargs), version=key[0])
+
+    return figure_timer(wrapper)
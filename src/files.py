@@ -0,0 +1,45 @@
+"""โฟลเดอร์ data/ ของโปรเจกต์ + การเขียนไฟล์แบบ atomic ที่ทุกโมดูลใช้ร่วมกัน"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+# ==================================================
+# 1. โฟลเดอร์ข้อมูลของโปรเจกต์ (ค่าเริ่มต้นของ snapshot/cache/quarantine/...)
+# ==================================================
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# สิทธิ์ของไฟล์ใหม่ตาม umask (NamedTemporaryFile สร้างเป็น 0600 เสมอ)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# ==================================================
+# 2. เขียนไฟล์แบบ atomic: เขียนลงไฟล์ชั่วคราวในโฟลเดอร์เดียวกัน ครบแล้วค่อย os.replace
+# ==================================================
+# ชื่อไฟล์ชั่วคราวสุ่มใหม่ทุกครั้ง หลาย Thread ใน Worker เดียวกัน (pid เดียวกัน) เขียน key เดียวกันได้
+# ผู้อ่านเห็นไฟล์เก่าหรือไฟล์ใหม่ที่สมบูรณ์เท่านั้น ถ้าเขียนไม่สำเร็จไฟล์ชั่วคราวถูกลบ
+@contextmanager
+def atomic_write(path, mode="wb", encoding=None):
+    """เปิดไฟล์ชั่วคราวให้เขียน ออกจาก with โดยไม่มี exception = แทนที่ path"""
+    tmp = tempfile.NamedTemporaryFile(
+        mode, encoding=encoding, dir=os.path.dirname(path) or ".",
+        prefix=f"{os.path.basename(path)}.", suffix=".tmp", delete=False,
+    )
+    try:
+        with tmp:
+            yield tmp
+        os.chmod(tmp.name, 0o666 & ~_UMASK)
+        os.replace(tmp.name, path)
+    except BaseException:
+        try:
+            os.remove(tmp.name)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def atomic_path(path):
+    """แบบเดียวกับ atomic_write แต่ให้ชื่อไฟล์ชั่วคราว สำหรับ writer ที่เปิดไฟล์เอง (Parquet/Arrow/to_csv)"""
+    with atomic_write(path) as tmp:
+        tmp.close()
+        yield tmp.name
@@ -0,0 +1,197 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .data_manager import get_dataset, register_dataset_cache
+from .figure_cache import frame_key, tag_frame
+
+# ==================================================
+# 1. Dimensions ที่ใช้ Cross-filter ได้
+# ==================================================
+DIMENSIONS = {
+    "branch": "สาขา",
+    "province": "จังหวัด",
+    "career": "อาชีพ",
+    "gender": "เพศ",
+    "reg_year": "ปีที่สมัคร",
+    "risk": "ระดับความเสี่ยง",
+}
+NUMERIC_DIMENSIONS = {"branch", "reg_year"}
+RANGE_DIMENSIONS = {"reg_date": "วันที่สมัคร"}  # ค่าใน Store = [วันเริ่ม, วันสิ้นสุด] (ISO, ว่างได้)
+
+GENDER_GROUPS = {"นาย": "ชาย", "นาง": "หญิง", "นางสาว": "หญิง"}
+RISK_BINS = [-1, 50, 80, 100]
+RISK_LABELS = ["ต่ำ (0-50%)", "ปานกลาง (50-80%)", "สูง (80-100%)"]
+
+
+def dimension_series(df: pd.DataFrame) -> dict:
+    """ค่าของแต่ละ dimension ต่อแถว (คำนวณจากคอลัมน์ดิบของ load_data)"""
+    series = {}
+    if "branch_no" in df.columns:
+        series["branch"] = df["branch_no"]
+    if "province_name" in df.columns:
+        series["province"] = df["province_name"]
+    if "career_name" in df.columns:
+        series["career"] = df["career_name"]
+    if "gender_name" in df.columns:
+        series["gender"] = df["gender_name"].map(GENDER_GROUPS).fillna("ไม่ระบุ")
+    if "registration_date" in df.columns:
+        series["reg_year"] = _registration_dates(df).dt.year
+    if "credit_limit_used_pct" in df.columns:
+        series["risk"] = pd.cut(df["credit_limit_used_pct"], bins=RISK_BINS, labels=RISK_LABELS)
+    return series
+
+
+def _registration_dates(df):
+    return pd.to_datetime(df["registration_date"], errors="coerce")
+
+
+def normalize_value(dim, value):
+    """แปลงค่าจาก Store/คลิกกราฟ (เช่น "สาขา 3", "2015", 3.0) ให้ตรงกับ key ของ index"""
+    if value is None or value == "":
+        return None
+    if dim in RANGE_DIMENSIONS:
+        date = pd.to_datetime(value, errors="coerce")
+        return None if pd.isna(date) else date.date().isoformat()
+    if dim in NUMERIC_DIMENSIONS:
+        match = re.search(r"-?\d+", str(value))
+        return int(match.group()) if match else None
+    return str(value)
+
+# ==================================================
+# 2. Query Engine: Bitmap Index + ช่วงวันที่ (คำนวณครั้งเดียวต่อ dataset version)
+# ==================================================
+class BitmapIndex:
+    """เก็บ bitmap (np.packbits) ของทุกค่าในแต่ละ dimension และวันสมัครที่เรียงไว้แล้ว
+
+    กรองหลายเงื่อนไข = OR ภายใน dimension แล้ว AND ข้าม dimension บน bitmap
+    ช่วงวันที่ใช้ binary search บนวันที่ที่เรียงไว้ แทนการสแกนคอลัมน์ของ DataFrame ซ้ำทุกครั้ง
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for dim, values in dimension_series(df).items():
+            codes, uniques = pd.factorize(values, sort=True)
+            self.bitmaps[dim] = {
+                normalize_value(dim, value): np.packbits(codes == code)
+                for code, value in enumerate(uniques)
+            }
+
+        self.date_order = None
+        if "registration_date" in df.columns:
+            days = _registration_dates(df).to_numpy(dtype="datetime64[D]")
+            valid = np.flatnonzero(~np.isnat(days))
+            self.date_order = valid[np.argsort(days[valid], kind="stable")]
+            self.sorted_dates = days[self.date_order]
+
+    def values(self, dim):
+        return list(self.bitmaps.get(dim, {}))
+
+    def date_bounds(self):
+        if self.date_order is None or not len(self.date_order):
+            return None, None
+        return str(self.sorted_dates[0]), str(self.sorted_dates[-1])
+
+    def _range_bits(self, start, end):
+        selected = np.zeros(self.n_rows, dtype=bool)
+        if self.date_order is not None:
+            lo = np.searchsorted(self.sorted_dates, np.datetime64(start), "left") if start else 0
+            hi = np.searchsorted(self.sorted_dates, np.datetime64(end), "right") if end else len(self.sorted_dates)
+            selected[self.date_order[lo:hi]] = True
+        return np.packbits(selected)
+
+    def mask(self, signature) -> np.ndarray:
+        bits = None
+        for dim, values in signature:
+            if dim in RANGE_DIMENSIONS:
+                dim_bits = self._range_bits(*values)
+            else:
+                index = self.bitmaps.get(dim, {})
+                dim_bits = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+                for value in values:
+                    if value in index:
+                        np.bitwise_or(dim_bits, index[value], out=dim_bits)
+            bits = dim_bits if bits is None else np.bitwise_and(bits, dim_bits, out=bits)
+        if bits is None:
+            return np.ones(self.n_rows, dtype=bool)
+        return np.unpackbits(bits, count=self.n_rows).view(bool)
+
+
+@register_dataset_cache
+@lru_cache(maxsize=1)
+def get_index() -> BitmapIndex:
+    return BitmapIndex(get_dataset())
+
+# ==================================================
+# 3. Filter Signature & Row Selection
+# ==================================================
+def filter_signature(filters) -> tuple:
+    """แปลง {dimension: [ค่า]} จาก Store เป็น tuple ที่ hash ได้ (ใช้เป็น key ของ Cache)"""
+    signature = []
+    for dim, values in sorted((filters or {}).items()):
+        if dim in RANGE_DIMENSIONS:
+            start, end = (list(values or []) + [None, None])[:2]
+            bounds = (normalize_value(dim, start), normalize_value(dim, end))
+            if bounds != (None, None):
+                signature.append((dim, bounds))
+            continue
+        if dim not in DIMENSIONS or not values:
+            continue
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+        normalized = {normalize_value(dim, v) for v in values} - {None}
+        if normalized:
+            signature.append((dim, tuple(sorted(normalized))))
+    return tuple(signature)
+
+
+def without(signature, dim) -> tuple:
+    """signature ที่ตัด dimension ของกราฟเองออก (กราฟยังเห็นทุกแท่งของตัวเองให้คลิกต่อได้)"""
+    return tuple(part for part in signature if part[0] != dim)
+
+
+@register_dataset_cache
+@lru_cache(maxsize=64)
+def filter_mask(signature) -> np.ndarray:
+    mask = get_index().mask(signature)
+    mask.setflags(write=False)  # ใช้ร่วมกันจาก Cache ห้ามแก้ไข
+    return mask
+
+
+def filter_frame(df: pd.DataFrame, signature) -> pd.DataFrame:
+    """เลือกแถวตาม signature (df ต้องเรียงแถวเดียวกับ get_dataset() เช่นผ่านแค่ preprocess)"""
+    if not signature or df.empty:
+        return df
+    mask = filter_mask(signature)
+    if len(mask) != len(df):
+        print(f"[WARN] จำนวนแถวไม่ตรงกับ index ({len(df)} != {len(mask)}) ข้ามการกรอง")
+        return df
+    key = frame_key(df)
+    return tag_frame(df[mask], *(key[1] if key else ()), signature)
+
+# ==================================================
+# 4. Click → ค่าของตัวกรองใน Sidebar
+# ==================================================
+def clicked_value(click_data, key):
+    """ค่าจากจุดที่คลิก (key = "x", "y" หรือ "label")"""
+    if not click_data or not click_data.get("points"):
+        return None
+    return click_data["points"][0].get(key)
+
+
+def toggle_value(current, dim, value) -> list:
+    """คลิกค่าเดิมซ้ำ = ยกเลิกตัวกรอง dimension นั้น, ค่าใหม่ = กรองด้วยค่านั้น"""
+    value = normalize_value(dim, value)
+    if value is None:
+        return current or []
+    return [] if current == [value] else [value]
+
+
+def format_value(dim, value) -> str:
+    if dim in RANGE_DIMENSIONS:
+        start, end = value
+        return f"{start or '...'} ถึง {end or '...'}"
+    return f"สาขา {value}" if dim == "branch" else str(value)
@@ -0,0 +1,114 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from .forecast_jobs import FORECAST_WORKERS, get_executor, group_signatures
+from .forecasting import BACKENDS, history
+
+# ==================================================
+# 1. Config
+# ==================================================
+# Rolling-origin backtest: ตัดข้อมูล ณ จุดเริ่ม (origin) หลายจุด fit ด้วยข้อมูลก่อน origin
+# แล้ววัดผลกับค่าจริง horizon เดือนถัดไป เลื่อน origin ทีละเดือนย้อนหลัง ORIGINS จุด
+HORIZON = 6       # จำนวนเดือนที่วัดผลต่อ origin
+ORIGINS = 12      # จำนวน origin ล่าสุดที่ใช้
+MIN_TRAIN = 12    # จำนวนเดือนขั้นต่ำก่อน origin
+
+# ==================================================
+# 2. Backtest ของซีรีส์เดียว (รันใน Process แยก)
+# ==================================================
+def backtest_series(series_history: pd.Series, backend, horizon=HORIZON, origins=ORIGINS, min_train=MIN_TRAIN) -> dict:
+    """คืนค่าเฉลี่ยของ MAPE (%), coverage ของช่วงคาดการณ์ (%), เวลา fit ต่อครั้ง (วินาที) และจำนวน fit"""
+    values = series_history.to_numpy(dtype=float)
+    last_origin = len(values) - horizon
+    fit = BACKENDS[backend]
+    errors, covered, fit_seconds = [], [], []
+    for origin in range(max(min_train, last_origin - origins + 1), last_origin + 1):
+        started = time.perf_counter()
+        forecast = fit(series_history.iloc[:origin], horizon)
+        fit_seconds.append(time.perf_counter() - started)
+
+        # แถวแรกของผลคาดการณ์ = เดือนสุดท้ายของข้อมูล fit จึงเทียบตั้งแต่แถวที่ 2
+        actual = values[origin:origin + horizon]
+        predicted = forecast.iloc[1:horizon + 1]
+        nonzero = actual != 0
+        errors.append(np.abs(predicted["mean"].to_numpy()[nonzero] - actual[nonzero]) / np.abs(actual[nonzero]))
+        covered.append((actual >= predicted["lower"].to_numpy()) & (actual <= predicted["upper"].to_numpy()))
+
+    if not fit_seconds:
+        return {"mape": np.nan, "coverage": np.nan, "fit_ms": np.nan, "fits": 0}
+    errors, covered = np.concatenate(errors), np.concatenate(covered)
+    return {
+        "mape": errors.mean() * 100 if len(errors) else np.nan,
+        "coverage": covered.mean() * 100,
+        "fit_ms": np.mean(fit_seconds) * 1e3,
+        "fits": len(fit_seconds),
+    }
+
+
+def _run_task(task):
+    group, series_history, backend, horizon = task
+    try:
+        return {"group": group, "backend": backend, **backtest_series(series_history, backend, horizon)}
+    except Exception as e:
+        print(f"[WARN] backtest {backend} / {group}: {type(e).__name__}: {e}")
+        return {"group": group, "backend": backend, "mape": np.nan, "coverage": np.nan, "fit_ms": np.nan, "fits": 0}
+
+# ==================================================
+# 3. Backtest ทุกกลุ่ม x ทุก backend แบบขนาน
+# ==================================================
+def run_backtest(series="income", backends=("weighted", "linear"), dims=("branch", "province"),
+                 start_year=None, horizon=HORIZON) -> pd.DataFrame:
+    """ตารางผลต่อ (กลุ่ม, backend) กลุ่มแรกคือทั้งองค์กร ตามด้วยทุกสาขา/จังหวัด"""
+    groups = [("ทั้งหมด", ())] + group_signatures(dims)
+    tasks = [
+        (group, data, backend, horizon)
+        for group, signature in groups
+        for data in [history(series, start_year, signature)] if len(data) >= MIN_TRAIN + horizon
+        for backend in backends
+    ]
+    # ส่งทีละหลายงานต่อรอบ ลด overhead ของการ pickle ข้าม Process
+    chunksize = max(len(tasks) // (FORECAST_WORKERS * 4), 1)
+    return pd.DataFrame(list(get_executor().map(_run_task, tasks, chunksize=chunksize)))
+
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    """สรุปต่อ backend: MAPE/coverage เฉลี่ยทุกกลุ่ม, เวลา fit เฉลี่ย/รวม (CPU-วินาที) และ MAPE ที่ลดลงจาก weighted"""
+    results = results.assign(cpu_sec=results["fit_ms"] * results["fits"] / 1e3)
+    summary = results.groupby("backend").agg(
+        groups=("group", "size"), mape=("mape", "mean"), coverage=("coverage", "mean"),
+        fit_ms=("fit_ms", "mean"), cpu_sec=("cpu_sec", "sum"),
+    )
+    if "weighted" in summary.index:
+        summary["mape_gain"] = summary.loc["weighted", "mape"] - summary["mape"]
+    return summary.sort_values("mape")
+
+# ==================================================
+# 4. CLI: python -m src.forecast_backtest --backend weighted linear prophet
+# ==================================================
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest ของ forecast backend ต่อสาขา/จังหวัด")
+    parser.add_argument("--backend", nargs="+", default=["weighted", "linear"], choices=sorted(BACKENDS))
+    parser.add_argument("--series", default="income", choices=["income", "members"])
+    parser.add_argument("--dims", nargs="*", default=["branch", "province"], choices=["branch", "province"])
+    parser.add_argument("--year", type=int, default=None, help="ปีเริ่มต้นของข้อมูล (ไม่ระบุ = ทุกปี)")
+    parser.add_argument("--horizon", type=int, default=HORIZON)
+    parser.add_argument("--csv", help="บันทึกผลต่อกลุ่มลงไฟล์ CSV")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = run_backtest(args.series, tuple(args.backend), tuple(args.dims), args.year, args.horizon)
+    if results.empty:
+        print("[WARN] ข้อมูลไม่พอสำหรับ backtest")
+        return
+    if args.csv:
+        results.to_csv(args.csv, index=False)
+    with pd.option_context("display.float_format", "{:,.2f}".format, "display.width", 120):
+        print(summarize(results))
+    print(f"✅ backtest {len(results)} งาน เสร็จใน {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
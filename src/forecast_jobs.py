@@ -0,0 +1,253 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from .data_manager import get_dataset
+from .files import DATA_DIR, atomic_write
+from .filter_index import format_value, get_index
+from .forecasting import BACKENDS, BACKGROUND_BACKENDS, FORECAST_BACKEND, FORECAST_HORIZON, get_forecast, history
+
+# ==================================================
+# 1. Config
+# ==================================================
+# ผลคาดการณ์ของโมเดลหนัก (เช่น prophet) คำนวณใน Process Pool แล้วเก็บลงดิสก์
+# ทุก Worker ของ gunicorn อ่านไฟล์เดียวกัน ใช้ซ้ำจนกว่า dataset version จะเปลี่ยน
+FORECAST_JOB_DIR = os.getenv(
+    "FORECAST_JOB_DIR",
+    os.path.join(DATA_DIR, "forecasts"),
+)
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", max((os.cpu_count() or 2) - 1, 1)))
+JOB_TIMEOUT_SEC = float(os.getenv("FORECAST_JOB_TIMEOUT_SEC", 900))  # lock เก่ากว่านี้ถือว่า job ค้าง
+
+DONE, PENDING, FAILED = "done", "pending", "failed"
+
+# ==================================================
+# 2. Job Store: <FORECAST_JOB_DIR>/<dataset version>/<job key>.json
+# ==================================================
+# เก็บเป็น JSON เท่านั้น (forecast = คอลัมน์ตัวเลข + เดือน ISO, model = prophet model_to_json)
+# ไฟล์ที่ Process อื่นเขียนจึงไม่ถูกรันเป็นโค้ดตอนอ่าน (ไม่ใช้ pickle แบบเดียวกับ figure_cache)
+def dataset_version() -> str:
+    return get_dataset().attrs.get("dataset_version") or "unversioned"
+
+
+def job_key(series, start_year, horizon, signature, backend) -> str:
+    spec = repr((series, start_year, horizon, tuple(signature), backend))
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()[:20]
+
+
+def _job_path(version, key, suffix=".json"):
+    return os.path.join(FORECAST_JOB_DIR, version, key + suffix)
+
+
+def _encode_forecast(forecast):
+    if forecast is None:
+        return None
+    encoded = {column: forecast[column].tolist() for column in forecast.columns}
+    encoded["month"] = [month.isoformat() for month in forecast.index]
+    return encoded
+
+
+def _decode_forecast(encoded):
+    if encoded is None:
+        return None
+    index = pd.DatetimeIndex(encoded.pop("month"), name="month")
+    return pd.DataFrame(encoded, index=index, dtype=float)
+
+
+def read_result(version, key):
+    """ผลของ job ที่จบแล้ว {"forecast", "model", "backend", "fit_seconds", "error"} หรือ None"""
+    try:
+        with open(_job_path(version, key), encoding="utf-8") as f:
+            result = json.load(f)
+        result["forecast"] = _decode_forecast(result["forecast"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return result
+
+
+def _write_result(path, result):
+    result = dict(result, forecast=_encode_forecast(result["forecast"]))
+    with atomic_write(path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def _claim(lock_path) -> bool:
+    """จองการรัน job (กันหลาย Worker fit โมเดลเดียวกันซ้ำ) lock ที่เก่าเกิน JOB_TIMEOUT_SEC ยึดใหม่ได้"""
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    try:
+        if time.time() - os.path.getmtime(lock_path) > JOB_TIMEOUT_SEC:
+            os.remove(lock_path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+def prune(version):
+    """ลบผลของ dataset version อื่นที่ไม่มีการเขียนเกิน JOB_TIMEOUT_SEC
+
+    Worker แต่ละตัวเปลี่ยน version ไม่พร้อมกัน (เช็คทุก DATASET_VERSION_CHECK_SEC แล้วค่อยโหลดใหม่)
+    โฟลเดอร์ที่ยังมี job/lock เขียนอยู่ (mtime ใหม่) จึงอาจเป็นของ Worker อื่นที่ใช้ version ใหม่กว่า ห้ามลบ
+    """
+    try:
+        names = os.listdir(FORECAST_JOB_DIR)
+    except OSError:
+        return
+    cutoff = time.time() - JOB_TIMEOUT_SEC
+    for name in names:
+        path = os.path.join(FORECAST_JOB_DIR, name)
+        try:
+            stale = name != version and os.path.getmtime(path) < cutoff
+        except OSError:
+            continue
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+
+# ==================================================
+# 3. Worker (รันใน Process แยก ไม่ต้องโหลดชุดข้อมูลเอง รับ history ที่สรุปแล้ว)
+# ==================================================
+def run_job(path, lock_path, series_history, horizon, backend):
+    started = time.perf_counter()
+    try:
+        forecast = BACKENDS[backend](series_history, horizon)
+        model = forecast.attrs.pop("model", None)
+        result = {"forecast": forecast, "model": model, "error": None}
+    except Exception as e:
+        result = {"forecast": None, "model": None, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        result["backend"] = backend
+        result["fit_seconds"] = time.perf_counter() - started
+        _write_result(path, result)
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+    return path
+
+# ==================================================
+# 4. Scheduler
+# ==================================================
+_executor = None
+_executor_lock = threading.Lock()
+_futures = {}
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: ไม่ fork Worker ของเว็บที่มี Thread/Connection เปิดอยู่
+            _executor = ProcessPoolExecutor(FORECAST_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def _job_done(key, lock_path, future):
+    global _executor
+    _futures.pop(key, None)
+    error = future.exception()
+    if error is None:
+        return
+    # Worker ตายก่อนเขียนผล (เช่น หน่วยความจำไม่พอ): ปล่อย lock ให้ลองใหม่ได้ และสร้าง Pool ใหม่ครั้งหน้า
+    print(f"[ERROR] forecast job {key}: {error}")
+    try:
+        os.remove(lock_path)
+    except OSError:
+        pass
+    if isinstance(error, BrokenProcessPool):
+        with _executor_lock:
+            _executor = None
+
+
+def submit(series="income", start_year=None, horizon=FORECAST_HORIZON, signature=(), backend=None):
+    """ส่ง job เข้า Process Pool ถ้ายังไม่มีผล คืน (สถานะ, ผลลัพธ์ที่จบแล้วหรือ None)"""
+    backend = backend or FORECAST_BACKEND
+    version, key = dataset_version(), job_key(series, start_year, horizon, signature, backend)
+    result = read_result(version, key)
+    if result is not None:
+        return (FAILED if result["error"] else DONE), result
+
+    lock_path = _job_path(version, key, ".lock")
+    if key in _futures or not _claim(lock_path):
+        return PENDING, None
+
+    data = history(series, start_year, signature)
+    if data.empty:
+        os.remove(lock_path)
+        return FAILED, None
+    prune(version)
+    future = get_executor().submit(run_job, _job_path(version, key), lock_path, data, horizon, backend)
+    _futures[key] = future
+    future.add_done_callback(lambda f: _job_done(key, lock_path, f))
+    return PENDING, None
+
+
+def load_forecast(series="income", start_year=None, horizon=FORECAST_HORIZON, signature=(), backend=None):
+    """ผลคาดการณ์สำหรับหน้าเว็บ คืน (forecast, สถานะ, backend ที่ใช้จริง)
+
+    backend เบาคำนวณทันที (มี Cache), backend หนักอ่านจาก Job Store
+    ระหว่างที่ job ยังไม่เสร็จ (หรือล้มเหลว) แสดงผลแบบ weighted ไปก่อน
+    """
+    backend = backend or FORECAST_BACKEND
+    if backend in BACKGROUND_BACKENDS:
+        status, result = submit(series, start_year, horizon, signature, backend)
+        if status == DONE:
+            return result["forecast"], DONE, backend
+        return get_forecast(series, start_year, horizon, signature, "weighted"), status, "weighted"
+    return get_forecast(series, start_year, horizon, signature, backend), DONE, backend
+
+
+def group_signatures(dims=("branch", "province")):
+    """[(ชื่อกลุ่ม, signature)] ของทุกสาขา/จังหวัด (ใช้ตัวกรองเดียวกับ Cross-filter)"""
+    index = get_index()
+    return [
+        (format_value(dim, value), ((dim, (value,)),))
+        for dim in dims for value in index.values(dim)
+    ]
+
+
+def standard_jobs(start_year=None):
+    """ชุดคาดการณ์มาตรฐาน: รายได้สะสมรวม, สมาชิกใหม่ต่อเดือน, และรายได้สะสมของทุกสาขา/จังหวัด"""
+    jobs = [("income", start_year, ()), ("members", start_year, ())]
+    jobs += [("income", start_year, signature) for _, signature in group_signatures()]
+    return jobs
+
+
+def schedule_standard_jobs(start_year=None, backend=None, horizon=FORECAST_HORIZON):
+    return [submit(series, year, horizon, signature, backend)[0] for series, year, signature in standard_jobs(start_year)]
+
+# ==================================================
+# 5. CLI: python -m src.forecast_jobs --backend prophet [--year 2020]
+# ==================================================
+def main():
+    parser = argparse.ArgumentParser(description="คำนวณผลคาดการณ์มาตรฐานล่วงหน้าลง Job Store")
+    parser.add_argument("--backend", default=FORECAST_BACKEND, choices=sorted(BACKENDS))
+    parser.add_argument("--year", type=int, default=None, help="ปีเริ่มต้นของข้อมูล (ไม่ระบุ = ทุกปี)")
+    parser.add_argument("--horizon", type=int, default=FORECAST_HORIZON)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    statuses = schedule_standard_jobs(args.year, args.backend, args.horizon)
+    wait(list(_futures.values()))
+    version = dataset_version()
+    failed = [
+        key for key in (job_key(s, y, args.horizon, sig, args.backend) for s, y, sig in standard_jobs(args.year))
+        if (read_result(version, key) or {}).get("error")
+    ]
+    print(f"✅ forecast {len(statuses)} jobs ({args.backend}) เสร็จใน {time.perf_counter() - started:.1f}s"
+          + (f" ล้มเหลว {len(failed)} jobs" if failed else ""))
+
+
+if __name__ == "__main__":
+    main()
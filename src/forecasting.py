@@ -0,0 +1,124 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    from prophet import Prophet
+    from prophet.serialize import model_to_json
+except ImportError:  # ไม่มี prophet = ใช้ได้เฉพาะ backend ที่คำนวณด้วย NumPy
+    Prophet = None
+
+from .data_manager import register_dataset_cache
+from .timeseries import rollup, year_window
+
+# ==================================================
+# 1. Config
+# ==================================================
+FORECAST_BACKEND = os.getenv("FORECAST_BACKEND", "weighted")
+FORECAST_HORIZON = 12   # จำนวนเดือนที่คาดการณ์
+CONF_INTERVAL = 0.10    # ความกว้างของช่วงคาดการณ์ ณ เดือนสุดท้าย (±10%)
+RECENT_MONTHS = 6       # จำนวนเดือนล่าสุดที่ใช้หาอัตราการเติบโต
+
+# ==================================================
+# 2. Backends: (history, horizon) -> DataFrame(mean, lower, upper)
+# ==================================================
+# history = Series รายเดือน (index = วันแรกของเดือน) ผลลัพธ์เริ่มที่เดือนสุดท้ายของ history
+# (จุดเชื่อมกับเส้นจริง) แล้วต่อไปอีก horizon เดือน เพิ่มโมเดลใหม่ได้ด้วย @register_backend
+BACKENDS = {}
+BACKGROUND_BACKENDS = set()  # โมเดลที่ fit นานเกินจะรันใน Callback (ส่งไปรันใน forecast_jobs)
+
+
+def register_backend(name, background=False):
+    def decorator(func):
+        BACKENDS[name] = func
+        if background:
+            BACKGROUND_BACKENDS.add(name)
+        return func
+    return decorator
+
+
+def forecast_frame(last_date, mean, lower, upper) -> pd.DataFrame:
+    index = pd.date_range(last_date, periods=len(mean), freq="MS", name="month")
+    return pd.DataFrame({"mean": mean, "lower": lower, "upper": upper}, index=index)
+
+
+@register_backend("weighted")
+def weighted_drift(history: pd.Series, horizon: int) -> pd.DataFrame:
+    """ต่อเส้นตรงจากค่าล่าสุดด้วยค่าเฉลี่ยถ่วงน้ำหนักของการเปลี่ยนแปลง 6 เดือนล่าสุด (เดือนใหม่น้ำหนักมากกว่า)"""
+    values = history.to_numpy(dtype=float)
+    # ค่าก่อนเริ่มซีรีส์ = 0 (ยอดสะสมเริ่มจาก 0) การเปลี่ยนแปลงเดือนแรกจึงเท่ากับค่าเดือนแรก
+    steps = np.diff(values, prepend=0.0)[-RECENT_MONTHS:]
+    drift = np.average(steps, weights=np.arange(1, len(steps) + 1))
+
+    h = np.arange(horizon + 1)
+    mean = values[-1] + drift * h
+    spread = CONF_INTERVAL * h / horizon
+    return forecast_frame(history.index[-1], mean, mean * (1 - spread), mean * (1 + spread))
+
+
+@register_backend("linear")
+def linear_trend(history: pd.Series, horizon: int) -> pd.DataFrame:
+    """ความชันจาก Least Squares ของ 12 เดือนล่าสุด ช่วงคาดการณ์ 80% จากส่วนเหลือของเส้นตรง (กว้างขึ้นตาม √h)"""
+    values = history.to_numpy(dtype=float)[-12:]
+    t = np.arange(len(values))
+    if len(values) < 3:
+        return weighted_drift(history, horizon)
+    slope, intercept = np.polyfit(t, values, 1)
+    resid_std = np.std(values - (slope * t + intercept), ddof=2) if len(values) > 3 else 0.0
+
+    h = np.arange(horizon + 1)
+    mean = values[-1] + slope * h
+    spread = 1.2816 * resid_std * np.sqrt(h)  # z ของช่วง 80%
+    return forecast_frame(history.index[-1], mean, mean - spread, mean + spread)
+
+
+@register_backend("prophet", background=True)
+def prophet_forecast(history: pd.Series, horizon: int) -> pd.DataFrame:
+    """Prophet (trend + ฤดูกาลรายปี) ใช้เวลา fit หลายวินาที เก็บโมเดลที่ fit แล้วไว้ใน attrs["model"] (JSON)"""
+    if Prophet is None:
+        raise RuntimeError("ยังไม่ได้ติดตั้ง prophet (pip install prophet)")
+    model = Prophet(interval_width=0.8, weekly_seasonality=False, daily_seasonality=False)
+    model.fit(pd.DataFrame({"ds": history.index, "y": history.to_numpy(dtype=float)}))
+
+    future = pd.DataFrame({"ds": pd.date_range(history.index[-1], periods=horizon + 1, freq="MS")})
+    predicted = model.predict(future)
+    frame = forecast_frame(
+        history.index[-1],
+        predicted["yhat"].to_numpy(), predicted["yhat_lower"].to_numpy(), predicted["yhat_upper"].to_numpy(),
+    )
+    frame.iloc[0] = history.iloc[-1]  # จุดเชื่อม = ค่าจริงล่าสุด
+    frame.attrs["model"] = model_to_json(model)
+    return frame
+
+# ==================================================
+# 3. Series ที่คาดการณ์ได้ (สร้างจาก Rollup รายเดือนของ timeseries.py)
+# ==================================================
+SERIES = {
+    "income": lambda monthly: monthly["income"].cumsum(),  # รายได้สะสม
+    "members": lambda monthly: monthly["members"],         # สมาชิกใหม่ต่อเดือน
+}
+
+
+def history(series="income", start_year=None, signature=()) -> pd.Series:
+    year_start, _ = year_window(start_year)
+    return SERIES[series](rollup(signature, "M", start=year_start))
+
+
+@register_dataset_cache
+@lru_cache(maxsize=64)
+def get_forecast(series="income", start_year=None, horizon=FORECAST_HORIZON, signature=(), backend=None) -> pd.DataFrame:
+    """ผลคาดการณ์ต่อ (ชุดข้อมูล, ปีเริ่มต้น, horizon, ตัวกรอง, backend) เปลี่ยนปีกลับมาซ้ำได้จาก Cache ทันที
+
+    คืน DataFrame ว่างเมื่อไม่มีข้อมูล ผลลัพธ์ใช้ร่วมกันจาก Cache ห้ามแก้ไข
+    หน้าเว็บที่อาจใช้ backend หนัก (BACKGROUND_BACKENDS) ให้เรียกผ่าน forecast_jobs.load_forecast แทน
+    """
+    data = history(series, start_year, signature)
+    if data.empty:
+        return pd.DataFrame(columns=["mean", "lower", "upper"], dtype=float)
+    name = backend or FORECAST_BACKEND
+    if name not in BACKENDS:
+        print(f"[WARN] ไม่รู้จัก forecast backend '{name}' ใช้ 'weighted' แทน")
+        name = "weighted"
+    return BACKENDS[name](data, horizon)
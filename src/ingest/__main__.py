@@ -0,0 +1,106 @@
+"""นำเข้าข้อมูลเข้า Postgres แบบ COPY (แทน ipynb/import_data.ipynb และ creat_table_creditscore.ipynb)
+
+    python -m src.ingest --members data/member300.csv --amount data/datacredit.csv
+    python -m src.ingest --credit data/credit_dataset.xlsx --truncate
+    python -m src.ingest --members data/member300.csv --amount data/datacredit.csv --delta
+
+ไฟล์ถูกอ่านทีละ chunk แล้ว COPY ต่อทันที (หน่วยความจำคงที่ไม่ว่าไฟล์ใหญ่แค่ไหน)
+ไฟล์ที่เคยนำเข้าแล้วและเนื้อหาไม่เปลี่ยน อ่านจาก Parquet cache แทน (ดู source_cache.py)
+แถวที่ไม่ผ่านการตรวจ (ชนิด/ขอบเขต/ค่าบังคับ/คีย์ซ้ำ) ไม่ถูกนำเข้า แต่เขียนลง data/quarantine/ พร้อมเหตุผล
+--delta: ไฟล์คือข้อมูลทั้งชุดล่าสุด แก้เฉพาะแถวที่เพิ่ม/เปลี่ยน/หายไปเทียบกับรอบก่อน (ดู delta.py)
+ทุกไฟล์ที่ระบุนำเข้าใน Transaction เดียว (ล้มเหลว = ไม่มีอะไรเปลี่ยน) แล้ว bump dataset version
+ให้ Dashboard ทุก Worker โหลดข้อมูลใหม่
+"""
+import argparse
+import sys
+import time
+
+import psycopg2
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..data_manager import CREDIT_DATASET, MEMBER_DATASET, bump_dataset_version, get_pg_engine
+from .credit import CREDIT_FINGERPRINTS, load_credit
+from .delta import clear_fingerprints
+from .members import AMOUNT_FINGERPRINT, MEMBER_FINGERPRINT, load_members
+from .pg_copy import foreign_keys_deferred
+from .schema import CREDIT_DDL, CREDIT_TABLES, DATASET_VERSION_DDL, FINGERPRINT_DDL, MEMBER_DDL, MEMBER_TABLES
+from .sources import CHUNK_ROWS
+
+
+def report(counts: dict, seconds: float, quarantines=()):
+    for table, rows in counts.items():
+        print(f"  - {table:<32}{rows:>10,} แถว")
+    total = sum(counts.values())
+    print(f"✅ นำเข้า {total:,} แถวใน {seconds:.2f}s ({total / max(seconds, 1e-9):,.0f} แถว/วินาที)")
+    for quarantine in quarantines:
+        if quarantine.rows:
+            print(f"⚠️ ข้ามแถวที่ไม่ผ่านการตรวจ {quarantine.rows:,} แถว → {quarantine.path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="นำเข้าข้อมูลสมาชิก/การเงิน/เครดิตเข้า Postgres ด้วย COPY")
+    parser.add_argument("--members", help="CSV/Parquet สมาชิก + ที่อยู่ (เช่น data/member300.csv)")
+    parser.add_argument("--amount", help="CSV/Parquet ข้อมูลการเงิน (เช่น data/datacredit.csv) ใช้จำนวนแถวเท่ากับสมาชิก")
+    parser.add_argument("--credit", help="XLSX/CSV/Parquet ข้อมูลเครดิต (เช่น data/credit_dataset.xlsx)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="จำนวนแถวที่อ่าน/COPY ต่อครั้ง")
+    parser.add_argument("--no-cache", action="store_true", help="อ่านไฟล์ต้นทางใหม่ ไม่ใช้/ไม่สร้าง Parquet cache")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--truncate", action="store_true", help="ล้างตารางปลายทางก่อนนำเข้า (แทนที่ข้อมูลเดิม)")
+    mode.add_argument("--delta", action="store_true", help="แก้เฉพาะแถวที่เพิ่ม/เปลี่ยน/หายไปจากรอบก่อน (upsert)")
+    args = parser.parse_args(argv)
+    if not (args.members or args.credit):
+        parser.error("ระบุ --members และ/หรือ --credit")
+    if args.amount and not args.members:
+        parser.error("--amount ต้องใช้คู่กับ --members (จับคู่ตามลำดับแถว)")
+
+    engine = get_pg_engine()
+    if engine is None:
+        return 1
+
+    counts, quarantines = {}, []
+    started = time.perf_counter()
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(FINGERPRINT_DDL))
+            conn.execute(text(DATASET_VERSION_DDL))
+            if args.members:
+                for ddl in MEMBER_DDL:
+                    conn.execute(text(ddl))
+                load_args = (conn, args.members, args.amount, args.chunk_rows, not args.no_cache, args.delta)
+                if args.truncate:
+                    conn.execute(text(f"TRUNCATE {', '.join(MEMBER_TABLES)} RESTART IDENTITY CASCADE"))
+                    clear_fingerprints(conn, [MEMBER_FINGERPRINT, AMOUNT_FINGERPRINT])
+                    with foreign_keys_deferred(conn, MEMBER_TABLES):
+                        loaded, rejected = load_members(*load_args)
+                else:
+                    loaded, rejected = load_members(*load_args)
+                counts.update(loaded)
+                quarantines += rejected
+                # delta ที่ไม่มีอะไรเปลี่ยน: ไม่ bump Cache ของ Dashboard ยังใช้ได้
+                if not args.delta or any(loaded.values()):
+                    bump_dataset_version(MEMBER_DATASET, conn)
+            if args.credit:
+                for ddl in CREDIT_DDL:
+                    conn.execute(text(ddl))
+                if args.truncate:
+                    conn.execute(text(f"TRUNCATE {', '.join(CREDIT_TABLES)}"))
+                    clear_fingerprints(conn, CREDIT_FINGERPRINTS.values())
+                loaded, rejected = load_credit(conn, args.credit, args.chunk_rows, not args.no_cache, args.delta)
+                counts.update(loaded)
+                quarantines += rejected
+                if not args.delta or any(loaded.values()):
+                    bump_dataset_version(CREDIT_DATASET, conn)
+    except (OSError, ValueError) as e:
+        print(f"❌ อ่านไฟล์ไม่สำเร็จ (ยกเลิกทั้งหมด): {e}")
+        return 1
+    except (SQLAlchemyError, psycopg2.Error) as e:
+        print(f"❌ นำเข้าไม่สำเร็จ (ยกเลิกทั้งหมด): {e}")
+        return 1
+
+    report(counts, time.perf_counter() - started, quarantines)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
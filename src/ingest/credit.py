@@ -0,0 +1,228 @@
+import pandas as pd
+from sqlalchemy import text
+
+from .delta import changed_keys, delta_counts, deleted_keys, save_fingerprints, stage_changes, upsert_clause
+from .pg_copy import copy_frame, create_stage
+from .source_cache import cached_chunks
+from .sources import CHUNK_ROWS, iter_source, prefetch, require_columns
+from .validate import (
+    META_TYPES, REJECT_COLUMN, ROW_COLUMN, KeyTracker, Quarantine, bad_date, key_hashes, missing, not_number,
+    out_of_range, reasons, reject, reject_duplicates, too_long,
+)
+
+# ==================================================
+# 1. อ่านไฟล์ต้นทางทีละ chunk (credit_dataset.xlsx: 1 แถว = 1 บัญชีสินเชื่อ)
+# ==================================================
+DATE_COLUMNS = ["account_open_date", "report_date", "last_update_date"]
+
+# คอลัมน์ของแต่ละตาราง และคีย์ที่ใช้ตัดแถวซ้ำ (เก็บแถวแรกที่พบ เหมือน drop_duplicates เดิม)
+TABLES = {
+    "credit_scoring.customers": ("customer_id", [
+        "customer_id", "national_id", "borrower_name", "age", "gender", "education", "occupation", "monthly_income",
+    ]),
+    "credit_scoring.credit_accounts": ("account_number", [
+        "customer_id", "account_number", "contract_number", "product_type", "account_open_date", "account_status",
+        "credit_limit", "approved_amount", "outstanding_balance", "monthly_payment", "total_installments",
+        "paid_installments", "remaining_installments",
+    ]),
+    "credit_scoring.payment_history": ("customer_id", [
+        "customer_id", "installments_overdue", "days_past_due", "overdue_amount", "payment_performance_pct",
+        "late_payment_count_12m", "late_payment_count_24m",
+    ]),
+    "credit_scoring.credit_summary": ("customer_id", [
+        "customer_id", "total_accounts", "active_accounts", "closed_accounts", "total_credit_limit",
+        "credit_utilization_rate", "oldest_account_months", "inquiries_6m", "inquiries_12m",
+    ]),
+    "credit_scoring.credit_scores": ("customer_id", [
+        "customer_id", "credit_score", "credit_rating", "score_range", "report_date", "last_update_date",
+    ]),
+}
+# คอลัมน์ข้อความ (รวมรหัสที่เป็นตัวเลขยาว ไม่ให้กลายเป็นทศนิยม) ที่เหลือเป็นตัวเลข
+TEXT_COLUMNS = [
+    "customer_id", "national_id", "borrower_name", "gender", "education", "occupation", "account_number",
+    "contract_number", "product_type", "account_status", "credit_rating", "score_range",
+]
+STAGE_COLUMNS = list(dict.fromkeys(col for _, columns in TABLES.values() for col in columns))
+# ชนิดใน Staging กำหนดตายตัว ทุก chunk จึง COPY ได้ตรงกันแม้ chunk แรกจะมีค่าว่างทั้งคอลัมน์
+STAGE_TYPES = {
+    col: "TEXT" if col in TEXT_COLUMNS else "TIMESTAMP" if col in DATE_COLUMNS else "NUMERIC"
+    for col in STAGE_COLUMNS
+}
+
+# ข้อกำหนดเดียวกับ CREDIT_DDL (ค่าที่เกินจะทำให้ INSERT ล้มทั้ง Transaction)
+TEXT_LENGTHS = {
+    "customer_id": 20, "national_id": 13, "borrower_name": 200, "gender": 10, "education": 50, "occupation": 100,
+    "account_number": 50, "contract_number": 50, "product_type": 100, "account_status": 50, "credit_rating": 10,
+    "score_range": 50,
+}
+# ค่าสัมบูรณ์สูงสุด: DECIMAL(15,2) / DECIMAL(10,2) / INTEGER (คอลัมน์ตัวเลขที่เหลือ)
+NUMBER_LIMITS = {
+    **{col: 10**13 - 1 for col in [
+        "monthly_income", "credit_limit", "approved_amount", "outstanding_balance", "monthly_payment",
+        "overdue_amount", "total_credit_limit",
+    ]},
+    "payment_performance_pct": 10**8 - 1,
+    "credit_utilization_rate": 10**8 - 1,
+}
+NUMBER_COLUMNS = [col for col in STAGE_COLUMNS if col not in TEXT_COLUMNS and col not in DATE_COLUMNS]
+
+RISK_CATEGORY_SQL = """
+    CASE WHEN credit_score >= 750 THEN 'Low Risk'
+         WHEN credit_score >= 650 THEN 'Medium Risk'
+         WHEN credit_score IS NOT NULL THEN 'High Risk'
+         ELSE 'Unknown' END
+"""
+
+
+def _text(series: pd.Series) -> pd.Series:
+    # ตัวเลขจาก Excel (เช่น เลขบัตรประชาชน) เป็น int อยู่แล้ว ส่วนจาก CSV อาจเป็น float ที่มี .0 ต่อท้าย
+    return series.astype("string").str.replace(r"\.0$", "", regex=True)
+
+
+def normalize_credit(chunk: pd.DataFrame) -> pd.DataFrame:
+    raw = chunk[STAGE_COLUMNS].reset_index(drop=True)
+    chunk = raw.copy()
+    for col in STAGE_COLUMNS:
+        if col in DATE_COLUMNS:
+            chunk[col] = pd.to_datetime(chunk[col], dayfirst=True, errors="coerce")
+        elif col in TEXT_COLUMNS:
+            chunk[col] = _text(chunk[col])
+        else:
+            # float64 เสมอ (ไม่ใช่ int64 ใน chunk ที่ไม่มีทศนิยม) ข้อความที่ COPY จึงเหมือนกันทุก chunk
+            chunk[col] = pd.to_numeric(chunk[col], errors="coerce").astype("float64")
+    chunk[REJECT_COLUMN] = check_credit(raw, chunk)
+    return chunk
+
+
+def check_credit(raw: pd.DataFrame, chunk: pd.DataFrame) -> pd.Series:
+    """เหตุผลที่แถวเครดิตไม่ผ่าน (raw = ค่าก่อนแปลง ใช้แยกค่าว่างออกจากค่าที่แปลงไม่ได้) NA = ผ่าน"""
+    checks = (
+        missing(chunk, ["customer_id", "national_id"])
+        + not_number(raw, chunk, NUMBER_COLUMNS)
+        + bad_date(raw, chunk, DATE_COLUMNS)
+        + too_long(chunk, TEXT_LENGTHS)
+    )
+    for col in NUMBER_COLUMNS:
+        limit = NUMBER_LIMITS.get(col, 2**31 - 1)
+        checks += out_of_range(chunk, col, -limit, limit)
+    return reasons(chunk.index, checks)
+
+
+def iter_credit(path, chunksize=CHUNK_ROWS):
+    offset = 0
+    for chunk in iter_source(path, chunksize):
+        require_columns(chunk, STAGE_COLUMNS, "ไฟล์เครดิต")
+        chunk = normalize_credit(chunk)
+        chunk.insert(len(STAGE_COLUMNS), ROW_COLUMN, range(offset + 1, offset + len(chunk) + 1))
+        offset += len(chunk)
+        yield chunk
+
+# ==================================================
+# 2. Staging -> 5 ตารางใน schema credit_scoring
+# ==================================================
+def _insert_sql(table, key, columns, where="") -> str:
+    """INSERT แถวแรกของแต่ละคีย์จาก Staging (credit_scores คำนวณ risk_category เพิ่ม)"""
+    target_columns = columns + (["risk_category"] if table.endswith("credit_scores") else [])
+    select_columns = columns + ([RISK_CATEGORY_SQL] if table.endswith("credit_scores") else [])
+    return f"""
+        INSERT INTO {table} ({", ".join(target_columns)})
+        SELECT DISTINCT ON ({key}) {", ".join(select_columns)}
+        FROM stage_credit
+        WHERE {key} IS NOT NULL {where}
+        ORDER BY {key}, {ROW_COLUMN}
+    """
+
+# ==================================================
+# 3. โหมด Delta: แก้เฉพาะลูกค้า (customer_id) และบัญชี (account_number) ที่เพิ่ม/เปลี่ยน/หายไปจากไฟล์
+# ==================================================
+# {คีย์: ชื่อชุด fingerprint} ตารางลูกค้าทั้ง 4 ตารางใช้แถวเดียวกัน (แถวแรกของ customer_id) จึงใช้ hash ร่วมกัน
+CREDIT_FINGERPRINTS = {"customer_id": "credit_scoring.customers", "account_number": "credit_scoring.credit_accounts"}
+FINGERPRINT_COLUMNS = {
+    key: list(dict.fromkeys(col for k, columns in TABLES.values() if k == key for col in columns))
+    for key in CREDIT_FINGERPRINTS
+}
+
+
+def apply_credit_delta(conn, rejected_keys: dict) -> dict:
+    """ย้ายจาก Staging เข้าตารางจริงเฉพาะคีย์ที่ hash เปลี่ยน คืน {ชุด (เพิ่ม/แก้ไข/ลบ): จำนวนแถว}
+
+    rejected_keys = {คีย์: ค่าคีย์ของแถวที่ไม่ผ่านการตรวจ} คงข้อมูลเดิมของคีย์เหล่านั้นไว้
+    """
+    counts = {}
+    for key, dataset in CREDIT_FINGERPRINTS.items():
+        first_rows = f"""
+            SELECT DISTINCT ON ({key}) * FROM stage_credit WHERE {key} IS NOT NULL ORDER BY {key}, {ROW_COLUMN}
+        """
+        changes = stage_changes(
+            conn, dataset, f"{key}_changes", first_rows, key, FINGERPRINT_COLUMNS[key], rejected_keys[key],
+        )
+        counts.update(delta_counts(dataset, changes))
+    if not any(counts.values()):
+        return counts
+
+    for table, (key, columns) in TABLES.items():
+        name = f"{key}_changes"
+        target_columns = columns + (["risk_category"] if table.endswith("credit_scores") else [])
+        conn.execute(text(f"DELETE FROM {table} WHERE {key} IN ({deleted_keys(name)})"))
+        conn.execute(text(
+            _insert_sql(table, key, columns, f"AND {key} IN ({changed_keys(name)})") + upsert_clause(key, target_columns)
+        ))
+    for key, dataset in CREDIT_FINGERPRINTS.items():
+        save_fingerprints(conn, dataset, f"{key}_changes")
+    return counts
+
+# ==================================================
+# 4. นำเข้า
+# ==================================================
+def load_credit(conn, path, chunksize=CHUNK_ROWS, use_cache=True, delta=False):
+    """นำเข้าข้อมูลเครดิตใน Transaction ของ conn คืน ({ตาราง: จำนวนแถว}, [Quarantine])
+
+    ตารางลูกค้าใช้แถวแรกของแต่ละ customer_id: แถวแรกไม่ผ่าน = ตัดทุกแถวของลูกค้ารายนั้น
+    delta=True: ไฟล์คือข้อมูลทั้งชุดล่าสุด แก้เฉพาะแถวที่ต่างจากรอบก่อน (ดู apply_credit_delta)
+    """
+    create_stage(conn, "stage_credit", {**STAGE_TYPES, ROW_COLUMN: "BIGINT"})
+    owners = conn.execute(text("SELECT customer_id, national_id FROM credit_scoring.customers")).fetchall()
+    db_national_ids = KeyTracker(national_id for _, national_id in owners)
+    if delta:
+        # customer_id/account_number ที่มีแล้วคือแถวที่จะถูกแก้ แต่ national_id ต้องไม่ซ้ำกับลูกค้ารายอื่น
+        db_owners = KeyTracker(f"{customer_id}|{national_id}" for customer_id, national_id in owners)
+        db_customers = db_accounts = None
+    else:
+        db_customers = KeyTracker(customer_id for customer_id, _ in owners)
+        db_accounts = KeyTracker(conn.execute(text("SELECT account_number FROM credit_scoring.credit_accounts")).scalars())
+    customers, bad_customers, national_ids, accounts = KeyTracker(), KeyTracker(), KeyTracker(), KeyTracker()
+    quarantine = Quarantine(path, "credit")
+    rejected_keys = {key: [] for key in CREDIT_FINGERPRINTS}
+    chunks = prefetch(cached_chunks(
+        path, "credit", {**STAGE_TYPES, **META_TYPES}, iter_credit, chunksize, use_cache=use_cache,
+    ))
+    for chunk in chunks:
+        ids = chunk["customer_id"].to_numpy(dtype=object)
+        first = ~customers.duplicated(ids) & chunk["customer_id"].notna().to_numpy()
+        customers.add(ids[first])
+        if db_customers is not None:
+            chunk = reject(chunk, db_customers.contains(key_hashes(ids)), "customer_id มีในฐานข้อมูลแล้ว")
+        chunk = reject_duplicates(chunk, chunk["account_number"], accounts, db_accounts)
+        # national_id ต้องไม่ซ้ำเฉพาะแถวแรกของลูกค้า (แถวที่ลง credit_scoring.customers)
+        if delta:
+            national = chunk["national_id"].fillna("")
+            owner = (chunk["customer_id"].fillna("") + "|" + national).to_numpy(dtype=object)
+            taken = db_national_ids.contains(key_hashes(national)) & ~db_owners.contains(key_hashes(owner))
+            chunk = reject(chunk, first & taken, "national_id เป็นของลูกค้ารายอื่นในฐานข้อมูลแล้ว")
+        chunk = reject_duplicates(
+            chunk, chunk["national_id"], national_ids, None if delta else db_national_ids, where=first,
+        )
+        bad_customers.add(ids[first & chunk[REJECT_COLUMN].notna().to_numpy()])
+        chunk = reject(chunk, bad_customers.contains(key_hashes(ids)), "แถวแรกของ customer_id นี้ไม่ผ่านการตรวจ")
+        bad = chunk[REJECT_COLUMN].notna()
+        for key, values in rejected_keys.items():
+            values.extend(chunk.loc[bad, key].dropna().tolist())
+        copy_frame(conn, "stage_credit", quarantine.split(chunk))
+
+    if delta:
+        return apply_credit_delta(conn, rejected_keys), [quarantine]
+    counts = {
+        table: conn.execute(text(_insert_sql(table, key, columns))).rowcount
+        for table, (key, columns) in TABLES.items()
+    }
+    return counts, [quarantine]
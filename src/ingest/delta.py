@@ -0,0 +1,77 @@
+import pandas as pd
+from sqlalchemy import text
+
+from .pg_copy import copy_frame, create_stage
+
+# ==================================================
+# Delta: เทียบ hash ของแถวใน Staging กับ ingest_fingerprints แล้วแก้เฉพาะแถวที่เปลี่ยน
+# ==================================================
+# change ของแต่ละคีย์: insert = ไม่เคยนำเข้า, update = hash เปลี่ยน, delete = เคยนำเข้าแต่ไม่มีในไฟล์แล้ว
+# คีย์ที่ไม่เคยมี fingerprint (เช่น นำเข้าด้วยโหมดปกติ) นับเป็น insert และถูก upsert จึงรันครั้งแรกกับตารางเดิมได้
+CHANGES = ("insert", "update", "delete")
+
+
+def stage_changes(conn, dataset, name, rows_sql, key, columns, kept_keys=()) -> dict:
+    """สร้าง TEMP TABLE name (row_key, row_hash, change) จาก rows_sql (1 แถวต่อคีย์) คืน {change: จำนวนคีย์}
+
+    kept_keys = คีย์ที่อยู่ในไฟล์แต่แถวไม่ผ่านการตรวจ (Quarantine): คงข้อมูลเดิมไว้ ไม่นับเป็น delete
+    """
+    create_stage(conn, f"{name}_kept", {"row_key": "TEXT"})
+    copy_frame(conn, f"{name}_kept", pd.DataFrame({"row_key": sorted(set(map(str, kept_keys)))}))
+    row_hash = f"md5(ROW({', '.join(columns)})::text)::uuid"
+    conn.execute(text(f"""
+        CREATE TEMP TABLE {name} ON COMMIT DROP AS
+        WITH src AS (SELECT ({key})::text AS row_key, {row_hash} AS row_hash FROM ({rows_sql}) r)
+        SELECT s.row_key, s.row_hash, CASE WHEN f.row_key IS NULL THEN 'insert' ELSE 'update' END AS change
+        FROM src s
+        LEFT JOIN ingest_fingerprints f ON f.dataset = :dataset AND f.row_key = s.row_key
+        WHERE f.row_hash IS DISTINCT FROM s.row_hash
+        UNION ALL
+        SELECT f.row_key, NULL, 'delete'
+        FROM ingest_fingerprints f
+        WHERE f.dataset = :dataset
+          AND NOT EXISTS (SELECT 1 FROM src s WHERE s.row_key = f.row_key)
+          AND NOT EXISTS (SELECT 1 FROM {name}_kept k WHERE k.row_key = f.row_key)
+    """), {"dataset": dataset})
+    conn.execute(text(f"CREATE INDEX ON {name} (row_key)"))
+    conn.execute(text(f"ANALYZE {name}"))
+    found = dict(conn.execute(text(f"SELECT change, count(*) FROM {name} GROUP BY change")).fetchall())
+    return {change: found.get(change, 0) for change in CHANGES}
+
+
+def changed_keys(name, cast="") -> str:
+    """SELECT คีย์ที่ต้องเขียนใหม่ (insert/update) สำหรับใช้กับ IN (...)"""
+    return f"SELECT row_key{cast} FROM {name} WHERE change <> 'delete'"
+
+
+def deleted_keys(name, cast="") -> str:
+    return f"SELECT row_key{cast} FROM {name} WHERE change = 'delete'"
+
+
+def upsert_clause(key, columns) -> str:
+    updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in columns if col != key)
+    return f"ON CONFLICT ({key}) DO UPDATE SET {updates}"
+
+
+def save_fingerprints(conn, dataset, name):
+    """บันทึก hash ใหม่เฉพาะคีย์ที่เปลี่ยน (ไม่เขียนทับทั้งตาราง)"""
+    conn.execute(text(f"""
+        DELETE FROM ingest_fingerprints f USING {name} c
+        WHERE f.dataset = :dataset AND f.row_key = c.row_key AND c.change = 'delete'
+    """), {"dataset": dataset})
+    conn.execute(text(f"""
+        INSERT INTO ingest_fingerprints (dataset, row_key, row_hash)
+        SELECT :dataset, row_key, row_hash FROM {name} WHERE change <> 'delete'
+        ON CONFLICT (dataset, row_key) DO UPDATE SET row_hash = EXCLUDED.row_hash
+    """), {"dataset": dataset})
+
+
+def clear_fingerprints(conn, datasets):
+    """ใช้หลัง TRUNCATE: ข้อมูลถูกสร้างใหม่ทั้งหมด fingerprint เดิมใช้ไม่ได้แล้ว"""
+    conn.execute(text("DELETE FROM ingest_fingerprints WHERE dataset = ANY(:datasets)"), {"datasets": list(datasets)})
+
+
+def delta_counts(label, changes: dict) -> dict:
+    """{label (เพิ่ม/แก้ไข/ลบ): จำนวนแถว} สำหรับรายงานของ CLI"""
+    names = {"insert": "เพิ่ม", "update": "แก้ไข", "delete": "ลบ"}
+    return {f"{label} ({names[change]})": rows for change, rows in changes.items()}
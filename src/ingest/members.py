@@ -0,0 +1,263 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from .delta import changed_keys, delta_counts, deleted_keys, save_fingerprints, stage_changes, upsert_clause
+from .pg_copy import copy_frame, create_stage
+from .source_cache import cached_chunks
+from .sources import CHUNK_ROWS, iter_source, prefetch, require_columns
+from .validate import (
+    META_TYPES, REJECT_COLUMN, ROW_COLUMN, KeyTracker, Quarantine, bad_date, future_date, missing, not_integer,
+    not_number, out_of_range, reasons, reject_duplicates, reject_new_keys_below, too_long,
+)
+
+# ==================================================
+# 1. อ่านไฟล์ต้นทางทีละ chunk
+# ==================================================
+MEMBER_COLUMNS = [
+    "member_id", "branch_no", "gender", "first_name", "last_name", "birthday", "registration_date",
+    "approval_date", "career", "income", "house_no", "village_no", "road", "sub_area", "district_area",
+    "province", "postal_code",
+]
+AMOUNT_COLUMNS = ["net_yearly_income", "yearly_debt_payments", "credit_limit", "credit_limit_used_pct"]
+MEMBER_TYPES = {col: "TEXT" for col in MEMBER_COLUMNS}
+AMOUNT_TYPES = {col: "NUMERIC" for col in AMOUNT_COLUMNS}
+
+# ข้อกำหนดเดียวกับ MEMBER_DDL (ตรวจก่อน COPY แทนที่จะให้ Postgres ยกเลิกทั้ง Transaction)
+MEMBER_REQUIRED = ["member_id", "first_name", "last_name", "birthday", "registration_date"]
+MEMBER_DATES = ["birthday", "registration_date", "approval_date"]
+MEMBER_LENGTHS = {
+    "first_name": 50, "last_name": 50, "gender": 10, "career": 50, "province": 50, "house_no": 20,
+    "village_no": 5, "road": 100, "sub_area": 50, "district_area": 50, "postal_code": 10,
+}
+MAX_INT = 2**31 - 1
+
+
+def check_members(chunk: pd.DataFrame) -> pd.Series:
+    """เหตุผลที่แถวสมาชิกไม่ผ่าน (ตรวจทั้งคอลัมน์ทีละกฎ) NA = ผ่าน"""
+    numbers = pd.DataFrame({
+        "member_id": pd.to_numeric(chunk["member_id"], errors="coerce"),
+        "branch_no": pd.to_numeric(chunk["branch_no"], errors="coerce"),
+        "income": pd.to_numeric(chunk["income"].str.replace(",", "", regex=False), errors="coerce"),
+    })
+    dates = pd.DataFrame({col: pd.to_datetime(chunk[col], format="ISO8601", errors="coerce") for col in MEMBER_DATES})
+    checks = (
+        missing(chunk, MEMBER_REQUIRED)
+        + not_integer(chunk, ["member_id"])
+        + out_of_range(numbers, "member_id", 1, MAX_INT)
+        + not_number(chunk, numbers, ["branch_no", "income"])
+        + out_of_range(numbers, "income", 0, 10**10 - 1)
+        + bad_date(chunk, dates, MEMBER_DATES)
+        + future_date(dates, MEMBER_DATES)
+        + too_long(chunk, MEMBER_LENGTHS)
+    )
+    return reasons(chunk.index, checks)
+
+
+def check_amount(raw: pd.DataFrame, numbers: pd.DataFrame) -> pd.Series:
+    checks = not_number(raw, numbers, AMOUNT_COLUMNS)
+    for col in AMOUNT_COLUMNS:
+        checks += out_of_range(numbers, col, 0, 100 if col == "credit_limit_used_pct" else None)
+    return reasons(raw.index, checks)
+
+
+def iter_members(path, chunksize=CHUNK_ROWS):
+    """CSV สมาชิกเป็นข้อความทั้งหมด (แปลงชนิดใน SQL ตอนย้ายจาก Staging) + ลำดับแถว + ผลตรวจ"""
+    offset = 0
+    for chunk in iter_source(path, chunksize, dtype=str, keep_default_na=False, na_values=[""]):
+        require_columns(chunk, MEMBER_COLUMNS, "CSV สมาชิก")
+        chunk = chunk[MEMBER_COLUMNS].reset_index(drop=True)
+        chunk[ROW_COLUMN] = range(offset + 1, offset + len(chunk) + 1)
+        chunk[REJECT_COLUMN] = check_members(chunk)
+        offset += len(chunk)
+        yield chunk
+
+
+def iter_amount(path, chunksize=CHUNK_ROWS, limit_rows=None):
+    """ค่าว่าง = 0 เหมือนเดิม ค่าที่ไม่ใช่ตัวเลข/เกินขอบเขตถูกติดเหตุผลไว้"""
+    offset = 0
+    for chunk in iter_source(path, chunksize, nrows=limit_rows):
+        chunk = chunk.rename(columns={"credit_limit_used(%)": "credit_limit_used_pct"})
+        require_columns(chunk, AMOUNT_COLUMNS, "CSV การเงิน")
+        raw = chunk[AMOUNT_COLUMNS].reset_index(drop=True)
+        # float64 เสมอ: ข้อความที่ COPY (และ hash ของโหมด delta) ไม่ขึ้นกับว่า chunk นั้นมีทศนิยมหรือไม่
+        numbers = raw.apply(pd.to_numeric, errors="coerce").astype("float64")
+        numbers = numbers.where(raw.notna(), 0)
+        numbers[ROW_COLUMN] = range(offset + 1, offset + len(raw) + 1)
+        numbers[REJECT_COLUMN] = check_amount(raw, numbers)
+        offset += len(raw)
+        yield numbers
+
+# ==================================================
+# 2. Staging -> ตารางจริง (หา lookup id ด้วย JOIN ครั้งเดียว แทนการ SELECT ทีละแถว)
+# ==================================================
+LOOKUP_SQL = [
+    "INSERT INTO gender (gender_name) SELECT DISTINCT gender FROM stage_members WHERE gender IS NOT NULL ON CONFLICT DO NOTHING",
+    "INSERT INTO branches (branch_no) SELECT DISTINCT branch_no::numeric::int FROM stage_members WHERE branch_no IS NOT NULL ON CONFLICT DO NOTHING",
+    "INSERT INTO careers (career_name) SELECT DISTINCT career FROM stage_members WHERE career IS NOT NULL ON CONFLICT DO NOTHING",
+    "INSERT INTO provinces (province_name) SELECT DISTINCT province FROM stage_members WHERE province IS NOT NULL ON CONFLICT DO NOTHING",
+]
+
+MEMBER_TARGET_COLUMNS = [
+    "member_id", "first_name", "last_name", "gender_id", "branch_id", "birthday", "registration_date", "approval_date",
+    "career_id", "income",
+]
+MEMBERS_SQL = f"""
+    INSERT INTO members ({", ".join(MEMBER_TARGET_COLUMNS)})
+    SELECT s.member_id::int, s.first_name, s.last_name, g.gender_id, b.branch_id,
+           s.birthday::date, s.registration_date::date, s.approval_date::date, c.career_id,
+           COALESCE(NULLIF(replace(s.income, ',', ''), '')::numeric, 0)
+    FROM stage_members s
+    LEFT JOIN gender g   ON g.gender_name = s.gender
+    LEFT JOIN branches b ON b.branch_no = s.branch_no::numeric::int
+    LEFT JOIN careers c  ON c.career_name = s.career
+"""
+
+ADDRESSES_SQL = """
+    INSERT INTO addresses (member_id, house_no, moo, street, subdistrict, district, province_id, postal_code)
+    SELECT s.member_id::int, s.house_no, s.village_no, s.road, s.sub_area, s.district_area, p.province_id, s.postal_code
+    FROM stage_members s
+    LEFT JOIN provinces p ON p.province_name = s.province
+"""
+
+# ==================================================
+# 3. โหมด Delta: แก้เฉพาะสมาชิกที่เพิ่ม/เปลี่ยน/หายไปจากไฟล์ (คีย์ = member_id)
+# ==================================================
+MEMBER_FINGERPRINT = "members"
+AMOUNT_FINGERPRINT = "amount"  # คีย์ = member_id ของแถวสมาชิกที่คู่กัน
+
+# คู่ member_id -> amount_id ตามลำดับแถว แบบเดียวกับ data_manager.load_data (คำนวณก่อนลบ/เพิ่มแถวใดๆ)
+MEMBER_PAIRS_SQL = """
+    CREATE TEMP TABLE member_pairs ON COMMIT DROP AS
+    SELECT m.member_id, a.amount_id
+    FROM (SELECT member_id, ROW_NUMBER() OVER (ORDER BY member_id) AS rn FROM members) m
+    JOIN (SELECT amount_id, ROW_NUMBER() OVER (ORDER BY amount_id) AS rn FROM amount) a USING (rn)
+"""
+STAGED_AMOUNT_SQL = f"""
+    SELECT s.member_id::int AS member_id, {", ".join(f"a.{col}" for col in AMOUNT_COLUMNS)}
+    FROM stage_amount a JOIN stage_members s USING ({ROW_COLUMN})
+"""
+
+
+def apply_member_delta(conn, with_amount, rejected_keys=()) -> dict:
+    """ย้ายจาก Staging เข้าตารางจริงเฉพาะคีย์ที่ hash เปลี่ยน คืน {ตาราง (เพิ่ม/แก้ไข/ลบ): จำนวนแถว}
+
+    สมาชิกที่ถูกลบ: ลบ amount แถวที่คู่กันด้วย ลำดับแถวที่เหลือจึงยังจับคู่ถูก
+    สมาชิกใหม่: amount ต่อท้ายตาม member_id (load_members ตัด member_id ใหม่ที่ไม่มากกว่าของเดิมไปแล้ว)
+    rejected_keys = member_id ของแถวที่ไม่ผ่านการตรวจ (คงข้อมูลเดิมไว้)
+    """
+    rows_sql = f"SELECT member_id::int AS member_id, {', '.join(MEMBER_COLUMNS[1:])} FROM stage_members"
+    counts = delta_counts("members", stage_changes(
+        conn, MEMBER_FINGERPRINT, "member_changes", rows_sql, "member_id", MEMBER_COLUMNS, rejected_keys,
+    ))
+    changed = changed_keys("member_changes", "::int")
+    if with_amount:
+        counts.update(delta_counts("amount", stage_changes(
+            conn, AMOUNT_FINGERPRINT, "amount_changes", STAGED_AMOUNT_SQL, "member_id", AMOUNT_COLUMNS, rejected_keys,
+        )))
+    if not any(counts.values()):
+        return counts
+    conn.execute(text(MEMBER_PAIRS_SQL))
+
+    deleted = deleted_keys("member_changes", "::int")
+    conn.execute(text(f"DELETE FROM amount WHERE amount_id IN (SELECT amount_id FROM member_pairs WHERE member_id IN ({deleted}))"))
+    conn.execute(text(f"DELETE FROM members WHERE member_id IN ({deleted})"))  # addresses ลบตาม (ON DELETE CASCADE)
+    conn.execute(text(
+        f"{MEMBERS_SQL} WHERE s.member_id::int IN ({changed}) {upsert_clause('member_id', MEMBER_TARGET_COLUMNS)}"
+    ))
+    conn.execute(text(f"DELETE FROM addresses WHERE member_id IN ({changed})"))
+    conn.execute(text(f"{ADDRESSES_SQL} WHERE s.member_id::int IN ({changed}) ON CONFLICT DO NOTHING"))
+    save_fingerprints(conn, MEMBER_FINGERPRINT, "member_changes")
+
+    if with_amount:
+        changed = changed_keys("amount_changes", "::int")
+        assignments = ", ".join(f"{col} = a.{col}" for col in AMOUNT_COLUMNS)
+        conn.execute(text(f"""
+            UPDATE amount t SET {assignments}
+            FROM ({STAGED_AMOUNT_SQL}) a JOIN member_pairs p USING (member_id)
+            WHERE t.amount_id = p.amount_id AND a.member_id IN ({changed})
+        """))
+        conn.execute(text(f"""
+            INSERT INTO amount ({", ".join(AMOUNT_COLUMNS)})
+            SELECT {", ".join(AMOUNT_COLUMNS)} FROM ({STAGED_AMOUNT_SQL}) a
+            WHERE a.member_id IN ({changed}) AND NOT EXISTS (SELECT 1 FROM member_pairs p WHERE p.member_id = a.member_id)
+            ORDER BY a.member_id
+        """))
+        save_fingerprints(conn, AMOUNT_FINGERPRINT, "amount_changes")
+    return counts
+
+# ==================================================
+# 4. นำเข้า
+# ==================================================
+def load_members(conn, members_path, amount_path=None, chunksize=CHUNK_ROWS, use_cache=True, delta=False):
+    """นำเข้าสมาชิก + ที่อยู่ (+ ข้อมูลการเงิน) ใน Transaction ของ conn คืน ({ตาราง: จำนวนแถว}, [Quarantine])
+
+    ไฟล์ถูก COPY ทีละ chunk ขณะที่ chunk ถัดไปอ่านอยู่เบื้องหลัง จากนั้นย้ายเข้าตารางจริงด้วย SQL ชุดเดียว
+    แถวที่ไม่ผ่านการตรวจ (ดู check_members) ไม่ถูก COPY แต่เขียนลงไฟล์ Quarantine
+    delta=True: ไฟล์คือข้อมูลทั้งชุดล่าสุด แก้เฉพาะแถวที่ต่างจากรอบก่อน (ดู apply_member_delta)
+    """
+    create_stage(conn, "stage_members", {**MEMBER_TYPES, ROW_COLUMN: "BIGINT"})
+    member_ids = conn.execute(text("SELECT member_id FROM members")).scalars().all()
+    existing = KeyTracker(member_ids)
+    # members กับ amount จับคู่กันตามลำดับ member_id (ROW_NUMBER ใน load_data) สมาชิกใหม่ที่ member_id
+    # น้อยกว่าของเดิม (รวมถึงใส่ id ที่เคยลบกลับมา) จะเลื่อนคู่ของทุกคนหลังจากนั้น จึงไม่รับเข้า
+    last_id = max(member_ids, default=None)
+    order_reason = f"member_id ใหม่ต้องมากกว่า {last_id} (ล่าสุดในฐานข้อมูล) ข้อมูลการเงินจับคู่ตามลำดับ member_id"
+    seen = KeyTracker()
+    quarantine = Quarantine(members_path, "members")
+    rejected_rows, rejected_keys, file_rows = [], [], 0
+    chunks = prefetch(cached_chunks(
+        members_path, "members", {**MEMBER_TYPES, **META_TYPES}, iter_members, chunksize, use_cache=use_cache,
+    ))
+    for chunk in chunks:
+        keys = pd.to_numeric(chunk["member_id"], errors="coerce").astype("Int64")
+        # โหมด delta: member_id ที่มีอยู่แล้วคือแถวที่จะถูกแก้ ไม่ใช่คีย์ซ้ำ
+        chunk = reject_duplicates(chunk, keys, seen, None if delta else existing)
+        chunk = reject_new_keys_below(chunk, keys, last_id, existing, order_reason)
+        bad = chunk[REJECT_COLUMN].notna()
+        rejected_rows.append(chunk.loc[bad, ROW_COLUMN].to_numpy())
+        rejected_keys.extend(keys[bad].dropna().tolist())
+        file_rows += len(chunk)
+        copy_frame(conn, "stage_members", quarantine.split(chunk))
+    for sql in LOOKUP_SQL:
+        conn.execute(text(sql))
+
+    quarantines, amount_rows = [quarantine], 0
+    if amount_path is not None:
+        # amount ไม่มี lookup: COPY เข้าตารางจริงตรงๆ ตามลำดับไฟล์ (amount_id เรียงตามลำดับแถว)
+        # ใช้จำนวนแถวเท่ากับสมาชิกในไฟล์ (จับคู่กันตามลำดับแถว) และตัดแถวที่สมาชิกคู่กันไม่ผ่านการตรวจ
+        # โหมด delta COPY เข้า Staging พร้อมลำดับแถวไว้จับคู่กับสมาชิก
+        target = "stage_amount" if delta else "amount"
+        if delta:
+            create_stage(conn, "stage_amount", {**AMOUNT_TYPES, ROW_COLUMN: "BIGINT"})
+        rejected_rows = np.concatenate(rejected_rows) if rejected_rows else np.array([], dtype="int64")
+        quarantine = Quarantine(amount_path, "amount")
+        chunks = prefetch(cached_chunks(
+            amount_path, "amount", {**AMOUNT_TYPES, **META_TYPES}, iter_amount, chunksize, nrows=file_rows,
+            use_cache=use_cache,
+        ))
+        for chunk in chunks:
+            unpaired = np.isin(chunk[ROW_COLUMN].to_numpy(), rejected_rows)
+            if unpaired.any():
+                chunk = chunk.copy()
+                chunk.loc[unpaired, REJECT_COLUMN] = "ข้อมูลสมาชิกแถวเดียวกันไม่ผ่านการตรวจ"
+            quarantine.record(chunk)
+            # ค่าที่ผิดเป็น NULL แต่ยังเก็บแถวไว้ ลำดับแถวจะได้ยังตรงกับสมาชิก
+            values = chunk.loc[~unpaired, AMOUNT_COLUMNS]
+            valid = values.ge(0)
+            valid["credit_limit_used_pct"] &= values["credit_limit_used_pct"].le(100)
+            values = values.where(valid)
+            if delta:
+                values[ROW_COLUMN] = chunk.loc[~unpaired, ROW_COLUMN]
+            amount_rows += copy_frame(conn, target, values)
+        quarantines.append(quarantine)
+
+    if delta:
+        return apply_member_delta(conn, amount_path is not None, rejected_keys), quarantines
+    counts = {
+        "members": conn.execute(text(MEMBERS_SQL)).rowcount,
+        "addresses": conn.execute(text(f"{ADDRESSES_SQL} ON CONFLICT DO NOTHING")).rowcount,
+    }
+    if amount_path is not None:
+        counts["amount"] = amount_rows
+    return counts, quarantines
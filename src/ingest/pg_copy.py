@@ -0,0 +1,56 @@
+import io
+from contextlib import contextmanager
+
+import pandas as pd
+from sqlalchemy import text
+
+# ==================================================
+# COPY Helpers (psycopg2 copy_expert ผ่าน Connection ของ SQLAlchemy)
+# ==================================================
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def create_stage(conn, name: str, columns: dict):
+    """สร้าง TEMP TABLE {คอลัมน์: ชนิด} (หายเองเมื่อจบ Transaction) ใช้รับ COPY ทีละ chunk"""
+    definition = ", ".join(f"{_quote(col)} {sql_type}" for col, sql_type in columns.items())
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"CREATE TEMP TABLE {name} ({definition}) ON COMMIT DROP")
+    finally:
+        cursor.close()
+
+
+def copy_frame(conn, table: str, df: pd.DataFrame) -> int:
+    """COPY df เข้าตาราง (คอลัมน์ตามชื่อใน df) ค่าว่าง/NaN = NULL คืนจำนวนแถว"""
+    if df.empty:
+        return 0
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep="", date_format="%Y-%m-%d %H:%M:%S")
+    buffer.seek(0)
+    columns = ", ".join(_quote(col) for col in df.columns)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    return len(df)
+
+
+@contextmanager
+def foreign_keys_deferred(conn, tables):
+    """ถอด Foreign Key ของตารางปลายทางระหว่างโหลด แล้วใส่กลับ (ตรวจทั้งตารางด้วย JOIN ครั้งเดียว)
+
+    ใช้ตอนโหลดใหม่ทั้งตาราง (--truncate) แทนการตรวจ FK ทีละแถวด้วย Trigger ทั้งหมดอยู่ใน Transaction เดียวกัน
+    ถ้าข้อมูลอ้างอิงไม่ครบ ADD CONSTRAINT จะล้มเหลวและยกเลิกการนำเข้าทั้งหมด
+    """
+    rows = conn.execute(text("""
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE contype = 'f' AND conrelid = ANY(CAST(:tables AS regclass[]))
+    """), {"tables": list(tables)}).fetchall()
+    for table, name, _ in rows:
+        conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {_quote(name)}"))
+    yield
+    for table, name, definition in rows:
+        conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {_quote(name)} {definition}"))
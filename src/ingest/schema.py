@@ -0,0 +1,162 @@
+# ==================================================
+# โครงสร้างตาราง (ตรงกับ ipynb/creat_table_members.ipynb และ creat_table_creditscore.ipynb)
+# ==================================================
+# ใช้ IF NOT EXISTS ทั้งหมด รันซ้ำได้โดยไม่ลบข้อมูลเดิม (ล้างข้อมูลใช้ --truncate)
+MEMBER_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS branches (
+        branch_id SERIAL PRIMARY KEY,
+        branch_no INT UNIQUE NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS gender (
+        gender_id SERIAL PRIMARY KEY,
+        gender_name VARCHAR(10) UNIQUE NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS careers (
+        career_id SERIAL PRIMARY KEY,
+        career_name VARCHAR(50) UNIQUE NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS provinces (
+        province_id SERIAL PRIMARY KEY,
+        province_name VARCHAR(50) UNIQUE NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS members (
+        member_id INT PRIMARY KEY,
+        first_name VARCHAR(50) NOT NULL,
+        last_name VARCHAR(50) NOT NULL,
+        gender_id INT REFERENCES gender(gender_id),
+        branch_id INT REFERENCES branches(branch_id),
+        birthday DATE NOT NULL CHECK (birthday <= CURRENT_DATE),
+        registration_date DATE NOT NULL CHECK (registration_date <= CURRENT_DATE),
+        approval_date DATE CHECK (approval_date <= CURRENT_DATE),
+        career_id INT REFERENCES careers(career_id),
+        income NUMERIC(12,2) CHECK (income >= 0)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS addresses (
+        address_id SERIAL PRIMARY KEY,
+        member_id INT NOT NULL REFERENCES members(member_id) ON DELETE CASCADE,
+        house_no VARCHAR(20),
+        moo VARCHAR(5),
+        street VARCHAR(100),
+        subdistrict VARCHAR(50),
+        district VARCHAR(50),
+        province_id INT REFERENCES provinces(province_id),
+        postal_code VARCHAR(10),
+        UNIQUE(member_id, house_no, moo, street, subdistrict, district, province_id, postal_code)
+    )
+    """,
+    # amount จับคู่กับ members ด้วยลำดับแถว (ROW_NUMBER ของ member_id / amount_id) ดู data_manager.load_data
+    """
+    CREATE TABLE IF NOT EXISTS amount (
+        amount_id SERIAL PRIMARY KEY,
+        net_yearly_income NUMERIC(15,2) CHECK (net_yearly_income >= 0),
+        yearly_debt_payments NUMERIC(15,2) CHECK (yearly_debt_payments >= 0),
+        credit_limit NUMERIC(15,2) CHECK (credit_limit >= 0),
+        credit_limit_used_pct NUMERIC(5,2) CHECK (credit_limit_used_pct BETWEEN 0 AND 100)
+    )
+    """,
+]
+
+CREDIT_DDL = [
+    "CREATE SCHEMA IF NOT EXISTS credit_scoring",
+    """
+    CREATE TABLE IF NOT EXISTS credit_scoring.customers (
+        customer_id VARCHAR(20) PRIMARY KEY,
+        national_id VARCHAR(13) UNIQUE NOT NULL,
+        borrower_name VARCHAR(200),
+        age INTEGER,
+        gender VARCHAR(10),
+        education VARCHAR(50),
+        occupation VARCHAR(100),
+        monthly_income DECIMAL(15, 2)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS credit_scoring.credit_accounts (
+        customer_id VARCHAR(20),
+        account_number VARCHAR(50) PRIMARY KEY,
+        contract_number VARCHAR(50),
+        product_type VARCHAR(100),
+        account_open_date DATE,
+        account_status VARCHAR(50),
+        credit_limit DECIMAL(15, 2),
+        approved_amount DECIMAL(15, 2),
+        outstanding_balance DECIMAL(15, 2),
+        monthly_payment DECIMAL(15, 2),
+        total_installments INTEGER,
+        paid_installments INTEGER,
+        remaining_installments INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS credit_scoring.payment_history (
+        customer_id VARCHAR(20) PRIMARY KEY,
+        installments_overdue INTEGER,
+        days_past_due INTEGER,
+        overdue_amount DECIMAL(15, 2),
+        payment_performance_pct DECIMAL(10, 2),
+        late_payment_count_12m INTEGER,
+        late_payment_count_24m INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS credit_scoring.credit_summary (
+        customer_id VARCHAR(20) PRIMARY KEY,
+        total_accounts INTEGER,
+        active_accounts INTEGER,
+        closed_accounts INTEGER,
+        total_credit_limit DECIMAL(15, 2),
+        credit_utilization_rate DECIMAL(10, 2),
+        oldest_account_months INTEGER,
+        inquiries_6m INTEGER,
+        inquiries_12m INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS credit_scoring.credit_scores (
+        customer_id VARCHAR(20) PRIMARY KEY,
+        credit_score INTEGER,
+        credit_rating VARCHAR(10),
+        score_range VARCHAR(50),
+        risk_category VARCHAR(50),
+        report_date DATE,
+        last_update_date TIMESTAMP DEFAULT NOW()
+    )
+    """,
+]
+
+# ตารางที่ล้างเมื่อใช้ --truncate (ตาราง lookup เก็บไว้ id เดิมจะได้ไม่เปลี่ยน)
+MEMBER_TABLES = ["addresses", "amount", "members"]
+CREDIT_TABLES = [
+    "credit_scoring.credit_scores", "credit_scoring.credit_summary", "credit_scoring.payment_history",
+    "credit_scoring.credit_accounts", "credit_scoring.customers",
+]
+
+# hash ของแถวต้นทางล่าสุดที่นำเข้าต่อคีย์ธรรมชาติ ใช้หาแถวที่เพิ่ม/แก้ไข/หายไปในโหมด --delta (ดู delta.py)
+FINGERPRINT_DDL = """
+    CREATE TABLE IF NOT EXISTS ingest_fingerprints (
+        dataset VARCHAR(50) NOT NULL,
+        row_key TEXT NOT NULL,
+        row_hash UUID NOT NULL,
+        PRIMARY KEY (dataset, row_key)
+    )
+"""
+
+# version ของชุดข้อมูล ให้ทุก Worker ของ Dashboard รู้ว่าต้องโหลดใหม่ (ดู data_manager.check_dataset_version)
+DATASET_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS dataset_version (
+        name VARCHAR(50) PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT NOW()
+    )
+"""
@@ -0,0 +1,90 @@
+import glob
+import hashlib
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # ไม่มี pyarrow = อ่านไฟล์ต้นทางใหม่ทุกครั้ง
+    pa = pq = None
+
+from ..files import DATA_DIR, atomic_path
+from .sources import CHUNK_ROWS
+
+# ==================================================
+# 1. Config
+# ==================================================
+# ไฟล์ต้นทางที่แปลงแล้ว (ชนิดข้อมูลตรงกับ Staging) เก็บเป็น Parquet ต่อ hash ของเนื้อไฟล์
+# ไฟล์ไม่เปลี่ยน = อ่าน Parquet แทนการ parse XLSX/CSV และแปลงวันที่ซ้ำ
+INGEST_CACHE_DIR = os.getenv(
+    "INGEST_CACHE_DIR",
+    os.path.join(DATA_DIR, "ingest_cache"),
+)
+CACHE_FORMAT = 2  # เพิ่มเมื่อวิธีแปลงข้อมูล (normalize) เปลี่ยน เพื่อไม่ใช้ Cache ที่แปลงแบบเก่า
+
+ARROW_TYPES = {"TEXT": "string", "NUMERIC": "float64", "BIGINT": "int64", "TIMESTAMP": "timestamp[ns]"}
+
+
+def is_enabled() -> bool:
+    return bool(INGEST_CACHE_DIR) and pq is not None
+
+
+def file_digest(path, block_size=1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# ==================================================
+# 2. อ่านผ่าน Cache
+# ==================================================
+def _cache_prefix(path, kind) -> str:
+    # ชื่อไฟล์ + hash ของ path (ไฟล์ชื่อเดียวกันต่างโฟลเดอร์ไม่ทับกัน)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    where = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(INGEST_CACHE_DIR, f"{stem}-{where}.{kind}")
+
+
+def _schema(columns: dict):
+    return pa.schema([(col, pa.type_for_alias(ARROW_TYPES[sql_type])) for col, sql_type in columns.items()])
+
+
+def _read_cache(cache_path, chunksize):
+    parquet = pq.ParquetFile(cache_path)
+    for batch in parquet.iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+def _write_through(chunks, cache_path, schema):
+    """ส่ง chunk ต่อให้ผู้เรียกพร้อมเขียนลง Parquet ไฟล์ชั่วคราว อ่านครบทั้งไฟล์แล้วค่อยเปลี่ยนชื่อเป็น Cache จริง"""
+    with atomic_path(cache_path) as tmp_path:
+        writer = pq.ParquetWriter(tmp_path, schema)
+        try:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                yield chunk
+        finally:
+            writer.close()
+
+
+def cached_chunks(path, kind, columns: dict, read_chunks, chunksize=CHUNK_ROWS, nrows=None, use_cache=True):
+    """chunk ที่แปลงแล้วของไฟล์ path: จาก Parquet ถ้า hash ตรง ไม่งั้นอ่านด้วย read_chunks(path, chunksize, nrows) แล้วเก็บลง Cache
+
+    kind = ชนิดการแปลง (members/amount/credit) columns = {คอลัมน์: ชนิด SQL} ชุดเดียวกับ Staging
+    """
+    args = (path, chunksize) if nrows is None else (path, chunksize, nrows)
+    if not (use_cache and is_enabled()):
+        return read_chunks(*args)
+
+    os.makedirs(INGEST_CACHE_DIR, exist_ok=True)
+    key = f"{file_digest(path)[:16]}-v{CACHE_FORMAT}" + ("" if nrows is None else f"-n{nrows}")
+    cache_path = f"{_cache_prefix(path, kind)}.{key}.parquet"
+    if os.path.exists(cache_path):
+        print(f"⚡ ใช้ Parquet cache ของ {os.path.basename(path)} ({kind})")
+        return _read_cache(cache_path, chunksize)
+
+    # ไฟล์เปลี่ยนแล้ว: ลบ Cache รุ่นเก่าของไฟล์/ชนิดเดียวกัน
+    for old in glob.glob(f"{glob.escape(_cache_prefix(path, kind))}.*.parquet"):
+        os.remove(old)
+    return _write_through(read_chunks(*args), cache_path, _schema(columns))
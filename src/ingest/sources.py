@@ -0,0 +1,134 @@
+import os
+import threading
+from itertools import islice
+from queue import Empty, Full, Queue
+
+import pandas as pd
+
+try:
+    import openpyxl
+except ImportError:  # ไม่มี openpyxl = นำเข้าได้เฉพาะ CSV
+    openpyxl = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # ไม่มี pyarrow = อ่าน Parquet ไม่ได้
+    pq = None
+
+# ==================================================
+# 1. Config
+# ==================================================
+CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", 50_000))    # จำนวนแถวต่อ chunk (หน่วยความจำคงที่ตามค่านี้)
+PREFETCH_CHUNKS = int(os.getenv("INGEST_PREFETCH_CHUNKS", 2))  # chunk ที่อ่านล่วงหน้าระหว่าง COPY
+
+# ==================================================
+# 2. อ่านไฟล์ทีละ chunk (ไม่โหลดทั้งไฟล์เข้าหน่วยความจำ)
+# ==================================================
+def iter_csv(path, chunksize=CHUNK_ROWS, nrows=None, **read_kw):
+    with pd.read_csv(path, chunksize=chunksize, nrows=nrows, encoding="utf-8-sig", **read_kw) as reader:
+        yield from reader
+
+
+def iter_xlsx(path, chunksize=CHUNK_ROWS, nrows=None, sheet=None):
+    """อ่าน XLSX แบบ read-only ทีละแถว (openpyxl ไม่สร้าง cell ทั้งชีตในหน่วยความจำ)"""
+    if openpyxl is None:
+        raise ValueError("อ่าน XLSX ต้องติดตั้ง openpyxl (pip install openpyxl)")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = ["" if name is None else str(name).strip() for name in next(rows, ())]
+        remaining = nrows
+        while remaining is None or remaining > 0:
+            size = chunksize if remaining is None else min(chunksize, remaining)
+            block = list(islice(rows, size))
+            if not block:
+                break
+            if remaining is not None:
+                remaining -= len(block)
+            yield pd.DataFrame.from_records(block, columns=header)
+    finally:
+        workbook.close()
+
+
+def iter_parquet(path, chunksize=CHUNK_ROWS, nrows=None, as_text=False):
+    """อ่าน Parquet ทีละ row group/batch (as_text=True แปลงทุกคอลัมน์เป็นข้อความ เหมือน CSV ที่อ่านด้วย dtype=str)"""
+    if pq is None:
+        raise ValueError("อ่าน Parquet ต้องติดตั้ง pyarrow (pip install pyarrow)")
+    remaining = nrows
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+        if remaining is not None:
+            if remaining <= 0:
+                break
+            batch = batch.slice(0, remaining)
+            remaining -= batch.num_rows
+        chunk = batch.to_pandas()
+        yield chunk.astype("string") if as_text else chunk
+
+
+def iter_source(path, chunksize=CHUNK_ROWS, nrows=None, **csv_kw):
+    lower = str(path).lower()
+    if lower.endswith((".xlsx", ".xlsm")):
+        return iter_xlsx(path, chunksize, nrows)
+    if lower.endswith(".parquet"):
+        return iter_parquet(path, chunksize, nrows, as_text=csv_kw.get("dtype") is str)
+    return iter_csv(path, chunksize, nrows, **csv_kw)
+
+
+def require_columns(chunk: pd.DataFrame, columns, label):
+    missing = set(columns) - set(chunk.columns)
+    if missing:
+        raise ValueError(f"{label} ขาด column: {sorted(missing)}")
+
+# ==================================================
+# 3. Prefetch: อ่าน/แปลง chunk ถัดไปใน Thread แยก ระหว่างที่ chunk ปัจจุบันกำลัง COPY
+# ==================================================
+_DONE = object()
+
+
+def prefetch(chunks, depth=PREFETCH_CHUNKS):
+    """ห่อ iterator ให้ทำงานล่วงหน้าไม่เกิน depth chunk (Exception ของฝั่งอ่านส่งต่อให้ผู้เรียก)"""
+    queue = Queue(maxsize=max(depth, 1))
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    worker = threading.Thread(target=produce, name="ingest-prefetch", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # ผู้เรียกหยุดกลางทาง (เช่น COPY ล้มเหลว): ให้ Thread อ่านหยุดด้วย
+        stop.set()
+        try:
+            while True:
+                queue.get_nowait()
+        except Empty:
+            pass
+        worker.join()
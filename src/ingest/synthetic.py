@@ -0,0 +1,289 @@
+"""สร้างข้อมูลจำลองขนาดใหญ่สำหรับทดสอบการนำเข้า/Dashboard/Benchmark (seed และจำนวนเดิม = ไฟล์เดิมทุกไบต์)
+
+    python -m src.ingest.synthetic --members 1000000 --customers 200000 --format parquet
+    python -m src.ingest --members data/synthetic/members.parquet --amount data/synthetic/amount.parquet \\
+        --credit data/synthetic/credit.parquet --truncate
+
+ทุกค่าสุ่มจากการกระจายของข้อมูลตัวอย่างใน data/ (member300.csv, datacredit.csv, credit_dataset.xlsx)
+- ที่อยู่ (ถนน/ตำบล/อำเภอ/จังหวัด/รหัสไปรษณีย์) สุ่มทั้งชุดจากแถวตัวอย่างเดียวกัน ไม่เกิดตำบลที่ไม่อยู่ในจังหวัดนั้น
+- อาชีพ+รายได้ และวันเกิด+วันสมัคร+วันอนุมัติ สุ่มเป็นคู่/ชุด แล้วขยับเล็กน้อย ความสัมพันธ์เดิมจึงยังอยู่
+- เครดิต: 1 แถว = 1 บัญชี ลูกค้า 1 รายมีหลายบัญชี ข้อมูลระดับลูกค้าซ้ำทุกแถว ยอดสรุป (จำนวนบัญชี/วงเงินรวม) ตรงกับบัญชีจริง
+สร้างทีละ chunk ขนาดคงที่ หน่วยความจำจึงคงที่แม้สร้างหลัก 10 ล้านแถว
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # ไม่มี pyarrow = เขียนได้เฉพาะ CSV
+    pa = pq = None
+
+from ..files import DATA_DIR, atomic_path
+from .credit import TABLES
+from .members import AMOUNT_COLUMNS, MEMBER_COLUMNS
+
+# ==================================================
+# 1. Config
+# ==================================================
+SAMPLE_MEMBERS = os.path.join(DATA_DIR, "member300.csv")
+SAMPLE_AMOUNT = os.path.join(DATA_DIR, "datacredit.csv")
+SAMPLE_CREDIT = os.path.join(DATA_DIR, "credit_dataset.xlsx")
+SYNTHETIC_DIR = os.getenv("SYNTHETIC_DIR", os.path.join(DATA_DIR, "synthetic"))
+
+GEN_CHUNK = 100_000    # ขนาด chunk ตายตัว: RNG ผูกกับลำดับ chunk เปลี่ยนค่านี้ = ได้ข้อมูลชุดใหม่
+DATE_JITTER_DAYS = 730  # ขยับวันที่ที่สุ่มมาย้อนหลังได้ไม่เกิน 2 ปี (ไม่มีวันในอนาคต)
+STREAMS = {"members": 1, "amount": 2, "credit": 3}
+
+ADDRESS_COLUMNS = ["road", "sub_area", "district_area", "province", "postal_code"]
+MEMBER_DATES = ["birthday", "registration_date", "approval_date"]
+ACCOUNT_KEY, CUSTOMER_KEY = "account_number", "customer_id"
+ACCOUNT_FIELDS = [c for c in TABLES["credit_scoring.credit_accounts"][1] if c not in (CUSTOMER_KEY, ACCOUNT_KEY, "contract_number")]
+CUSTOMER_FIELDS = list(dict.fromkeys(
+    col for table, (key, columns) in TABLES.items() if key == CUSTOMER_KEY
+    for col in columns if col not in (CUSTOMER_KEY, "national_id", "borrower_name")
+))
+CLOSED_STATUS = "ปิดบัญชี"
+
+
+def load_samples() -> dict:
+    credit = pd.read_excel(SAMPLE_CREDIT)
+    members = pd.read_csv(SAMPLE_MEMBERS, dtype=str, encoding="utf-8-sig")
+    for col in MEMBER_DATES:
+        members[col] = pd.to_datetime(members[col], format="ISO8601")
+    members["income"] = pd.to_numeric(members["income"])
+    credit["account_open_date"] = pd.to_datetime(credit["account_open_date"], dayfirst=True)
+    amount = pd.read_csv(SAMPLE_AMOUNT).rename(columns={"credit_limit_used(%)": "credit_limit_used_pct"})
+    return {
+        "members": members,
+        "amount": amount[AMOUNT_COLUMNS].dropna().reset_index(drop=True),
+        "credit": credit,
+        "columns": list(credit.columns),
+    }
+
+# ==================================================
+# 2. Helpers (vectorized ทั้ง chunk)
+# ==================================================
+def _draw(frame: pd.DataFrame, columns, rng, n) -> pd.DataFrame:
+    """สุ่มแถวจากตัวอย่างแบบคืนที่ (bootstrap) เก็บค่าทุกคอลัมน์ของแถวเดียวกันไว้ด้วยกัน"""
+    return frame[columns].iloc[rng.integers(0, len(frame), n)].reset_index(drop=True)
+
+
+def _iso_dates(values) -> np.ndarray:
+    """datetime64 -> 'YYYY-MM-DD' (NaT -> None)"""
+    values = np.asarray(values, dtype="datetime64[D]")
+    text = np.datetime_as_string(values, unit="D").astype(object)
+    text[np.isnat(values)] = None
+    return text
+
+
+def _thai_dates(values) -> pd.Series:
+    """datetime64 -> 'DD/MM/YYYY' แบบไฟล์เครดิตตัวอย่าง"""
+    iso = pd.Series(_iso_dates(values), dtype="string")
+    return iso.str[8:10] + "/" + iso.str[5:7] + "/" + iso.str[0:4]
+
+
+def _days_back(rng, n, days=DATE_JITTER_DAYS) -> np.ndarray:
+    return rng.integers(-days, 1, n).astype("timedelta64[D]")
+
+
+def _scramble(index, modulus, multiplier, offset) -> np.ndarray:
+    """เลขไม่ซ้ำที่ดูสุ่ม: (i * a + b) mod m เป็น bijection เมื่อ a กับ m ไม่มีตัวประกอบร่วม
+    (คำนวณด้วย int ของ Python เพราะ i * a เกินช่วง int64)"""
+    return ((np.asarray(index, dtype=object) * multiplier + offset) % modulus).astype(np.int64)
+
+
+def _national_ids(index, rng) -> np.ndarray:
+    """เลขบัตรประชาชน 13 หลักที่ไม่ซ้ำกันและหลักสุดท้ายเป็น checksum ที่ถูกต้อง"""
+    body = _scramble(index, 10**11, 61_803_398_875, 14_142_135_623)
+    first = rng.integers(1, 9, len(body))
+    digits = np.column_stack([first] + [body // 10**p % 10 for p in range(10, -1, -1)])
+    checksum = (11 - (digits * np.arange(13, 1, -1)).sum(axis=1) % 11) % 10
+    return ((first * 10**11 + body) * 10 + checksum).astype(str)
+
+
+def _names(sample, rng, n) -> tuple:
+    first = sample["first_name"].to_numpy()[rng.integers(0, len(sample), n)]
+    last = sample["last_name"].to_numpy()[rng.integers(0, len(sample), n)]
+    return first, last
+
+# ==================================================
+# 3. สร้างทีละ chunk
+# ==================================================
+def member_chunk(samples, rng, start, n, first_id) -> pd.DataFrame:
+    sample = samples["members"]
+    address = _draw(sample, ADDRESS_COLUMNS, rng, n)
+    career = _draw(sample, ["career", "income"], rng, n)
+    dates = _draw(sample, MEMBER_DATES, rng, n)
+    shift = _days_back(rng, n)  # เลื่อนทั้งชุดเท่ากัน ลำดับ/ระยะห่างระหว่างวันเกิด-สมัคร-อนุมัติจึงเหมือนตัวอย่าง
+    first_name, last_name = _names(sample, rng, n)
+    frame = pd.DataFrame({
+        "member_id": np.arange(start, start + n) + first_id,
+        "branch_no": _draw(sample, ["branch_no"], rng, n)["branch_no"],
+        "gender": _draw(sample, ["gender"], rng, n)["gender"],
+        "first_name": first_name,
+        "last_name": last_name,
+        **{col: _iso_dates(dates[col].to_numpy() + shift) for col in MEMBER_DATES},
+        "career": career["career"],
+        "income": (career["income"] * rng.lognormal(0, 0.15, n)).round().astype(np.int64),
+        "house_no": pd.Series(rng.integers(1, 1000, n)).astype(str) + "/" + pd.Series(rng.integers(1, 100, n)).astype(str),
+        "village_no": _draw(sample, ["village_no"], rng, n)["village_no"],
+        **{col: address[col] for col in ADDRESS_COLUMNS},
+    })
+    return frame[MEMBER_COLUMNS]
+
+
+def amount_chunk(samples, rng, start, n) -> pd.DataFrame:
+    frame = _draw(samples["amount"], AMOUNT_COLUMNS, rng, n)
+    for col in ["net_yearly_income", "yearly_debt_payments", "credit_limit"]:
+        frame[col] = (frame[col] * rng.lognormal(0, 0.1, n)).round(2)
+    return frame.rename(columns={"credit_limit_used_pct": "credit_limit_used(%)"})
+
+
+def credit_chunk(samples, rng, start, n, first_account, id_width) -> pd.DataFrame:
+    """ลูกค้าลำดับ start..start+n-1 และบัญชีทั้งหมดของลูกค้าเหล่านั้น (บัญชีเริ่มที่ลำดับ first_account)"""
+    sample = samples["credit"]
+    accounts_per_customer = sample["total_accounts"].clip(1, 5)
+    counts = _draw(accounts_per_customer.to_frame(), ["total_accounts"], rng, n)["total_accounts"].to_numpy()
+    rows = int(counts.sum())
+    owner = np.repeat(np.arange(n), counts)
+    group_start = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    customers = _draw(sample, CUSTOMER_FIELDS, rng, n)
+    first_name, last_name = _names(samples["members"], rng, n)
+    customers["customer_id"] = [f"CUST{i:0{id_width}d}" for i in range(start + 1, start + n + 1)]
+    customers["national_id"] = _national_ids(np.arange(start, start + n), rng)
+    customers["borrower_name"] = pd.Series(first_name) + " " + pd.Series(last_name)
+
+    accounts = _draw(sample, ACCOUNT_FIELDS, rng, rows)
+    accounts["account_open_date"] = _thai_dates(accounts["account_open_date"].to_numpy() + _days_back(rng, rows))
+    account_index = np.arange(first_account, first_account + rows)
+    lead = rng.integers(1, 10, rows)
+    accounts[ACCOUNT_KEY] = (lead * 10**15 + _scramble(account_index, 10**15, 314_159_265_358_979, 271_828_182_845_904)).astype(str)
+    accounts["contract_number"] = (
+        "MNE-" + pd.Series(rng.integers(1000, 10_000, rows)).astype(str)
+        + "-" + pd.Series(rng.integers(100_000, 1_000_000, rows)).astype(str)
+    )
+
+    # ยอดสรุปของลูกค้าให้ตรงกับบัญชีที่สร้างจริง
+    open_accounts = np.add.reduceat((accounts["account_status"] != CLOSED_STATUS).to_numpy().astype(np.int64), group_start)
+    customers["total_accounts"] = counts
+    customers["active_accounts"] = open_accounts
+    customers["closed_accounts"] = counts - open_accounts
+    customers["total_credit_limit"] = np.add.reduceat(accounts["credit_limit"].to_numpy(), group_start)
+
+    frame = pd.concat([customers.iloc[owner].reset_index(drop=True), accounts], axis=1)
+    return frame[samples["columns"]]
+
+# ==================================================
+# 4. เขียนไฟล์ (CSV หรือ Parquet) ลงไฟล์ชั่วคราวก่อน ครบแล้วค่อยเปลี่ยนชื่อ
+# ==================================================
+class _Writer:
+    def __init__(self, tmp_path, fmt):
+        self.tmp_path, self.fmt = tmp_path, fmt
+        self.parquet = None
+        self.rows = 0
+
+    def write(self, frame: pd.DataFrame):
+        if self.fmt == "parquet":
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.parquet is None:
+                self.parquet = pq.ParquetWriter(self.tmp_path, table.schema)
+            self.parquet.write_table(table.cast(self.parquet.schema))
+        else:
+            # BOM เฉพาะตอนเขียนครั้งแรก เหมือนไฟล์ตัวอย่าง (เปิดใน Excel แล้วภาษาไทยไม่เพี้ยน)
+            frame.to_csv(self.tmp_path, mode="a" if self.rows else "w", header=not self.rows, index=False,
+                         encoding="utf-8" if self.rows else "utf-8-sig")
+        self.rows += len(frame)
+
+    def close(self):
+        if self.parquet is not None:
+            self.parquet.close()
+
+
+def _write(path, fmt, chunks) -> int:
+    with atomic_path(path) as tmp_path:
+        writer = _Writer(tmp_path, fmt)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        finally:
+            writer.close()
+    return writer.rows
+
+
+def _chunk_plan(kind, total, seed):
+    """(rng, ลำดับแถวแรก, จำนวนแถว) ต่อ chunk: RNG ผูกกับ (seed, ชนิดไฟล์, ลำดับ chunk)"""
+    for number, start in enumerate(range(0, total, GEN_CHUNK)):
+        yield np.random.default_rng([seed, STREAMS[kind], number]), start, min(GEN_CHUNK, total - start)
+
+
+def iter_members(samples, rows, seed=42, first_member_id=500_001):
+    for rng, start, n in _chunk_plan("members", rows, seed):
+        yield member_chunk(samples, rng, start, n, first_member_id)
+
+
+def iter_amount(samples, rows, seed=42):
+    for rng, start, n in _chunk_plan("amount", rows, seed):
+        yield amount_chunk(samples, rng, start, n)
+
+
+def iter_credit(samples, customers, seed=42):
+    id_width = max(6, len(str(customers)))
+    first_account = 0
+    for rng, start, n in _chunk_plan("credit", customers, seed):
+        chunk = credit_chunk(samples, rng, start, n, first_account, id_width)
+        first_account += len(chunk)
+        yield chunk
+
+
+def generate(out_dir=SYNTHETIC_DIR, members=100_000, customers=None, seed=42, fmt="csv", first_member_id=500_001) -> dict:
+    """เขียน members / amount (จำนวนแถวเท่าสมาชิก จับคู่ตามลำดับ) / credit ลง out_dir คืน {ชนิด: (path, แถว)}"""
+    if fmt == "parquet" and pq is None:
+        raise ValueError("เขียน Parquet ต้องติดตั้ง pyarrow (pip install pyarrow)")
+    customers = members if customers is None else customers
+    samples = load_samples()
+    os.makedirs(out_dir, exist_ok=True)
+
+    plan = {
+        "members": iter_members(samples, members, seed, first_member_id),
+        "amount": iter_amount(samples, members, seed),
+        "credit": iter_credit(samples, customers, seed),
+    }
+    written = {}
+    for kind, chunks in plan.items():
+        path = os.path.join(out_dir, f"{kind}.{fmt}")
+        started = time.perf_counter()
+        rows = _write(path, fmt, chunks)
+        written[kind] = (path, rows)
+        print(f"✅ {os.path.basename(path):<16}{rows:>12,} แถว ({time.perf_counter() - started:.1f}s)")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="สร้างข้อมูลจำลอง สมาชิก/การเงิน/เครดิต สำหรับทดสอบขนาดใหญ่")
+    parser.add_argument("--members", type=int, default=100_000, help="จำนวนสมาชิก (= จำนวนแถวการเงิน)")
+    parser.add_argument("--customers", type=int, help="จำนวนลูกค้าเครดิต (ค่าเริ่มต้น = จำนวนสมาชิก, 1 ราย มี 1-5 บัญชี)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--out", default=SYNTHETIC_DIR, help="โฟลเดอร์ปลายทาง")
+    parser.add_argument("--first-member-id", type=int, default=500_001)
+    args = parser.parse_args(argv)
+    try:
+        written = generate(args.out, args.members, args.customers, args.seed, args.format, args.first_member_id)
+    except (OSError, ValueError) as e:
+        print(f"❌ สร้างข้อมูลไม่สำเร็จ: {e}")
+        return 1
+    paths = {kind: path for kind, (path, _) in written.items()}
+    print(f"นำเข้า: python -m src.ingest --members {paths['members']} --amount {paths['amount']} "
+          f"--credit {paths['credit']} --truncate")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ..files import DATA_DIR
+
+# ==================================================
+# 1. Config
+# ==================================================
+# แถวที่ไม่ผ่านการตรวจไม่ถูกส่งเข้า Postgres (ไม่ทำให้ทั้ง Transaction ล้ม) แต่เขียนลงไฟล์ CSV พร้อมเหตุผล
+QUARANTINE_DIR = os.getenv(
+    "INGEST_QUARANTINE_DIR",
+    os.path.join(DATA_DIR, "quarantine"),
+)
+ROW_COLUMN = "_row"        # ลำดับแถวข้อมูลในไฟล์ต้นทาง (เริ่มที่ 1 ไม่นับหัวตาราง)
+REJECT_COLUMN = "_reject"  # เหตุผลที่ไม่ผ่าน (ว่าง = ผ่าน)
+META_TYPES = {ROW_COLUMN: "BIGINT", REJECT_COLUMN: "TEXT"}
+
+# ==================================================
+# 2. กฎตรวจทีละคอลัมน์ (คืน mask ของแถวที่ผิด ทำทั้งคอลัมน์ในครั้งเดียว)
+# ==================================================
+def missing(frame, columns):
+    return [(frame[col].isna(), f"ไม่มี {col}") for col in columns]
+
+
+def too_long(frame, limits: dict):
+    return [(frame[col].astype("string").str.len().gt(n).fillna(False), f"{col} ยาวเกิน {n} ตัวอักษร")
+            for col, n in limits.items()]
+
+
+def not_integer(frame, columns):
+    return [(frame[col].notna() & ~frame[col].astype("string").str.fullmatch(r"\s*\d+\s*").fillna(False),
+             f"{col} ไม่ใช่จำนวนเต็ม") for col in columns]
+
+
+def not_number(raw, numbers, columns):
+    return [(raw[col].notna() & numbers[col].isna(), f"{col} ไม่ใช่ตัวเลข") for col in columns]
+
+
+def out_of_range(numbers, col, low=None, high=None):
+    values = numbers[col]
+    bad = pd.Series(False, index=values.index)
+    if low is not None:
+        bad |= values < low
+    if high is not None:
+        bad |= values > high
+    label = f"{col} ต้องอยู่ระหว่าง {low} ถึง {high}" if high is not None else f"{col} ต้องไม่น้อยกว่า {low}"
+    return [(bad.fillna(False), label)]
+
+
+def bad_date(raw, dates, columns):
+    return [(raw[col].notna() & dates[col].isna(), f"{col} ไม่ใช่วันที่ที่ถูกต้อง") for col in columns]
+
+
+def future_date(dates, columns):
+    today = pd.Timestamp.today().normalize()
+    return [(dates[col].gt(today).fillna(False), f"{col} เป็นวันในอนาคต") for col in columns]
+
+
+def reasons(index, checks) -> pd.Series:
+    """รวมผลของกฎทั้งหมดเป็นข้อความต่อแถว (หลายข้อคั่นด้วย ; ) แถวที่ผ่านเป็น NA"""
+    result = pd.Series(pd.NA, index=index, dtype="string")
+    for mask, reason in checks:
+        mask = np.asarray(mask, dtype=bool)
+        if mask.any():
+            result[mask] = (result[mask] + "; " + reason).fillna(reason)
+    return result
+
+# ==================================================
+# 3. คีย์ซ้ำข้ามทุก chunk (เก็บ hash 64 บิตของคีย์ที่เจอแล้วเป็น array ที่เรียงไว้)
+# ==================================================
+def key_hashes(values) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+class KeyTracker:
+    """จำคีย์ที่ผ่านไปแล้ว (และคีย์ที่มีอยู่ในฐานข้อมูล) ตรวจซ้ำด้วย searchsorted แทน set ของ Python"""
+
+    def __init__(self, existing=()):
+        self.seen = np.sort(key_hashes(list(existing)))
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        if not len(self.seen):
+            return np.zeros(len(hashes), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.seen, hashes), len(self.seen) - 1)
+        return self.seen[pos] == hashes
+
+    def duplicated(self, values) -> np.ndarray:
+        """True = คีย์เคยเจอแล้ว (ใน chunk ก่อน/ฐานข้อมูล) หรือซ้ำกับแถวก่อนหน้าใน chunk เดียวกัน"""
+        hashes = key_hashes(values)
+        return self.contains(hashes) | pd.Series(hashes).duplicated().to_numpy()
+
+    def add(self, values):
+        hashes = np.unique(key_hashes(values))
+        # Timsort รวม 2 ช่วงที่เรียงอยู่แล้วได้ในเวลาเชิงเส้น
+        self.seen = np.sort(np.concatenate([self.seen, hashes]), kind="stable")
+
+
+def reject(chunk: pd.DataFrame, mask, reason) -> pd.DataFrame:
+    """ติดเหตุผลให้แถวที่ยังผ่านอยู่และตรงกับ mask"""
+    mask = np.asarray(mask, dtype=bool) & chunk[REJECT_COLUMN].isna().to_numpy()
+    if mask.any():
+        chunk = chunk.copy()
+        chunk.loc[mask, REJECT_COLUMN] = reason
+    return chunk
+
+
+def reject_duplicates(chunk: pd.DataFrame, keys: pd.Series, seen: KeyTracker, existing: KeyTracker = None, where=None):
+    """ติดเหตุผลให้แถวที่คีย์มีในฐานข้อมูลแล้ว/ซ้ำกับแถวก่อนหน้า แล้วจำคีย์ของแถวที่ผ่าน
+
+    ตรวจเฉพาะแถวที่ยังผ่าน มีคีย์ และอยู่ใน mask where (ถ้าระบุ)
+    """
+    ok = chunk[REJECT_COLUMN].isna().to_numpy() & keys.notna().to_numpy()
+    if where is not None:
+        ok &= np.asarray(where, dtype=bool)
+    values = keys[ok].to_numpy(dtype=object)
+    if existing is not None:
+        in_db = np.zeros(len(chunk), dtype=bool)
+        in_db[ok] = existing.contains(key_hashes(values))
+        chunk = reject(chunk, in_db, f"{keys.name} มีในฐานข้อมูลแล้ว")
+    repeated = np.zeros(len(chunk), dtype=bool)
+    repeated[ok] = seen.duplicated(values)
+    chunk = reject(chunk, repeated, f"{keys.name} ซ้ำกับแถวก่อนหน้าในไฟล์")
+    seen.add(values)
+    return chunk
+
+
+def reject_new_keys_below(chunk: pd.DataFrame, keys: pd.Series, floor, existing: KeyTracker, reason):
+    """ติดเหตุผลให้แถวที่ยังผ่านและคีย์ยังไม่มีในฐานข้อมูล แต่ไม่มากกว่า floor (None = ไม่ตรวจ)"""
+    if floor is None:
+        return chunk
+    low = (chunk[REJECT_COLUMN].isna() & keys.le(floor)).fillna(False).to_numpy(dtype=bool)
+    if low.any():
+        low[low] = ~existing.contains(key_hashes(keys[low].to_numpy(dtype=object)))
+    return reject(chunk, low, reason)
+
+# ==================================================
+# 4. Quarantine: แถวที่ไม่ผ่าน -> <QUARANTINE_DIR>/<ไฟล์ต้นทาง>.<ชนิด>.rejected.csv
+# ==================================================
+class Quarantine:
+    def __init__(self, source_path, kind):
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        self.path = os.path.join(QUARANTINE_DIR, f"{stem}.{kind}.rejected.csv")
+        self.rows = 0
+        if os.path.exists(self.path):
+            os.remove(self.path)  # ผลของรอบก่อน
+
+    def record(self, chunk: pd.DataFrame) -> np.ndarray:
+        """เขียนแถวที่มีเหตุผลลงไฟล์ คืน mask ของแถวเหล่านั้น"""
+        bad = chunk[REJECT_COLUMN].notna().to_numpy()
+        if bad.any():
+            rejected = chunk[bad].rename(columns={ROW_COLUMN: "row", REJECT_COLUMN: "reason"})
+            rejected = rejected[["row", "reason"] + [c for c in rejected.columns if c not in ("row", "reason")]]
+            os.makedirs(QUARANTINE_DIR, exist_ok=True)
+            # BOM เฉพาะตอนเขียนครั้งแรก (เปิดใน Excel แล้วภาษาไทยไม่เพี้ยน)
+            rejected.to_csv(self.path, mode="a", header=not self.rows, index=False,
+                            encoding="utf-8" if self.rows else "utf-8-sig")
+            self.rows += int(bad.sum())
+        return bad
+
+    def split(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """เขียนแถวที่ไม่ผ่านลงไฟล์ คืนเฉพาะแถวที่ผ่าน (ไม่มีคอลัมน์ _reject)"""
+        bad = self.record(chunk)
+        return chunk[~bad].drop(columns=REJECT_COLUMN)
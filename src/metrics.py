@@ -0,0 +1,219 @@
+"""วัดเวลา/ขนาดของทุก Dash Callback และทุกคำสั่ง SQL แล้วเปิดเป็น Prometheus /metrics
+
+ต่อ Callback: เวลารวม (wall), เวลาใน DB, เวลาสร้างกราฟ และขนาด response
+ต่อคำสั่ง SQL: เวลา execute แยกตามชนิดคำสั่ง + ตารางแรก (เช่น "SELECT credit_scoring.customers")
+
+Histogram เป็น bucket คงที่ (bisect + lock) ไม่มี dependency เพิ่ม
+แต่ละ Worker ของ gunicorn เก็บค่าของตัวเอง ทุก series มี label worker (pid) แยกชุดตัวนับของแต่ละ Worker
+(scrape หนึ่งครั้งได้ค่าของ Worker ที่ตอบ รวมข้าม Worker ด้วย sum without (worker) ฝั่ง Prometheus)
+ปิดทั้งหมดด้วย METRICS_PATH= (ค่าว่าง)
+"""
+import functools
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+
+# ==================================================
+# 1. Config
+# ==================================================
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+PREFIX = "coopdash"
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def is_enabled() -> bool:
+    return bool(METRICS_PATH)
+
+# ==================================================
+# 2. Histogram
+# ==================================================
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Histogram แบบ Prometheus ที่มี label เดียว (นับแบบไม่สะสม แล้วค่อยสะสมตอน render)"""
+
+    def __init__(self, name, help_text, label, buckets=SECONDS_BUCKETS):
+        self.name = f"{PREFIX}_{name}"
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}  # label value -> [count ต่อ bucket ..., count +Inf, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        worker = f'worker="{os.getpid()}"'
+        for label_value in sorted(snapshot):
+            series = snapshot[label_value]
+            label = f'{self.label}="{_escape(str(label_value))}",{worker}'
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                total += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {total}')
+            lines.append(f"{self.name}_sum{{{label}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{label}}} {total}")
+        return lines
+
+
+callback_seconds = Histogram("callback_seconds", "เวลารวมของ Dash Callback (วินาที)", "callback")
+callback_db_seconds = Histogram("callback_db_seconds", "เวลาที่ Callback รอ SQL (วินาที)", "callback")
+callback_figure_seconds = Histogram("callback_figure_seconds", "เวลาสร้างกราฟ/KPI ใน Callback (วินาที)", "callback")
+callback_response_bytes = Histogram(
+    "callback_response_bytes", "ขนาด response ของ Callback (byte)", "callback", BYTES_BUCKETS
+)
+sql_seconds = Histogram("sql_seconds", "เวลา execute คำสั่ง SQL (วินาที)", "statement")
+HISTOGRAMS = [callback_seconds, callback_db_seconds, callback_figure_seconds, callback_response_bytes, sql_seconds]
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.render()
+    return "\n".join(lines) + "\n"
+
+# ==================================================
+# 3. เวลาที่ใช้ระหว่าง Callback (เก็บแยกต่อ Thread ที่ตอบ request นั้น)
+# ==================================================
+_local = threading.local()
+
+
+def _add(kind, seconds):
+    spent = getattr(_local, "spent", None)
+    if spent is not None:
+        spent[kind] += seconds
+
+
+def figure_timer(func):
+    """จับเวลาสร้างกราฟ/KPI นับเฉพาะชั้นนอกสุด (กราฟที่เรียกกราฟอื่นไม่ถูกนับซ้ำ)"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if getattr(_local, "spent", None) is None or getattr(_local, "in_figure", False):
+            return func(*args, **kwargs)
+        _local.in_figure = True
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.in_figure = False
+            _add("figure", time.perf_counter() - started)
+
+    return wrapper
+
+# ==================================================
+# 4. SQL (SQLAlchemy cursor events)
+# ==================================================
+_STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE(?:\s+IF\s+NOT\s+EXISTS)?)\s+([\w.\"]+)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=256)
+def statement_label(statement: str) -> str:
+    """ย่อคำสั่ง SQL เป็น label ที่มีจำนวนจำกัด: ชนิดคำสั่ง + ตารางแรก"""
+    words = statement.split(None, 1)
+    if not words:
+        return "EMPTY"
+    match = _STATEMENT_TABLE.search(statement)
+    return f"{words[0].upper()} {match.group(1).strip(chr(34))}" if match else words[0].upper()
+
+
+def instrument_engine(engine):
+    """เก็บเวลาทุกคำสั่งที่ engine นี้ execute (รวม pd.read_sql ที่ใช้ connection ของ engine)"""
+    if not is_enabled():
+        return engine
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["metrics_started"].pop()
+        sql_seconds.observe(statement_label(statement), seconds)
+        _add("db", seconds)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    return engine
+
+# ==================================================
+# 5. Flask: จับเวลา /_dash-update-component + เปิด /metrics
+# ==================================================
+UNKNOWN_CALLBACK = "unknown"
+
+
+def _callback_name(app, payload):
+    """ชื่อฟังก์ชันของ Callback ที่ลงทะเบียนไว้เท่านั้น
+
+    output ที่ client ส่งมาเองแต่ไม่มีใน callback_map นับรวมเป็น "unknown"
+    (ไม่ใช้ข้อความจาก client เป็น label ไม่เช่นนั้นจำนวน series โตได้ไม่จำกัด)
+    """
+    output = payload.get("output") if isinstance(payload, dict) else None
+    spec = app.callback_map.get(output) if isinstance(output, str) else None
+    func = spec and spec.get("callback")
+    return getattr(func, "__name__", None) or (output if spec else UNKNOWN_CALLBACK)
+
+
+def install(app):
+    """ผูกการวัดกับ Dash app (เรียกก่อน before_request อื่น เพื่อให้นับเวลาทั้ง request)"""
+    if not is_enabled():
+        return
+    from flask import Response, g, request
+
+    server = app.server
+    update_path = app.config.routes_pathname_prefix + "_dash-update-component"
+
+    @server.before_request
+    def _start_callback_timer():
+        if request.path == update_path:
+            g.metrics_started = time.perf_counter()
+            _local.spent = {"db": 0.0, "figure": 0.0}
+
+    @server.after_request
+    def _record_callback(response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        spent, _local.spent = _local.spent, None
+        try:
+            payload = json.loads(request.get_data(cache=True) or b"{}")
+        except ValueError:
+            payload = None
+        name = _callback_name(app, payload)
+        callback_seconds.observe(name, time.perf_counter() - started)
+        callback_db_seconds.observe(name, spent["db"])
+        callback_figure_seconds.observe(name, spent["figure"])
+        size = response.calculate_content_length()
+        if size is not None:
+            callback_response_bytes.observe(name, size)
+        return response
+
+    @server.teardown_request
+    def _clear_callback_timer(exc):
+        _local.spent = None
+
+    @server.route(METRICS_PATH)
+    def metrics_endpoint():
+        return Response(render_metrics(), content_type=CONTENT_TYPE)
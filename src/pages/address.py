@@ -1,14 +1,16 @@
 import dash
 from dash import dcc, html, Input, Output, State, callback
 import dash_bootstrap_components as dbc
-import plotly.express as px
-import plotly.graph_objects as go
+import plotly.colors as pc
 import pandas as pd
 from functools import lru_cache
 
-from ..data_manager import load_data
+from ..data_manager import get_dataset, register_dataset_cache
+from ..figure_cache import frame_key, memoize, tag_frame
+from ..filter_index import filter_frame, filter_signature
 from ..components.kpi_cards import render_address_kpis
 from ..components.chart_card import chart_card
+from ..components.figures import OTHER_LABEL, new_figure, top_n, treemap_figure
 from ..components.theme import THEME
 
 # ==================================================
@@ -28,32 +30,33 @@ def preprocess_geographic(df: pd.DataFrame) -> pd.DataFrame:
             df[col] = df[col].fillna("ไม่ระบุ")
     return df
 
+@register_dataset_cache
 @lru_cache(maxsize=1)
 def load_address_data():
-    return preprocess_geographic(load_data())
+    return tag_frame(preprocess_geographic(get_dataset()))
+
+@register_dataset_cache
+@lru_cache(maxsize=32)
+def load_address_view(signature=()):
+    """ข้อมูลพื้นที่หลังกรองตามตัวกรองของ Sidebar (Cache ต่อชุดตัวกรอง)"""
+    return filter_frame(load_address_data(), signature)
 
 # ==================================================
-# 3. Layout Helper (Standardized Font & Margins)
+# 3. Layout Helper (สี/ฟอนต์มาจาก Template ของโปรเจกต์ ดู components/figures.py)
 # ==================================================
-def apply_address_layout(fig, height=CHART_HEIGHT, right_margin=30):
-    fig.update_layout(
+def chart_layout(height=CHART_HEIGHT, right_margin=30, **layout):
+    return dict(
         autosize=True,
         height=height,
         uirevision=UI_REVISION_KEY,
         # ปรับ Margin ให้เท่ากับหน้า Branch (t=40, b=35, l=45, r=30)
         margin=dict(t=40, b=35, l=10, r=right_margin), 
-        paper_bgcolor=THEME["paper"],
-        plot_bgcolor=THEME["bg_plot"],
-        font=dict(
-            family="Sarabun, sans-serif", 
-            size=13, # ขนาดฟอนต์มาตรฐาน 13
-            color=THEME["text"]
-        ),
-        transition={'duration': 0}
+        font=dict(size=13), # ขนาดฟอนต์มาตรฐาน 13
+        transition={'duration': 0},
+        **layout,
     )
-    fig.update_coloraxes(showscale=False)
-    return fig
 
+@memoize
 def get_drilldown_chart(df, level="province"):
     col_map = {
         "province": "province_name",
@@ -64,45 +67,36 @@ def get_drilldown_chart(df, level="province"):
     target_col = col_map.get(level, "province_name")
     
     if target_col not in df.columns or df.empty:
-        fig = go.Figure()
-        fig.add_annotation(text="ไม่พบข้อมูลในระดับนี้", showarrow=False)
-        return apply_address_layout(fig)
+        return new_figure(layout=chart_layout(annotations=[dict(text="ไม่พบข้อมูลในระดับนี้", showarrow=False)]))
 
-    counts = df[target_col].value_counts().reset_index()
-    counts.columns = [target_col, "count"]
+    # จำกัดจำนวนกล่อง (ระดับหมู่บ้านอาจมีหลายพันค่า) ส่วนที่เหลือรวมเป็น "อื่นๆ"
+    counts = top_n(df[target_col].value_counts())
     
     # Coloring: ใช้ชุดสีตามลำดับความลึก
     color_scales = {
-        "province": px.colors.sequential.Purples_r,
-        "district": px.colors.sequential.Blues_r,
-        "sub_district": px.colors.sequential.Teal_r, 
-        "village": px.colors.sequential.Greens_r
+        "province": pc.sequential.Purples_r,
+        "district": pc.sequential.Blues_r,
+        "sub_district": pc.sequential.Teal_r, 
+        "village": pc.sequential.Greens_r
     }
 
-    fig = px.treemap(
-        counts,
-        path=[target_col], 
-        values='count',
-        color='count',
-        color_continuous_scale=color_scales.get(level, "Purples")
-    )
-    
-    fig.update_traces(
+    return treemap_figure(
+        counts.index, counts.values,
+        colorscale=color_scales.get(level, "Purples"),
         textinfo="label+value",
         # ปรับแต่ง Text และขนาด Font ภายในกล่อง Treemap
         texttemplate="<span style='font-size: 15px'>%{label}</span><br><span style='font-size: 22px'><b>%{value:,}</b></span>",
         hovertemplate="<b>%{label}</b><br>จำนวน: %{value:,} คน<extra></extra>",
         marker=dict(line=dict(width=1, color='white')),
-        textposition="middle center"
+        textposition="middle center",
+        layout=chart_layout(),
     )
-    
-    return apply_address_layout(fig)
 
 # ==================================================
 # Layout (Logic โครงสร้างเดิม)
 # ==================================================
-def address_layout():
-    df = load_address_data()
+def address_layout(signature=()):
+    df = load_address_view(signature)
     initial_fig = get_drilldown_chart(df, "province")
     
     return dbc.Container(
@@ -159,14 +153,15 @@ def address_layout():
     [Input('drill-graph', 'clickData'),
      Input('btn-icon-reset', 'n_clicks')],
     [State('drill-path', 'data'),
-     State('btn-icon-reset', 'style')],
+     State('btn-icon-reset', 'style'),
+     State('cross-filter', 'data')],
     prevent_initial_call=True
 )
-def handle_geo_drilldown(clickData, btn_clicks, current_state, current_btn_style):
+def handle_geo_drilldown(clickData, btn_clicks, current_state, current_btn_style, global_filters):
     ctx = dash.callback_context
     triggered_id = ctx.triggered[0]['prop_id'].split('.')[0]
     
-    df = load_address_data()
+    df = load_address_view(filter_signature(global_filters))
     level = current_state.get('level', 'province')
     filters = current_state.get('filters', {})
 
@@ -175,7 +170,9 @@ def handle_geo_drilldown(clickData, btn_clicks, current_state, current_btn_style
     elif clickData:
         try:
             selected_loc = clickData['points'][0]['label']
-            if level == 'province':
+            if selected_loc == OTHER_LABEL:
+                pass  # กล่องรวม "อื่นๆ" ไม่มีพื้นที่ให้เจาะต่อ
+            elif level == 'province':
                 level = 'district'; filters['province_name'] = selected_loc
             elif level == 'district':
                 level = 'sub_district'; filters['district_area'] = selected_loc
@@ -186,6 +183,8 @@ def handle_geo_drilldown(clickData, btn_clicks, current_state, current_btn_style
     dff = df.copy()
     for col, val in filters.items():
         if col in dff.columns: dff = dff[dff[col] == val]
+    key = frame_key(df)
+    tag_frame(dff, *(key[1] if key else ()), tuple(sorted(filters.items())))
 
     fig = get_drilldown_chart(dff, level)
     
@@ -1,13 +1,21 @@
-from dash import dcc, html, dash_table
+from dash import dcc, html, dash_table, Input, Output, State, callback, ctx, no_update
+from dash.dash_table.Format import Format, Group, Scheme, Symbol
 import dash_bootstrap_components as dbc
-import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 from functools import lru_cache
 
-from ..data_manager import load_data
+from ..data_manager import get_dataset, register_dataset_cache
+from ..figure_cache import memoize, tag_frame
+from ..analytics import branch_summary, occupation_debt
+from ..filter_index import (
+    RISK_BINS, RISK_LABELS, clicked_value, filter_frame, filter_mask, filter_signature, toggle_value, without,
+)
 from ..components.kpi_cards import render_amount_kpis
-from ..components.chart_card import chart_card
+from ..components.chart_card import chart_card, chart_graph
+from ..components.figures import bar_figure, pie_figure
+from ..components.cross_filter import filter_control_id
 from ..components.theme import THEME
 
 # ==================================================
@@ -21,7 +29,7 @@ UI_REVISION_KEY = "amount-static"
 # ==================================================
 def preprocess_amount(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty: return df
-    df = df.copy()
+    df = df.copy(deep=False)
     
     if "member_id" in df.columns and "customer_id" not in df.columns:
         df["customer_id"] = df["member_id"]
@@ -34,116 +42,241 @@ def preprocess_amount(df: pd.DataFrame) -> pd.DataFrame:
         df["available_credit"] = df["credit_limit"] * (1 - df["credit_limit_used_pct"] / 100)
         
     if "credit_limit_used_pct" in df.columns:
-        df["risk_level"] = pd.cut(
-            df["credit_limit_used_pct"],
-            bins=[-1, 50, 80, 100],
-            labels=["ต่ำ (0-50%)", "ปานกลาง (50-80%)", "สูง (80-100%)"]
-        )
+        df["risk_level"] = pd.cut(df["credit_limit_used_pct"], bins=RISK_BINS, labels=RISK_LABELS)
     return df
 
+@register_dataset_cache
 @lru_cache(maxsize=1)
 def load_amount_data():
-    df = load_data()
-    return preprocess_amount(df)
+    df = get_dataset()
+    return tag_frame(preprocess_amount(df))
+
+@register_dataset_cache
+@lru_cache(maxsize=32)
+def load_amount_view(signature=()):
+    """ข้อมูลการเงินหลังกรองตาม Cross-filter (Cache ต่อชุดตัวกรอง)"""
+    return filter_frame(load_amount_data(), signature)
 
 # ==================================================
-# Layout Helper
+# Layout Helper (สี/ฟอนต์/แกนมาจาก Template ของโปรเจกต์ ดู components/figures.py)
 # ==================================================
-def apply_amount_layout(fig, height=CHART_HEIGHT, right_margin=30, compact=False):
-    fig.update_layout(
+def chart_layout(height=CHART_HEIGHT, right_margin=30, compact=False, **layout):
+    return dict(
         autosize=False,
         height=height,
         uirevision=UI_REVISION_KEY,
         margin=dict(t=40 if not compact else 20, b=35, l=45, r=right_margin),
-        paper_bgcolor=THEME["paper"],
-        plot_bgcolor=THEME["bg_plot"],
-        font=dict(family="Sarabun, sans-serif", color=THEME["text"], size=13),
-        hoverlabel=dict(bgcolor="rgba(15,23,42,0.95)", font_color="white"),
+        font=dict(size=13),
+        hoverlabel=dict(bgcolor=THEME["bg_hover"], font=dict(color="white")),
+        **layout,
     )
-    fig.update_xaxes(showgrid=False)
-    fig.update_yaxes(gridcolor=THEME["grid"])
-    return fig
 
 # ==================================================
 # Charts Functions
 # ==================================================
 
+@memoize
 def chart_debt_health_donut(df):
     if "risk_level" not in df.columns: return go.Figure()
-    risk_counts = df["risk_level"].value_counts().reset_index()
-    risk_counts.columns = ["Level", "Count"]
-    fig = px.pie(risk_counts, names="Level", values="Count", hole=0.45, color="Level",
-                 color_discrete_map={"ต่ำ (0-50%)": THEME["success"], "ปานกลาง (50-80%)": THEME["warning"], "สูง (80-100%)": THEME["danger"]})
-    fig.update_traces(texttemplate="<b>%{percent:.1%}</b>", textposition='inside')
-    return apply_amount_layout(fig, compact=True)
+    risk_counts = df["risk_level"].value_counts()
+    colors = {"ต่ำ (0-50%)": THEME["success"], "ปานกลาง (50-80%)": THEME["warning"], "สูง (80-100%)": THEME["danger"]}
+    return pie_figure(risk_counts.index, risk_counts.values, colors=[colors.get(level, THEME["muted"]) for level in risk_counts.index],
+                      texttemplate="<b>%{percent:.1%}</b>", textposition='inside', layout=chart_layout(compact=True))
 
+@memoize
 def chart_avg_loan_by_branch(df):
-    branch_col = "branch_no" if "branch_no" in df.columns else "branch_id"
-    if branch_col not in df.columns or "actual_debt" not in df.columns: return go.Figure()
-    avg_data = df.groupby(branch_col)["actual_debt"].mean().reset_index()
-    avg_data[branch_col] = avg_data[branch_col].astype(str)
-    fig = px.bar(avg_data, x=branch_col, y="actual_debt", color="actual_debt", color_continuous_scale="Blues", text_auto='.2s')
-    fig.update_layout(coloraxis_showscale=False, xaxis=dict(type='category'))
-    return apply_amount_layout(fig)
+    if "branch_no" not in df.columns or "actual_debt" not in df.columns: return go.Figure()
+    avg_data = branch_summary(df)
+    return bar_figure(avg_data["branch_no"].astype(str), avg_data["avg_debt"], colorscale="Blues", texttemplate="%{y:.2s}",
+                      layout=chart_layout(xaxis=dict(type='category')))
 
+@memoize
 def chart_top_npl_branches(df):
-    branch_col = "branch_no" if "branch_no" in df.columns else "branch_id"
-    if "credit_limit_used_pct" not in df.columns: return go.Figure()
-    temp_df = df.copy()
-    temp_df["is_over_limit"] = (temp_df["credit_limit_used_pct"] > 90).astype(int)
-    npl_data = temp_df.groupby(branch_col)["is_over_limit"].mean().reset_index()
-    npl_data["npl_pct"] = npl_data["is_over_limit"] * 100
-    fig = px.bar(npl_data, y=branch_col, x="npl_pct", orientation='h', color="npl_pct", color_continuous_scale="Reds", text_auto='.1f')
-    fig.update_layout(coloraxis_showscale=False)
-    return apply_amount_layout(fig)
+    if "branch_no" not in df.columns or "credit_limit_used_pct" not in df.columns: return go.Figure()
+    npl_data = branch_summary(df)
+    return bar_figure(npl_data["branch_no"], npl_data["npl_pct"], orientation='h', colorscale="Reds", texttemplate="%{x:.1f}",
+                      layout=chart_layout())
 
+@memoize
 def chart_occupation_debt(df):
-    col_name = "career_name" if "career_name" in df.columns else "occupation"
-    if col_name not in df.columns or "actual_debt" not in df.columns: return go.Figure()
-    occ_data = df[df["actual_debt"] > 0].groupby(col_name)["actual_debt"].sum().reset_index()
-    occ_data = occ_data.sort_values("actual_debt", ascending=True).tail(8)
-    fig = px.bar(occ_data, y=col_name, x="actual_debt", color_discrete_sequence=[THEME["primary"]], text_auto='.2s')
-    return apply_amount_layout(fig)
+    if "career_name" not in df.columns or "actual_debt" not in df.columns: return go.Figure()
+    occ_data = occupation_debt(df).sort_values("actual_debt", ascending=True).tail(8)
+    return bar_figure(occ_data["career_name"], occ_data["actual_debt"], orientation='h', color=THEME["primary"], texttemplate="%{x:.2s}",
+                      layout=chart_layout())
 
 # ==================================================
-# Table Component: รายบุคคล (ล่างสุด)
+# Table Component: รายบุคคล (ล่างสุด) — แบ่งหน้า/เรียง/กรองฝั่ง Server
 # ==================================================
-def render_member_table(df):
-    """ตารางแสดงข้อมูลรายบุคคลเพื่อวางไว้ล่างสุด"""
-    # เตรียมข้อมูล (ดึงชื่อจาก SQL หรือตั้งชื่อหลอกถ้าไม่มี)
-    df_table = df.copy()
-    if "first_name" in df_table.columns and "last_name" in df_table.columns:
-        df_table["fullname"] = df_table["first_name"] + " " + df_table["last_name"]
+TABLE_PAGE_SIZE = 20
+TABLE_COLUMNS = ["customer_id", "fullname", "career_name", "actual_debt", "credit_limit_used_pct", "risk_level"]
+FILTER_OPERATORS = [
+    ["ge ", ">="], ["le ", "<="], ["lt ", "<"], ["gt ", ">"],
+    ["ne ", "!="], ["eq ", "="], ["contains "], ["datestartswith "],
+]
+
+@register_dataset_cache
+@lru_cache(maxsize=1)
+def load_member_table():
+    """เตรียมตารางรายบุคคลครั้งเดียว เก็บเฉพาะคอลัมน์ที่แสดงผล"""
+    df = load_amount_data()
+    if df.empty: return pd.DataFrame(columns=TABLE_COLUMNS)
+
+    if "first_name" in df.columns and "last_name" in df.columns:
+        fullname = df["first_name"] + " " + df["last_name"]
     else:
-        df_table["fullname"] = "สมาชิก ID: " + df_table["customer_id"].astype(str)
+        fullname = "สมาชิก ID: " + df["customer_id"].astype(str)
 
-    return dbc.Table(
-        children=[
-            html.Thead(children=[
-                html.Tr(children=[
-                    html.Th("ID", className="text-center"),
-                    html.Th("ชื่อ-นามสกุล"),
-                    html.Th("อาชีพ"),
-                    html.Th("ยอดหนี้รวม", className="text-end"),
-                    html.Th("การใช้สิทธิ์ (%)", className="text-center"),
-                    html.Th("ระดับความเสี่ยง", className="text-center"),
-                ])
-            ]),
-            html.Tbody(children=[
-                html.Tr(children=[
-                    html.Td(children=[str(row["customer_id"])], className="text-center"),
-                    html.Td(children=[row["fullname"]]),
-                    html.Td(children=[row.get("career_name", "-")]),
-                    html.Td(children=[f"{row['actual_debt']:,.2f}"], className="text-end"),
-                    html.Td(children=[f"{row['credit_limit_used_pct']:.1f}%"], className="text-center"),
-                    html.Td(children=[
-                        dbc.Badge(row["risk_level"], color="danger" if "สูง" in str(row["risk_level"]) else "warning" if "ปานกลาง" in str(row["risk_level"]) else "success")
-                    ], className="text-center"),
-                ]) for _, row in df_table.iterrows()
-            ])
+    table = pd.DataFrame({
+        "customer_id": df["customer_id"].astype(str),
+        "fullname": fullname,
+        "career_name": df["career_name"] if "career_name" in df.columns else "-",
+        "actual_debt": df["actual_debt"],
+        "credit_limit_used_pct": df["credit_limit_used_pct"],
+        "risk_level": df["risk_level"].astype(str),
+    })
+    return table.reset_index(drop=True)
+
+@register_dataset_cache
+@lru_cache(maxsize=32)
+def _sort_index(column, ascending):
+    """ลำดับแถวที่เรียงแล้วต่อคอลัมน์ (คำนวณครั้งเดียวแล้วใช้ซ้ำทุกหน้า)"""
+    values = load_member_table()[column]
+    return values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+def split_filter_part(filter_part):
+    """แยก filter_query ของ DataTable ออกเป็น (คอลัมน์, ตัวดำเนินการ, ค่า)"""
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find("{") + 1: name_part.rfind("}")]
+
+                value_part = value_part.strip()
+                v0 = value_part[0] if value_part else ""
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', "`"):
+                    value = value_part[1:-1].replace("\\" + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+
+                return name, operator_type[0].strip(), value
+    return None, None, None
+
+@register_dataset_cache
+@lru_cache(maxsize=64)
+def _filter_mask(filter_query):
+    table = load_member_table()
+    mask = np.ones(len(table), dtype=bool)
+    for part in (filter_query or "").split(" && "):
+        col, op, value = split_filter_part(part)
+        if col not in table.columns:
+            continue
+        series = table[col]
+        if op in ("eq", "ne", "lt", "le", "gt", "ge"):
+            if pd.api.types.is_numeric_dtype(series) and not isinstance(value, float):
+                continue
+            if not pd.api.types.is_numeric_dtype(series) and isinstance(value, float):
+                value = f"{value:g}"
+            if op == "eq": part_mask = series == value
+            elif op == "ne": part_mask = series != value
+            elif op == "lt": part_mask = series < value
+            elif op == "le": part_mask = series <= value
+            elif op == "gt": part_mask = series > value
+            else: part_mask = series >= value
+        elif op == "contains":
+            part_mask = series.astype(str).str.contains(str(value), regex=False)
+        else:
+            part_mask = series.astype(str).str.startswith(str(value))
+        mask &= part_mask.fillna(False).to_numpy()
+    mask.setflags(write=False)  # ใช้ร่วมกันจาก Cache ห้ามแก้ไข
+    return mask
+
+def query_member_table(page_current, page_size, sort_by=None, filter_query="", signature=()):
+    """คืน (แถวของหน้าที่มองเห็น, จำนวนแถวทั้งหมดหลังกรอง (ตาราง + Cross-filter), หน้าที่แสดงจริง)
+
+    หน้าที่เกินจำนวนหน้าหลังกรองถูกเลื่อนมาเป็นหน้าสุดท้าย
+    """
+    table = load_member_table()
+    mask = _filter_mask(filter_query or "")
+    if signature:
+        mask = mask & filter_mask(signature)
+
+    if sort_by:
+        order = _sort_index(sort_by[0]["column_id"], sort_by[0]["direction"] == "asc")
+        rows = order[mask[order]]
+    else:
+        rows = np.flatnonzero(mask)
+
+    page_current = min(page_current, max(0, (len(rows) - 1) // page_size))
+    start = page_current * page_size
+    page = table.iloc[rows[start:start + page_size]]
+    return page.to_dict("records"), len(rows), page_current
+
+def render_member_table():
+    """ตารางแสดงข้อมูลรายบุคคล ข้อมูลแต่ละหน้าถูกดึงผ่าน Callback"""
+    money = Format(precision=2, scheme=Scheme.fixed, group=Group.yes)
+    pct = Format(precision=1, scheme=Scheme.fixed).symbol(Symbol.yes).symbol_suffix("%")
+
+    return dash_table.DataTable(
+        id="amount-member-table",
+        columns=[
+            {"name": "ID", "id": "customer_id"},
+            {"name": "ชื่อ-นามสกุล", "id": "fullname"},
+            {"name": "อาชีพ", "id": "career_name"},
+            {"name": "ยอดหนี้รวม", "id": "actual_debt", "type": "numeric", "format": money},
+            {"name": "การใช้สิทธิ์ (%)", "id": "credit_limit_used_pct", "type": "numeric", "format": pct},
+            {"name": "ระดับความเสี่ยง", "id": "risk_level"},
+        ],
+        page_current=0,
+        page_size=TABLE_PAGE_SIZE,
+        page_action="custom",
+        sort_action="custom",
+        sort_mode="single",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
+        fixed_rows={"headers": True},
+        style_table={"maxHeight": "400px", "overflowY": "auto"},
+        style_cell={"fontFamily": "Sarabun, sans-serif", "fontSize": "14px", "padding": "6px 10px"},
+        style_header={"fontWeight": "bold", "backgroundColor": "#f8fafc"},
+        style_cell_conditional=[
+            {"if": {"column_id": c}, "textAlign": "center"} for c in ["customer_id", "credit_limit_used_pct", "risk_level"]
         ],
-        bordered=True, hover=True, striped=True, responsive=True, className="mt-3 bg-white"
+        style_data_conditional=[
+            {"if": {"row_index": "odd"}, "backgroundColor": "#f8fafc"},
+            {"if": {"filter_query": '{risk_level} contains "สูง"', "column_id": "risk_level"}, "color": THEME["danger"], "fontWeight": 600},
+            {"if": {"filter_query": '{risk_level} contains "ปานกลาง"', "column_id": "risk_level"}, "color": THEME["warning"], "fontWeight": 600},
+            {"if": {"filter_query": '{risk_level} contains "ต่ำ"', "column_id": "risk_level"}, "color": THEME["success"], "fontWeight": 600},
+        ],
+    )
+
+# ตัวกรอง/การเรียง/ขนาดหน้าเปลี่ยน = ชุดแถวเปลี่ยน กลับไปหน้าแรก
+RESET_PAGE_PROPS = {
+    "amount-member-table.page_size", "amount-member-table.sort_by", "amount-member-table.filter_query",
+    "cross-filter.data",
+}
+
+@callback(
+    [Output("amount-member-table", "data"),
+     Output("amount-member-table", "page_count"),
+     Output("amount-member-table", "page_current")],
+    [Input("amount-member-table", "page_current"),
+     Input("amount-member-table", "page_size"),
+     Input("amount-member-table", "sort_by"),
+     Input("amount-member-table", "filter_query"),
+     Input("cross-filter", "data")]
+)
+def update_member_table(page_current, page_size, sort_by, filter_query, filters):
+    page_size = page_size or TABLE_PAGE_SIZE
+    if RESET_PAGE_PROPS & set(ctx.triggered_prop_ids):
+        page_current = 0
+    records, total_rows, page_current = query_member_table(
+        page_current or 0, page_size, sort_by, filter_query, filter_signature(filters)
     )
+    page_count = max(1, -(-total_rows // page_size))
+    return records, page_count, page_current
 
 # ==================================================
 # Main Layout
@@ -157,18 +290,18 @@ def amount_layout():
         style={"padding": "20px 30px", "maxWidth": "1400px", "margin": "0 auto"},
         children=[
             html.H3(children=["Dashboard วิเคราะห์พอร์ตสินเชื่อและความเสี่ยง"], className="fw-bold mb-3"),
-            render_amount_kpis(df),
+            html.Div(id="amount-kpis"),
             
             # Row 1: Donut & Occupation
             dbc.Row(children=[
-                dbc.Col(children=[chart_card(chart_debt_health_donut(df), "สัดส่วนสุขภาพหนี้ (Debt Health)")], lg=6, md=12),
-                dbc.Col(children=[chart_card(chart_occupation_debt(df), "ยอดหนี้รวมแยกตามกลุ่มอาชีพ (Top 8)")], lg=6, md=12),
+                dbc.Col(children=[chart_card(chart_graph("amount-risk-graph"), "สัดส่วนสุขภาพหนี้ (Debt Health)")], lg=6, md=12),
+                dbc.Col(children=[chart_card(chart_graph("amount-occupation-graph"), "ยอดหนี้รวมแยกตามกลุ่มอาชีพ (Top 8)")], lg=6, md=12),
             ], className="g-3 mb-3"),
             
             # Row 2: Branch Analysis
             dbc.Row(children=[
-                dbc.Col(children=[chart_card(chart_avg_loan_by_branch(df), "ประสิทธิภาพ: ยอดหนี้เฉลี่ยต่อคนรายสาขา")], lg=6, md=12),
-                dbc.Col(children=[chart_card(chart_top_npl_branches(df), "จุดเฝ้าระวัง: % ลูกค้าเสี่ยงสูงรายสาขา")], lg=6, md=12),
+                dbc.Col(children=[chart_card(chart_graph("amount-branch-loan-graph"), "ประสิทธิภาพ: ยอดหนี้เฉลี่ยต่อคนรายสาขา")], lg=6, md=12),
+                dbc.Col(children=[chart_card(chart_graph("amount-npl-graph"), "จุดเฝ้าระวัง: % ลูกค้าเสี่ยงสูงรายสาขา")], lg=6, md=12),
             ], className="g-3 mb-4"),
 
             # Row 3: ตารางรายบุคคล (วางไว้ล่างสุด)
@@ -177,7 +310,7 @@ def amount_layout():
                     dbc.Card(children=[
                         dbc.CardHeader(children=[html.Strong("รายละเอียดข้อมูลรายบุคคลและความเสี่ยง")]),
                         dbc.CardBody(children=[
-                            html.Div(children=[render_member_table(df)], style={"maxHeight": "400px", "overflowY": "auto"})
+                            render_member_table()
                         ])
                     ], className="border-0 shadow-sm")
                 ], width=12)
@@ -185,4 +318,52 @@ def amount_layout():
         ],
     )
 
+# ==================================================
+# Callbacks: Cross-filter
+# ==================================================
+@callback(
+    Output("amount-kpis", "children"),
+    Input("cross-filter", "data")
+)
+def update_amount_kpis(filters):
+    return render_amount_kpis(load_amount_view(filter_signature(filters)))
+
+@callback(
+    [Output("amount-risk-graph", "figure"),
+     Output("amount-occupation-graph", "figure"),
+     Output("amount-branch-loan-graph", "figure"),
+     Output("amount-npl-graph", "figure")],
+    Input("cross-filter", "data")
+)
+def update_amount_charts(filters):
+    signature = filter_signature(filters)
+    return (
+        chart_debt_health_donut(load_amount_view(without(signature, "risk"))),
+        chart_occupation_debt(load_amount_view(without(signature, "career"))),
+        chart_avg_loan_by_branch(load_amount_view(without(signature, "branch"))),
+        chart_top_npl_branches(load_amount_view(without(signature, "branch"))),
+    )
+
+@callback(
+    [Output(filter_control_id("risk"), "value", allow_duplicate=True),
+     Output(filter_control_id("career"), "value", allow_duplicate=True),
+     Output(filter_control_id("branch"), "value", allow_duplicate=True)],
+    [Input("amount-risk-graph", "clickData"),
+     Input("amount-occupation-graph", "clickData"),
+     Input("amount-branch-loan-graph", "clickData"),
+     Input("amount-npl-graph", "clickData")],
+    [State(filter_control_id("risk"), "value"),
+     State(filter_control_id("career"), "value"),
+     State(filter_control_id("branch"), "value")],
+    prevent_initial_call=True
+)
+def cross_filter_amount(risk_click, occupation_click, loan_click, npl_click, risks, careers, branches):
+    if ctx.triggered_id == "amount-risk-graph":
+        return toggle_value(risks, "risk", clicked_value(risk_click, "label")), no_update, no_update
+    if ctx.triggered_id == "amount-occupation-graph":
+        return no_update, toggle_value(careers, "career", clicked_value(occupation_click, "y")), no_update
+    if ctx.triggered_id == "amount-branch-loan-graph":
+        return no_update, no_update, toggle_value(branches, "branch", clicked_value(loan_click, "x"))
+    return no_update, no_update, toggle_value(branches, "branch", clicked_value(npl_click, "y"))
+
 layout = amount_layout()
\ No newline at end of file
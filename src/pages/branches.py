@@ -1,13 +1,16 @@
 from dash import dcc, html
 import dash_bootstrap_components as dbc
-import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from functools import lru_cache
 
-from ..data_manager import load_data
+from ..data_manager import get_dataset, register_dataset_cache
+from ..figure_cache import memoize, tag_frame
+from ..analytics import branch_summary
+from ..filter_index import filter_frame
 from ..components.kpi_cards import render_branch_kpis
 from ..components.chart_card import chart_card
+from ..components.figures import bar_figure, new_figure
 from ..components.theme import THEME
 
 CHART_HEIGHT = 340
@@ -23,6 +26,10 @@ BRANCH_COLORS = {
     "สาขา 5": THEME["danger"],
 }
 
+
+def branch_colors(names):
+    return [BRANCH_COLORS.get(name, THEME["muted"]) for name in names]
+
 # ==================================================
 # 1. Data Processing (ยังคง Logic เดิม)
 # ==================================================
@@ -45,109 +52,121 @@ def process_branch(df: pd.DataFrame) -> pd.DataFrame:
     else:
         df["Income_Clean"] = 0
 
-    branch_map = {1: "สาขา 1", 2: "สาขา 2", 3: "สาขา 3", 4: "สาขา 4", 5: "สาขา 5"}
     if "branch_no" in df.columns:
-        df["branch_name"] = df["branch_no"].map(branch_map).fillna(
-            df["branch_no"].astype(str).apply(lambda x: f"สาขา {x}")
-        )
+        df["branch_name"] = branch_names(df["branch_no"])
     else:
         df["branch_name"] = "ไม่ระบุ"
 
     return df
 
+def branch_names(branch_no: pd.Series) -> pd.Series:
+    branch_map = {1: "สาขา 1", 2: "สาขา 2", 3: "สาขา 3", 4: "สาขา 4", 5: "สาขา 5"}
+    return branch_no.map(branch_map).fillna(branch_no.astype(str).apply(lambda x: f"สาขา {x}"))
+
+def branch_totals(df):
+    """ตารางสรุปต่อสาขา (จาก analytics) เรียงตามชื่อสาขา"""
+    summary = branch_summary(df)
+    summary["branch_name"] = branch_names(summary["branch_no"])
+    return summary.sort_values("branch_name")
+
+@register_dataset_cache
 @lru_cache(maxsize=1)
 def load_branch_data():
-    df = load_data()
-    return process_branch(df)
+    df = get_dataset()
+    return tag_frame(process_branch(df))
+
+@register_dataset_cache
+@lru_cache(maxsize=32)
+def load_branch_view(signature=()):
+    """ข้อมูลสาขาหลังกรองตามตัวกรองของ Sidebar (Cache ต่อชุดตัวกรอง)"""
+    return filter_frame(load_branch_data(), signature)
 
 # ==================================================
-# 3. Layout Helper (Standardized Font & Margins)
+# 3. Layout Helper (สี/ฟอนต์/แกนมาจาก Template ของโปรเจกต์ ดู components/figures.py)
 # ==================================================
-def apply_branch_layout(fig, height=CHART_HEIGHT, right_margin=30):
-    fig.update_layout(
+def chart_layout(height=CHART_HEIGHT, right_margin=30, **layout):
+    return dict(
         height=height,
         margin=dict(t=40, b=35, l=45, r=right_margin), # ปรับ Margin ตามที่กำหนด
-        paper_bgcolor=THEME["paper"],
-        plot_bgcolor=THEME["bg_plot"],
-        font=dict(
-            family="Sarabun, sans-serif",
-            color=THEME["text"],
-            size=13  # กำหนดขนาดฟอนต์มาตรฐาน
-        ),
-        hovermode="closest",
-        transition_duration=0,
+        font=dict(size=13),  # กำหนดขนาดฟอนต์มาตรฐาน
+        transition=dict(duration=0),
+        **layout,
     )
-    fig.update_xaxes(showgrid=False)
-    fig.update_yaxes(gridcolor=THEME["grid"])
-    return fig
 
 # ==================================================
 # 4. Charts
 # ==================================================
+@memoize
 def chart_member_column(df):
-    if df.empty: return go.Figure()
-    counts = df.groupby("branch_name").size().reset_index(name="count").sort_values("branch_name")
+    if df.empty or "branch_no" not in df.columns: return go.Figure()
+    counts = branch_totals(df).rename(columns={"members": "count"})
     
-    fig = px.bar(
-        counts, x="branch_name", y="count", text="count",
-        color="branch_name", color_discrete_map=BRANCH_COLORS # ใช้ระบบสีคงที่
+    return bar_figure(
+        counts["branch_name"], counts["count"], text=counts["count"],
+        texttemplate="%{text:,}", textposition="outside",
+        color=branch_colors(counts["branch_name"]), # ใช้ระบบสีคงที่
+        layout=chart_layout(),
     )
-    fig.update_traces(texttemplate="%{text:,}", textposition="outside")
-    return apply_branch_layout(fig)
 
+@memoize
 def chart_income_line(df):
-    if df.empty: return go.Figure()
-    avg_income = df.groupby("branch_name")["Income_Clean"].mean().reset_index().sort_values("branch_name")
+    if df.empty or "branch_no" not in df.columns: return go.Figure()
+    avg_income = branch_totals(df)
     
-    fig = go.Figure(go.Scatter(
-        x=avg_income["branch_name"], y=avg_income["Income_Clean"],
+    return new_figure(dict(
+        type="scatter",
+        x=avg_income["branch_name"], y=avg_income["avg_income"],
         mode="lines+markers+text",
         line=dict(color=THEME["primary"], width=3),
         marker=dict(size=10, line=dict(width=2, color="white")),
         fill="tozeroy", fillcolor="rgba(59,130,246,0.12)",
-        text=[f"฿{v:,.0f}" for v in avg_income["Income_Clean"]],
+        text=[f"฿{v:,.0f}" for v in avg_income["avg_income"]],
         textposition="top center"
-    ))
-    return apply_branch_layout(fig)
+    ), layout=chart_layout())
 
+@memoize
 def chart_approval_mode(df):
     if df.empty: return go.Figure()
-    modes = df.groupby("branch_name")["Days_to_Approve"].apply(
-        lambda x: x.mode().iloc[0] if not x.mode().empty else 0
-    ).reset_index().sort_values("Days_to_Approve")
+    # ฐานนิยมต่อสาขา: นับ (สาขา, วัน) ครั้งเดียว แล้วเลือกวันที่ถี่สุด (เสมอกันเลือกวันน้อยสุด)
+    pairs = df.groupby(["branch_name", "Days_to_Approve"]).size().reset_index(name="n")
+    modes = (
+        pairs.sort_values(["n", "Days_to_Approve"], ascending=[False, True])
+        .drop_duplicates("branch_name")
+        .set_index("branch_name")["Days_to_Approve"]
+        .reindex(df["branch_name"].dropna().unique(), fill_value=0)
+        .sort_values()
+    )
     
-    fig = px.bar(
-        modes, y="branch_name", x="Days_to_Approve", orientation="h",
-        text="Days_to_Approve", color="branch_name", color_discrete_map=BRANCH_COLORS
+    return bar_figure(
+        modes.index, modes.values, orientation="h",
+        text=modes.values, texttemplate="%{text} วัน", textposition="outside",
+        color=branch_colors(modes.index),
+        layout=chart_layout(),
     )
-    fig.update_traces(texttemplate="%{text} วัน", textposition="outside")
-    return apply_branch_layout(fig)
 
+@memoize
 def chart_member_income_dual(df):
-    if df.empty: return go.Figure()
+    if df.empty or "branch_no" not in df.columns: return go.Figure()
     
-    summary = df.groupby("branch_name").agg(
-        member_count=("branch_name", "count"),
-        total_income=("Income_Clean", "sum")
-    ).reset_index().sort_values("branch_name")
-
-    fig = go.Figure()
+    summary = branch_totals(df).rename(columns={"members": "member_count"})
 
     # 1. แท่งกราฟ: ลบออกจาก Legend โดยใช้ showlegend=False
-    fig.add_bar(
+    bars = dict(
+        type="bar",
         x=summary["branch_name"],
         y=summary["member_count"],
         text=summary["member_count"],
         textposition="outside",
         # บังคับสีแท่งให้ตรงตามสาขา
-        marker_color=[BRANCH_COLORS.get(b, THEME["muted"]) for b in summary["branch_name"]],
+        marker=dict(color=branch_colors(summary["branch_name"])),
         name="จำนวนสมาชิก",
         showlegend=False, # <--- ลบข้อความ "จำนวนสมาชิก" ออกจาก Legend
         hovertemplate="<b>%{x}</b><br>สมาชิก: %{y:,} คน<extra></extra>"
     )
 
     # 2. เส้นกราฟ: ปรับสีเส้น (Line Color) และความหนา
-    fig.add_scatter(
+    line = dict(
+        type="scatter",
         x=summary["branch_name"],
         y=summary["total_income"],
         yaxis="y2",
@@ -159,7 +178,9 @@ def chart_member_income_dual(df):
         hovertemplate="<b>%{x}</b><br>รายได้รวม: ฿%{y:,.0f}<extra></extra>"
     )
 
-    fig.update_layout(
+    # ใช้ right_margin=70 เพื่อป้องกันตัวเลขหลักล้านเบียดขอบ
+    return new_figure(bars, line, layout=chart_layout(
+        right_margin=70,
         showlegend=True,
         legend=dict(
             orientation="h",
@@ -169,23 +190,21 @@ def chart_member_income_dual(df):
             x=0.5,
             font=dict(size=12)
         ),
-        yaxis=dict(title="จำนวนสมาชิก (คน)"),
+        yaxis=dict(title=dict(text="จำนวนสมาชิก (คน)")),
         yaxis2=dict(
-            title="รายได้รวม (บาท)",
+            title=dict(text="รายได้รวม (บาท)"),
             overlaying="y",
             side="right",
             showgrid=False,
             tickformat=",.0f"
         )
-    )
-    # ใช้ right_margin=70 เพื่อป้องกันตัวเลขหลักล้านเบียดขอบ
-    return apply_branch_layout(fig, right_margin=70)
+    ))
 
 # ==================================================
 # 5. Main Layout
 # ==================================================
-def branch_layout():
-    df = load_branch_data()
+def branch_layout(signature=()):
+    df = load_branch_view(signature)
     if df.empty:
         return dbc.Container(dbc.Alert("ไม่พบข้อมูล", color="warning", className="mt-5"))
 
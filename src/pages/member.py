@@ -1,12 +1,18 @@
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, callback, ctx, no_update
+from dash.development.base_component import Component
 import dash_bootstrap_components as dbc
-import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from functools import lru_cache
 
-from ..data_manager import load_data
-from ..components.kpi_cards import render_member_kpis
+from ..data_manager import get_dataset, register_dataset_cache
+from ..metrics import figure_timer
+from ..analytics import monthly_trend, province_gen_counts
+from ..timeseries import HOVER_FORMATS, RESOLUTION_LABELS, query, year_window, zoom_window
+from ..filter_index import clicked_value, filter_frame, filter_signature, toggle_value, without
+from ..components.cross_filter import filter_control_id
+from ..components.figures import bar_figure, new_figure, pie_figure, stacked_bar_figure
+from ..components.kpi_cards import member_kpi_gen, popular_gen_from_counts, render_member_kpi_row
 
 CHART_HEIGHT = 340
 
@@ -57,117 +63,200 @@ def process_member(df):
     return df
 
 
+@register_dataset_cache
 @lru_cache(maxsize=1)
 def load_member_data():
-    df = load_data()
+    df = get_dataset()
     return process_member(df)
 
 
-def apply_member_layout(fig, height=CHART_HEIGHT):
-    fig.update_layout(
+# ==================================================
+# Year Cube: สรุปผลต่อปีที่สมัคร + ภาพรวมทุกปี (คำนวณครั้งเดียวต่อชุดข้อมูล)
+# ==================================================
+ALL_YEARS = "all"
+UNKNOWN_YEAR = 0  # แถวที่ไม่มีวันสมัคร นับเฉพาะในภาพรวมทุกปี
+INCOME_LABELS = ["< 15K", "15K - 30K", "30K - 50K", "50K - 100K", "100K+"]
+
+
+def _pick_year(table, year):
+    """ตัดตารางสรุปเฉพาะปีที่เลือก (year=None = รวมทุกปี)"""
+    if table is None:
+        return None
+    if year is None:
+        levels = list(range(1, table.index.nlevels))
+        return table.groupby(level=levels, observed=True).sum()
+    return table[table.index.get_level_values("year") == year].droplevel("year")
+
+
+def _build_slice(tables, year=None):
+    gender = _pick_year(tables["gender"], year)
+    careers = _pick_year(tables["career"], year)
+    monthly = tables["month"] if year is None else _pick_year(tables["month"], year)
+    if monthly is not None:
+        # สมาชิกใหม่ตามเดือนของปี (แนวโน้มตามเวลาดึงจาก timeseries.query แยกต่างหาก)
+        if year is None:
+            monthly = monthly.groupby(level="month").sum()
+        monthly = monthly.reindex(range(1, 13), fill_value=0)
+
+    if careers is not None:
+        top = careers.groupby(level=0).sum().sort_values(ascending=False, kind="stable").head(5).index
+        careers = careers.unstack(fill_value=0).reindex(top)
+
+    gen_prov = _pick_year(tables["gen_prov"], year)
+    income = _pick_year(tables["income"], year)
+
+    return {
+        "total": int(tables["total"].sum() if year is None else tables["total"].get(year, 0)),
+        "male": int(gender.get("นาย", 0)) if gender is not None else 0,
+        "female": int(gender.reindex(["นาง", "นางสาว"]).fillna(0).sum()) if gender is not None else 0,
+        "popular_gen": popular_gen_from_counts(_pick_year(tables["kpi_gen"], year)) if tables["kpi_gen"] is not None else "N/A",
+        "monthly": monthly,
+        "careers": careers,
+        "income": income.reindex(INCOME_LABELS, fill_value=0) if income is not None else None,
+        "gen_prov": gen_prov.reset_index(name="count") if gen_prov is not None else None,
+    }
+
+
+def _month_table(df):
+    trend = monthly_trend(df)
+    month = trend["month"]
+    return trend.set_index([month.dt.year.rename("year"), month.dt.month.rename("month")])["members"]
+
+
+def _gen_prov_table(df):
+    return province_gen_counts(df).set_index(["year", "province_name", "Gen"])["count"]
+
+
+def build_member_cube(df):
+    """Group ข้อมูลสมาชิกครั้งเดียวตามปีที่สมัคร แล้วแตกเป็นตารางเล็กๆ ต่อปี"""
+    if df.empty:
+        return {"years": [], "slices": {ALL_YEARS: None}}
+
+    if "reg_date" in df.columns:
+        year = df["reg_date"].dt.year.fillna(UNKNOWN_YEAR).astype(int).rename("year")
+    else:
+        year = pd.Series(UNKNOWN_YEAR, index=df.index, name="year")
+
+    def count_by(*cols):
+        if any(c is None or c not in df.columns for c in cols):
+            return None
+        return df.groupby([year, *[df[c] for c in cols]], observed=True).size()
+
+    career_col = "career_name" if "career_name" in df.columns else "career"
+    kpi_gen = member_kpi_gen(df["birthday"]).rename("kpi_gen") if "birthday" in df.columns else None
+
+    tables = {
+        "total": year.value_counts(),
+        "gender": count_by("gender_name"),
+        "kpi_gen": df.groupby([year, kpi_gen]).size() if kpi_gen is not None else None,
+        "month": _month_table(df) if "reg_date" in df.columns else None,
+        "career": count_by(career_col, "Gender"),
+        "income": count_by("Income_Level"),
+        "gen_prov": _gen_prov_table(df) if {"province_name", "Gen"}.issubset(df.columns) else None,
+    }
+
+    years = sorted((y for y in year.unique().tolist() if y != UNKNOWN_YEAR), reverse=True)
+    slices = {ALL_YEARS: _build_slice(tables)}
+    slices.update({y: _build_slice(tables, y) for y in years})
+    return {"years": years, "slices": slices}
+
+
+@register_dataset_cache
+@lru_cache(maxsize=8)
+def load_member_cube(signature=()):
+    """Cube ของข้อมูลที่กรองตาม Cross-filter แล้ว (Cache ต่อชุดตัวกรอง)"""
+    return build_member_cube(filter_frame(load_member_data(), signature))
+
+
+def chart_layout(height=CHART_HEIGHT, **layout):
+    """สี/ฟอนต์/แกนมาจาก Template ของโปรเจกต์ (components/figures.py)"""
+    return dict(
         height=height,
         margin=dict(t=20, b=40, l=40, r=30),
-        plot_bgcolor="rgba(248,250,252,0.3)",
-        paper_bgcolor="rgba(255,255,255,0)",
-        font=dict(family="Sarabun, sans-serif", color="#334155"),
-        transition_duration=0,
+        transition=dict(duration=0),
+        **layout,
     )
-    return fig
 
 
 # ==================================================
-# Charts (ใช้ข้อมูลที่กรองมาแล้วจาก Callback)
+# Charts (สร้างจากตารางสรุปของ Year Cube)
 # ==================================================
-def chart_growth_time(df):
-    if "reg_date" not in df.columns or df.empty:
-        return go.Figure()
-
-    trend = (
-        df.dropna(subset=["reg_date"])
-        .groupby(df["reg_date"].dt.to_period("M"))
-        .size()
-        .reset_index(name="count")
-    )
-
-    if trend.empty:
+@figure_timer
+def chart_growth_time(trend, resolution="M", window=None):
+    if trend is None or trend.empty:
         return go.Figure()
 
-    trend["reg_date"] = trend["reg_date"].dt.to_timestamp()
-
-    fig = go.Figure(
-        go.Scatter(
-            x=trend["reg_date"],
-            y=trend["count"],
-            mode="lines+markers",
-            line=dict(color="#3b82f6", width=3, shape='spline'),
+    dense = len(trend) > 120  # จุดถี่ (ซูมรายวัน) ไม่ต้องแสดง Marker
+    xaxis = dict(showgrid=False, tickformat=HOVER_FORMATS[resolution])
+    if window:
+        xaxis["range"] = list(window)  # คงช่วงที่ผู้ใช้ซูมไว้ หลังเปลี่ยนความละเอียด
+
+    return new_figure(
+        dict(
+            type="scatter",
+            x=trend.index,
+            y=trend.values,
+            mode="lines" if dense else "lines+markers",
+            line=dict(color="#3b82f6", width=2 if dense else 3, shape='spline'),
             marker=dict(size=6, color="#1e40af"),
             fill="tozeroy",
             fillcolor="rgba(59, 130, 246, 0.1)",
-            hovertemplate="<b>%{x|%b %Y}</b><br>สมาชิกใหม่: %{y:,} คน<extra></extra>",
-        )
+            hovertemplate=f"<b>%{{x|{HOVER_FORMATS[resolution]}}}</b><br>สมาชิกใหม่: %{{y:,}} คน<extra></extra>",
+        ),
+        layout=chart_layout(
+            height=380,
+            hovermode="x unified",
+            showlegend=False,
+            xaxis=xaxis,
+            yaxis=dict(showgrid=True, gridcolor="#f0f0f0"),
+        ),
     )
 
-    fig.update_layout(
-        hovermode="x unified",
-        showlegend=False,
-        xaxis=dict(showgrid=False, tickformat="%b %Y"),
-        yaxis=dict(showgrid=True, gridcolor="#f0f0f0"),
+@figure_timer
+def chart_gender_career(careers):
+    if careers is None or careers.empty: return go.Figure()
+
+    return new_figure(
+        *(dict(type="bar", y=careers.index, x=careers[gender], name=gender, orientation="h") for gender in careers.columns),
+        layout=chart_layout(barmode="group", legend=dict(orientation="h", y=-0.25)),
     )
 
-    return apply_member_layout(fig, height=380)
+@figure_timer
+def chart_income_pie(income):
+    if income is None or income.sum() == 0: return go.Figure()
+    return pie_figure(income.index, income.values, layout=chart_layout(legend=dict(orientation="h", y=-0.15)))
 
-def chart_gender_career(df):
-    if "Gender" not in df.columns or df.empty: return go.Figure()
-    career_col = "career_name" if "career_name" in df.columns else "career"
-    if career_col not in df.columns: return go.Figure()
-
-    top = df[career_col].value_counts().head(5).index
-    data = df[df[career_col].isin(top)]
-
-    fig = px.histogram(data, y=career_col, color="Gender", orientation="h", barmode="group")
-    fig.update_layout(legend=dict(orientation="h", y=-0.25))
-    return apply_member_layout(fig)
-
-def chart_income_pie(df):
-    if "Income_Level" not in df.columns or df.empty: return go.Figure()
-    counts = df["Income_Level"].value_counts().sort_index()
-    fig = go.Figure(go.Pie(labels=counts.index, values=counts.values, hole=0.45))
-    fig.update_layout(legend=dict(orientation="h", y=-0.15))
-    return apply_member_layout(fig)
-
-def chart_gen_area(df):
-    if "Gen" not in df.columns or df.empty: return go.Figure()
-    prov_col = "province_name" if "province_name" in df.columns else "province"
-    if prov_col not in df.columns: return go.Figure()
-
-    data = df.groupby([prov_col, "Gen"]).size().reset_index(name="count")
-    fig = px.bar(data, x=prov_col, y="count", color="Gen", barmode="stack")
-    fig.update_layout(legend=dict(orientation="h", y=-0.45))
-    return apply_member_layout(fig)
-
-def chart_monthly_members(df, selected_year):
-    if "reg_date" not in df.columns or df.empty: return go.Figure()
-    
-    monthly = (
-        df.groupby(df["reg_date"].dt.month)
-        .size()
-        .reindex(range(1, 13), fill_value=0)
-        .reset_index(name="total")
-    )
+@figure_timer
+def chart_gen_area(gen_prov):
+    if gen_prov is None or gen_prov.empty: return go.Figure()
+    prov_col = gen_prov.columns[0]
+
+    table = gen_prov.pivot_table(index=prov_col, columns="Gen", values="count", aggfunc="sum", fill_value=0, sort=False)
+    return stacked_bar_figure(table, layout=chart_layout(legend=dict(orientation="h", y=-0.45)))
+
+@figure_timer
+def chart_monthly_members(monthly):
+    if monthly is None or monthly.sum() == 0: return go.Figure()
 
     months = ["ม.ค.","ก.พ.","มี.ค.","เม.ย.","พ.ค.","มิ.ย.","ก.ค.","ส.ค.","ก.ย.","ต.ค.","พ.ย.","ธ.ค."]
-    fig = go.Figure(go.Bar(x=months, y=monthly["total"], text=monthly["total"], textposition="outside", marker_color="#3b82f6"))
-    return apply_member_layout(fig)
+    return bar_figure(months, monthly.values, text=monthly.values, textposition="outside", color="#3b82f6", layout=chart_layout())
 
 def chart_card(fig, title):
     return dbc.Card(
         dbc.CardBody([
             html.H6(title, className="fw-bold mb-2"),
-            dcc.Graph(figure=fig, config={"displayModeBar": False}),
+            fig if isinstance(fig, Component) else dcc.Graph(figure=fig, config={"displayModeBar": False}),
         ], style={"padding": "12px"}),
         className="shadow-sm rounded-3 border-0 mb-3",
     )
 
+def graph_card(graph_id, title):
+    """การ์ดกราฟที่มี Loading ของตัวเอง ให้ Callback แต่ละตัวเติม figure ได้อิสระ"""
+    return chart_card(
+        dcc.Loading(dcc.Graph(id=graph_id, config={"displayModeBar": False}), type="circle"),
+        html.Span(title, id=f"{graph_id}-title"),
+    )
+
 # ==================================================
 # Layout & Callback
 # ==================================================
@@ -175,10 +264,8 @@ def chart_card(fig, title):
 # Layout & Callback
 # ==================================================
 def member_layout():
-    df = load_member_data()
-    
     # 1. เตรียมรายการปี และเพิ่มตัวเลือก "ทั้งหมด" ไว้บนสุด
-    years = sorted(df["reg_date"].dt.year.unique().tolist(), reverse=True) if "reg_date" in df.columns else []
+    years = load_member_cube()["years"]
     year_options = [{"label": "ทั้งหมดทุกปี", "value": "all"}] + [{"label": f"ปี {y}", "value": y} for y in years]
 
     return dbc.Container(
@@ -199,44 +286,117 @@ def member_layout():
                 ], width=4, className="d-flex align-items-center justify-content-end")
             ], className="mb-4 align-items-center"),
 
-            dcc.Loading(
-                id="loading-member-charts",
-                children=html.Div(id="member-charts-container")
-            )
+            # KPI และกราฟแต่ละตัวมี Callback แยกกัน ส่วนที่เสร็จก่อนจะแสดงก่อน
+            dcc.Loading(id="loading-member-kpis", children=html.Div(id="member-kpis")),
+
+            dbc.Row([
+                dbc.Col(graph_card("member-growth-graph", "แนวโน้มการสมัครสมาชิกรายเดือน"), lg=12),
+            ]),
+
+            dbc.Row([
+                dbc.Col(graph_card("member-monthly-graph", "จำนวนสมาชิกใหม่รายเดือน"), lg=6),
+                dbc.Col(graph_card("member-career-graph", "สัดส่วนเพศแยกตามกลุ่มอาชีพ"), lg=6),
+            ]),
+
+            dbc.Row([
+                dbc.Col(graph_card("member-income-graph", "สัดส่วนสมาชิกแยกตามระดับรายได้"), lg=6),
+                dbc.Col(graph_card("member-gen-graph", "การกระจาย Generation ตามจังหวัด"), lg=6),
+            ]),
         ],
     )
 
+def get_year_slice(selected_year, signature=()):
+    """ดึงตารางสรุปของปีที่เลือกจาก Cube (ไม่ต้องกรองข้อมูลดิบใหม่ทุกครั้ง)"""
+    slices = load_member_cube(signature)["slices"]
+    if selected_year != ALL_YEARS and selected_year in slices:
+        return slices[selected_year], f"ปี {selected_year}"
+    return slices[ALL_YEARS], "ทั้งหมดทุกปี"
+
 @callback(
-    Output("member-charts-container", "children"),
-    Input("member-year-dropdown", "value")
+    Output("member-kpis", "children"),
+    [Input("member-year-dropdown", "value"),
+     Input("cross-filter", "data")]
 )
-def update_member_dashboard(selected_year):
-    df_all = load_member_data()
-    
-    # 2. เงื่อนไขการกรอง: ถ้าไม่ใช่ "all" ให้กรองตามปี ถ้าใช่ "all" ให้ใช้ข้อมูลทั้งหมด
-    if selected_year != "all" and "reg_date" in df_all.columns:
-        df = df_all[df_all["reg_date"].dt.year == selected_year]
-        title_suffix = f"ปี {selected_year}"
-    else:
-        df = df_all
-        title_suffix = "ทั้งหมดทุกปี"
+def update_member_kpis(selected_year, filters):
+    data, _ = get_year_slice(selected_year, filter_signature(filters))
+    if data is None:
+        return dbc.Alert("ไม่พบข้อมูล member", color="warning", className="text-center")
+    return render_member_kpi_row(data["total"], data["male"], data["female"], data["popular_gen"])
 
-    return [
-        render_member_kpis(df),
+@callback(
+    [Output("member-growth-graph", "figure"),
+     Output("member-growth-graph-title", "children")],
+    [Input("member-year-dropdown", "value"),
+     Input("cross-filter", "data"),
+     Input("member-growth-graph", "relayoutData")]
+)
+def update_member_growth(selected_year, filters, relayout_data):
+    # ซูม = ดึงข้อมูลช่วงนั้นใหม่ที่ความละเอียดสูงขึ้น (ถึงรายวัน), รีเซ็ต/เปลี่ยนปี = กลับไปมุมมองรายเดือน
+    window = None
+    if ctx.triggered_id == "member-growth-graph":
+        window = zoom_window(relayout_data)
+        if window is None:
+            return no_update, no_update
+        window = None if window == (None, None) else window
+
+    year = None if selected_year == ALL_YEARS else selected_year
+    title_suffix = "ทั้งหมดทุกปี" if year is None else f"ปี {year}"
+    start, end = window or year_window(year)
+    trend, resolution = query(filter_signature(filters), "members", start, end, finest="D" if window else "M")
+
+    fig = chart_growth_time(trend, resolution, window)
+    return fig, f"แนวโน้มการสมัครสมาชิก{RESOLUTION_LABELS[resolution]} ({title_suffix})"
 
-        dbc.Row([
-            dbc.Col(chart_card(chart_growth_time(df), f"แนวโน้มการสมัครสมาชิกรายเดือน ({title_suffix})"), lg=12),
-        ]),
+@callback(
+    [Output("member-monthly-graph", "figure"),
+     Output("member-monthly-graph-title", "children")],
+    [Input("member-year-dropdown", "value"),
+     Input("cross-filter", "data")]
+)
+def update_member_monthly(selected_year, filters):
+    data, title_suffix = get_year_slice(selected_year, filter_signature(filters))
+    fig = chart_monthly_members(data["monthly"]) if data else go.Figure()
+    return fig, f"จำนวนสมาชิกใหม่รายเดือน ({title_suffix})"
 
-        dbc.Row([
-            dbc.Col(chart_card(chart_monthly_members(df, selected_year), f"จำนวนสมาชิกใหม่รายเดือน ({title_suffix})"), lg=6),
-            dbc.Col(chart_card(chart_gender_career(df), "สัดส่วนเพศแยกตามกลุ่มอาชีพ"), lg=6),
-        ]),
+@callback(
+    Output("member-career-graph", "figure"),
+    [Input("member-year-dropdown", "value"),
+     Input("cross-filter", "data")]
+)
+def update_member_career(selected_year, filters):
+    data, _ = get_year_slice(selected_year, without(filter_signature(filters), "career"))
+    return chart_gender_career(data["careers"]) if data else go.Figure()
+
+@callback(
+    Output("member-income-graph", "figure"),
+    [Input("member-year-dropdown", "value"),
+     Input("cross-filter", "data")]
+)
+def update_member_income(selected_year, filters):
+    data, _ = get_year_slice(selected_year, filter_signature(filters))
+    return chart_income_pie(data["income"]) if data else go.Figure()
 
-        dbc.Row([
-            dbc.Col(chart_card(chart_income_pie(df), "สัดส่วนสมาชิกแยกตามระดับรายได้"), lg=6),
-            dbc.Col(chart_card(chart_gen_area(df), "การกระจาย Generation ตามจังหวัด"), lg=6),
-        ]),
-    ]
+@callback(
+    Output("member-gen-graph", "figure"),
+    [Input("member-year-dropdown", "value"),
+     Input("cross-filter", "data")]
+)
+def update_member_gen(selected_year, filters):
+    data, _ = get_year_slice(selected_year, without(filter_signature(filters), "province"))
+    return chart_gen_area(data["gen_prov"]) if data else go.Figure()
+
+@callback(
+    [Output(filter_control_id("career"), "value", allow_duplicate=True),
+     Output(filter_control_id("province"), "value", allow_duplicate=True)],
+    [Input("member-career-graph", "clickData"),
+     Input("member-gen-graph", "clickData")],
+    [State(filter_control_id("career"), "value"),
+     State(filter_control_id("province"), "value")],
+    prevent_initial_call=True
+)
+def cross_filter_member(career_click, gen_click, careers, provinces):
+    if ctx.triggered_id == "member-career-graph":
+        return toggle_value(careers, "career", clicked_value(career_click, "y")), no_update
+    return no_update, toggle_value(provinces, "province", clicked_value(gen_click, "x"))
 
-layout = member_layout()
\ No newline at end of file
+layout = member_layout()
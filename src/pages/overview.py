@@ -1,13 +1,17 @@
-from dash import dcc, html
+from dash import dcc, html, Input, Output, State, callback, ctx, no_update
 import dash_bootstrap_components as dbc
-import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from functools import lru_cache
 
-from ..data_manager import load_data
+from ..data_manager import get_dataset, register_dataset_cache
+from ..figure_cache import memoize, tag_frame
+from ..analytics import branch_summary
+from ..filter_index import clicked_value, filter_frame, filter_signature, toggle_value, without
 from ..components.kpi_cards import render_overview_kpis
-from ..components.chart_card import chart_card
+from ..components.chart_card import chart_card, chart_graph
+from ..components.figures import bar_figure, funnel_figure, pie_figure
+from ..components.cross_filter import filter_control_id
 from ..components.theme import THEME
 
 # ==================================================
@@ -44,98 +48,85 @@ def preprocess_overview(df: pd.DataFrame) -> pd.DataFrame:
 # ==================================================
 # Cache Data (ลดกระตุก)
 # ==================================================
+@register_dataset_cache
 @lru_cache(maxsize=1)
 def load_overview_data():
-    df = load_data()
-    return preprocess_overview(df)
+    df = get_dataset()
+    return tag_frame(preprocess_overview(df))
+
+
+@register_dataset_cache
+@lru_cache(maxsize=32)
+def load_overview_view(signature=()):
+    """ข้อมูลภาพรวมหลังกรองตาม Cross-filter (Cache ต่อชุดตัวกรอง)"""
+    return filter_frame(load_overview_data(), signature)
 
 
 # ==================================================
-# Layout Helper
+# Layout Helper (สี/ฟอนต์/แกนมาจาก Template ของโปรเจกต์ ดู components/figures.py)
 # ==================================================
-def apply_overview_layout(fig, height=CHART_HEIGHT):
-    fig.update_layout(
+def chart_layout(height=CHART_HEIGHT, **layout):
+    return dict(
         height=height,
         margin=dict(t=30, b=20, l=30, r=30),
-        paper_bgcolor=THEME["paper"],
-        plot_bgcolor=THEME["bg_plot"],
-        font=dict(
-            family="Sarabun, sans-serif",
-            color=THEME["text"],
-        ),
-        transition_duration=0,  # 🔥 ปิด animation
+        transition=dict(duration=0),  # 🔥 ปิด animation
+        **layout,
     )
-    return fig
 
 
 # ==================================================
 # Charts
 # ==================================================
+@memoize
 def chart_gender_pie(df):
     if "Gender_Group" not in df.columns:
         return go.Figure()
 
     counts = df["Gender_Group"].value_counts()
 
-    fig = go.Figure(
-        go.Pie(
-            labels=counts.index,
-            values=counts.values,
-            hole=0.45,
-            marker=dict(
-                colors=[
-                    THEME["primary"],
-                    THEME["pink"],
-                    THEME["muted"],
-                ],
-                line=dict(color="white", width=2),
-            ),
-            textinfo="percent+label",
-        )
-    )
-
-    fig.update_traces(
-        hovertemplate="<b>%{label}</b><br>จำนวน: %{value:,} คน<br>สัดส่วน: %{percent}<extra></extra>"
-    )
-
-    fig.update_layout(
-        legend=dict(
-            orientation="h",
-            x=0.5,
-            xanchor="center",
-            y=-0.15,
-        )
+    return pie_figure(
+        counts.index,
+        counts.values,
+        colors=[
+            THEME["primary"],
+            THEME["pink"],
+            THEME["muted"],
+        ],
+        marker=dict(line=dict(color="white", width=2)),
+        textinfo="percent+label",
+        hovertemplate="<b>%{label}</b><br>จำนวน: %{value:,} คน<br>สัดส่วน: %{percent}<extra></extra>",
+        layout=chart_layout(
+            legend=dict(
+                orientation="h",
+                x=0.5,
+                xanchor="center",
+                y=-0.15,
+            )
+        ),
     )
 
-    return apply_overview_layout(fig)
-
 
+@memoize
 def chart_branch_bar(df):
-    branch_col = "branch_no" if "branch_no" in df.columns else "branch_code"
-    if branch_col not in df.columns:
+    if "branch_no" not in df.columns:
         return go.Figure()
 
-    counts = df[branch_col].value_counts().sort_index()
+    counts = branch_summary(df).set_index("branch_no")["members"]
 
-    fig = go.Figure(
-        go.Bar(
-            x=[f"สาขา {b}" for b in counts.index],
-            y=counts.values,
-            text=[f"{v:,}" for v in counts.values],
-            textposition="outside",
-            marker=dict(
-                color=THEME["primary"],
-                line=dict(color="white", width=2),
-            ),
-        )
+    return bar_figure(
+        [f"สาขา {b}" for b in counts.index],
+        counts.values,
+        text=[f"{v:,}" for v in counts.values],
+        textposition="outside",
+        marker=dict(
+            color=THEME["primary"],
+            line=dict(color="white", width=2),
+        ),
+        layout=chart_layout(yaxis=dict(title=dict(text="จำนวนสมาชิก"))),
     )
 
-    fig.update_yaxes(title="จำนวนสมาชิก", gridcolor=THEME["grid"])
-    fig.update_xaxes(showgrid=False)
-
-    return apply_overview_layout(fig)
-
 
+@memoize
 def chart_province_bar(df):
     prov_col = "province_name" if "province_name" in df.columns else "province"
     if prov_col not in df.columns:
@@ -143,51 +134,36 @@ def chart_province_bar(df):
 
     counts = df[prov_col].value_counts().head(8).sort_values()
 
-    fig = go.Figure(
-        go.Bar(
-            y=counts.index,
-            x=counts.values,
-            orientation="h",
-            text=[f"{v:,} คน" for v in counts.values],
-            textposition="inside",
-        )
+    return bar_figure(
+        counts.index,
+        counts.values,
+        orientation="h",
+        text=[f"{v:,} คน" for v in counts.values],
+        textposition="inside",
+        layout=chart_layout(showlegend=False),
     )
 
-    fig.update_layout(showlegend=False)
-
-    return apply_overview_layout(fig)
-
 
+@memoize
 def chart_income_funnel(df):
-    branch_col = "branch_no" if "branch_no" in df.columns else "branch_code"
-    if branch_col not in df.columns:
+    if "branch_no" not in df.columns:
         return go.Figure()
 
     summary = (
-        df.groupby(branch_col)["Income_Clean"]
-        .sum()
-        .sort_values(ascending=False)
+        branch_summary(df)
+        .rename(columns={"total_income": "Income_Clean"})
+        .sort_values("Income_Clean", ascending=False)
         .head(8)
-        .reset_index()
-    )
-
-    summary["Branch_Label"] = summary[branch_col].apply(lambda x: f"สาขา {x}")
-
-    fig = px.funnel(
-        summary,
-        y="Branch_Label",
-        x="Income_Clean",
     )
 
-    fig.update_traces(
+    return funnel_figure(
+        "สาขา " + summary["branch_no"].astype(str),
+        summary["Income_Clean"],
         texttemplate="฿%{value:,.0f}",
         textposition="inside",
+        layout=chart_layout(showlegend=False),
     )
 
-    fig.update_layout(showlegend=False)
-
-    return apply_overview_layout(fig)
-
 
 # ==================================================
 # Layout
@@ -210,7 +186,7 @@ def overview_layout():
         children=[
             html.H3("ข้อมูลภาพรวม", className="fw-bold mb-3"),
 
-            render_overview_kpis(df),
+            html.Div(id="overview-kpis"),
 
             dcc.Loading(
                 type="circle",
@@ -219,11 +195,11 @@ def overview_layout():
                     dbc.Row(
                         [
                             dbc.Col(
-                                chart_card(chart_gender_pie(df), "สัดส่วนสมาชิกแยกตามเพศ"),
+                                chart_card(chart_graph("overview-gender-graph"), "สัดส่วนสมาชิกแยกตามเพศ"),
                                 lg=6,
                             ),
                             dbc.Col(
-                                chart_card(chart_branch_bar(df), "จำนวนสมาชิกแยกรายสาขา"),
+                                chart_card(chart_graph("overview-branch-graph"), "จำนวนสมาชิกแยกรายสาขา"),
                                 lg=6,
                             ),
                         ],
@@ -239,11 +215,11 @@ def overview_layout():
                     dbc.Row(
                         [
                             dbc.Col(
-                                chart_card(chart_province_bar(df), "Top 8 จังหวัดที่มีสมาชิกสูงสุด"),
+                                chart_card(chart_graph("overview-province-graph"), "Top 8 จังหวัดที่มีสมาชิกสูงสุด"),
                                 lg=6,
                             ),
                             dbc.Col(
-                                chart_card(chart_income_funnel(df), "รายได้สมาชิกแยกตามสาขา"),
+                                chart_card(chart_graph("overview-funnel-graph"), "รายได้สมาชิกแยกตามสาขา"),
                                 lg=6,
                             ),
                         ],
@@ -255,4 +231,57 @@ def overview_layout():
     )
 
 
+# ==================================================
+# Callbacks: Cross-filter (คลิกกราฟ = กรองทุกกราฟในหน้า และหน้าอื่นที่รองรับ)
+# ==================================================
+@callback(
+    Output("overview-kpis", "children"),
+    Input("cross-filter", "data")
+)
+def update_overview_kpis(filters):
+    return render_overview_kpis(load_overview_view(filter_signature(filters)))
+
+
+@callback(
+    [Output("overview-gender-graph", "figure"),
+     Output("overview-branch-graph", "figure"),
+     Output("overview-province-graph", "figure"),
+     Output("overview-funnel-graph", "figure")],
+    Input("cross-filter", "data")
+)
+def update_overview_charts(filters):
+    # กราฟแต่ละตัวไม่กรองด้วย dimension ของตัวเอง จึงยังเห็นแท่งอื่นให้คลิกเปลี่ยนได้
+    signature = filter_signature(filters)
+    return (
+        chart_gender_pie(load_overview_view(without(signature, "gender"))),
+        chart_branch_bar(load_overview_view(without(signature, "branch"))),
+        chart_province_bar(load_overview_view(without(signature, "province"))),
+        chart_income_funnel(load_overview_view(without(signature, "branch"))),
+    )
+
+
+@callback(
+    [Output(filter_control_id("gender"), "value", allow_duplicate=True),
+     Output(filter_control_id("branch"), "value", allow_duplicate=True),
+     Output(filter_control_id("province"), "value", allow_duplicate=True)],
+    [Input("overview-gender-graph", "clickData"),
+     Input("overview-branch-graph", "clickData"),
+     Input("overview-province-graph", "clickData"),
+     Input("overview-funnel-graph", "clickData")],
+    [State(filter_control_id("gender"), "value"),
+     State(filter_control_id("branch"), "value"),
+     State(filter_control_id("province"), "value")],
+    prevent_initial_call=True
+)
+def cross_filter_overview(gender_click, branch_click, province_click, funnel_click, genders, branches, provinces):
+    # คลิกกราฟ = เลือกค่าในตัวกรองของ Sidebar (ตัวกรองจึงแสดงตรงกับที่กรองอยู่เสมอ)
+    if ctx.triggered_id == "overview-gender-graph":
+        return toggle_value(genders, "gender", clicked_value(gender_click, "label")), no_update, no_update
+    if ctx.triggered_id == "overview-province-graph":
+        return no_update, no_update, toggle_value(provinces, "province", clicked_value(province_click, "y"))
+    if ctx.triggered_id == "overview-branch-graph":
+        return no_update, toggle_value(branches, "branch", clicked_value(branch_click, "x")), no_update
+    return no_update, toggle_value(branches, "branch", clicked_value(funnel_click, "y")), no_update
+
+
 layout = overview_layout()
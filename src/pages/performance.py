@@ -1,13 +1,20 @@
 import dash
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, callback, ctx, no_update
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 from functools import lru_cache
 
-from ..data_manager import load_data
+from ..data_manager import get_dataset, register_dataset_cache
+from ..figure_cache import tag_frame
+from ..metrics import figure_timer
+from ..filter_index import filter_signature
+from ..timeseries import RESOLUTION_LABELS, query, rollup, year_window, zoom_window
+from ..forecasting import FORECAST_HORIZON
+from ..forecast_jobs import PENDING, load_forecast
 from ..components.chart_card import chart_card
+from ..components.figures import new_figure
 from ..components.theme import THEME
 from ..components.kpi_cards import render_performance_kpis
 
@@ -15,8 +22,7 @@ from ..components.kpi_cards import render_performance_kpis
 # Config
 # ==================================================
 CHART_HEIGHT = 450
-FORECAST_HORIZON = 12   
-CONF_INTERVAL = 0.10    
+FORECAST_POLL_MS = 3000  # ถามผลโมเดลเบื้องหลังทุก 3 วินาที (เฉพาะตอนที่ job ยังไม่เสร็จ)
 
 # ==================================================
 # 1. Data Preprocessing & Cache
@@ -32,50 +38,37 @@ def preprocess_performance(df: pd.DataFrame) -> pd.DataFrame:
         df["reg_date"] = pd.to_datetime(df["registration_date"], errors="coerce")
     return df
 
+@register_dataset_cache
 @lru_cache(maxsize=1)
 def load_performance_data():
-    return preprocess_performance(load_data())
+    return tag_frame(preprocess_performance(get_dataset()))
 
 # ==================================================
 # 2. Chart Logic
 # ==================================================
-def chart_business_forecast(df, selected_year):
-    if df.empty or "reg_date" not in df.columns: return go.Figure()
-
-    dff = df.dropna(subset=["reg_date"]).copy()
-    dff["month"] = dff["reg_date"].dt.to_period("M").dt.to_timestamp()
-
-    monthly = dff.groupby("month")["Income_Clean"].sum().reset_index().sort_values("month")
-    monthly["cumulative"] = monthly["Income_Clean"].cumsum()
-
-    last_date = monthly["month"].iloc[-1]
-    last_val = monthly["cumulative"].iloc[-1]
-
-    recent_vals = monthly["Income_Clean"].tail(6).tolist()
-    weights = list(range(1, len(recent_vals) + 1))
-    avg_growth = np.average(recent_vals, weights=weights) if recent_vals else 0
-
-    future_dates = pd.date_range(start=last_date, periods=FORECAST_HORIZON + 1, freq="MS")[1:]
-    forecast_vals = [last_val + (avg_growth * i) for i in range(1, FORECAST_HORIZON + 1)]
-
-    f_x, f_y = [last_date] + list(future_dates), [last_val] + forecast_vals
-    upper = [v * (1 + CONF_INTERVAL * i/FORECAST_HORIZON) for i, v in enumerate(f_y)]
-    lower = [v * (1 - CONF_INTERVAL * i/FORECAST_HORIZON) for i, v in enumerate(f_y)]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=f_x + f_x[::-1], y=upper + lower[::-1], fill="toself", 
-                             fillcolor="rgba(16,185,129,0.10)", line=dict(color="rgba(0,0,0,0)"), name="ช่วงคาดการณ์เป้าหมาย"))
-    fig.add_trace(go.Scatter(x=monthly["month"], y=monthly["cumulative"], mode="lines+markers", 
-                             name="มูลค่าสะสมจริง", line=dict(color=THEME["success"], width=4)))
-    fig.add_trace(go.Scatter(x=f_x, y=f_y, mode="lines", name="แนวโน้ม 12 เดือนข้างหน้า", 
-                             line=dict(color=THEME["success"], dash="dash", width=3)))
+@figure_timer
+def chart_business_forecast(forecast, actual, resolution="M", window=None):
+    """forecast = ผลจาก forecasting.get_forecast (แถวแรก = เดือนล่าสุดที่มีข้อมูล), actual = ยอดสะสมช่วงที่แสดงตามการซูม"""
+    if forecast.empty: return go.Figure()
+
+    f_x = forecast.index
+    last_date = f_x[0]
+
+    band = dict(type="scatter", x=f_x.append(f_x[::-1]), y=np.concatenate([forecast["upper"], forecast["lower"][::-1]]), fill="toself", 
+                fillcolor="rgba(16,185,129,0.10)", line=dict(color="rgba(0,0,0,0)"), name="ช่วงคาดการณ์เป้าหมาย")
+    actual_line = dict(type="scatter", x=actual.index, y=actual.values, mode="lines+markers" if len(actual) <= 120 else "lines", 
+                       name=f"มูลค่าสะสมจริง ({RESOLUTION_LABELS[resolution]})", line=dict(color=THEME["success"], width=4))
+    trend = dict(type="scatter", x=f_x, y=forecast["mean"], mode="lines", name=f"แนวโน้ม {len(f_x) - 1} เดือนข้างหน้า", 
+                 line=dict(color=THEME["success"], dash="dash", width=3))
     
-    fig.add_vline(x=last_date, line_dash="dot", line_color="#94a3b8")
-    fig.update_layout(height=CHART_HEIGHT, paper_bgcolor=THEME["paper"], plot_bgcolor=THEME["bg_plot"],
-                      font=dict(family="Sarabun, sans-serif", color=THEME["text"]), hovermode="x unified",
-                      legend=dict(orientation="h", x=0.5, xanchor="center", y=1.1), margin=dict(t=80, b=40, l=60, r=40))
-    fig.update_yaxes(gridcolor=THEME["grid"], tickformat=",.0f")
-    return fig
+    today_line = dict(type="line", xref="x", yref="paper", x0=last_date, x1=last_date, y0=0, y1=1,
+                      line=dict(dash="dot", color="#94a3b8"))
+    xaxis = dict(range=list(window)) if window else {}  # คงช่วงที่ผู้ใช้ซูมไว้
+    return new_figure(band, actual_line, trend, layout=dict(
+        height=CHART_HEIGHT, hovermode="x unified", shapes=[today_line],
+        legend=dict(orientation="h", x=0.5, xanchor="center", y=1.1), margin=dict(t=80, b=40, l=60, r=40),
+        xaxis=xaxis, yaxis=dict(tickformat=",.0f"),
+    ))
 
 # ==================================================
 # 3. Main Layout
@@ -84,7 +77,7 @@ def performance_layout():
     df = load_performance_data()
     if df.empty: return dbc.Container(dbc.Alert("ไม่พบข้อมูล", color="danger"))
     
-    available_years = sorted(df['reg_date'].dt.year.unique(), reverse=True)
+    available_years = sorted(df['reg_date'].dt.year.dropna().astype(int).unique(), reverse=True)
 
     return dbc.Container(fluid=True, style={"padding": "20px 30px", "maxWidth": "1400px"}, children=[
         html.Div([
@@ -92,41 +85,21 @@ def performance_layout():
             html.P("วิเคราะห์เป้าหมายธุรกิจจากฐานข้อมูลรายปี", className="text-muted")
         ], className="mb-4"),
 
-        # ใช้ dcc.Loading คลุมเพื่อความลื่นไหลเวลาเปลี่ยนปี
-        dcc.Loading(id="loading-performance", type="circle", color=THEME["success"], children=[
-            html.Div(id='performance-content')
+        # KPI และกราฟมี Callback แยกกัน KPI จะแสดงก่อนโดยไม่ต้องรอกราฟ
+        dcc.Loading(id="loading-performance-kpis", type="circle", color=THEME["success"], children=[
+            html.Div(id='performance-kpis')
         ]),
-        
-        # Dropdown ตัวแรกที่เป็นตัวจุดชนวน (Trigger) - ซ่อนไว้เพื่อรักษา State หรือใช้ร่วมกัน
-        dcc.Dropdown(id='year-selector', options=[{'label': f'ปี {y}', 'value': y} for y in available_years],
-                     value=available_years[0], style={'display': 'none'})
-    ])
-
-# ==================================================
-# 4. Callback
-# ==================================================
-@callback(
-    Output('performance-content', 'children'),
-    Input('year-selector', 'value')
-)
-def update_performance_dashboard(selected_year):
-    df = load_performance_data()
-    filtered_df = df[df['reg_date'].dt.year >= selected_year]
-    available_years = sorted(df['reg_date'].dt.year.unique(), reverse=True)
 
-    return [
-        render_performance_kpis(filtered_df), 
-        
         dbc.Row([
             dbc.Col(
                 html.Div([
-                    # --- ปุ่มเลือกปีแบบลอยตัว (ตำแหน่งที่คุณวงไว้) ---
+                    # --- ปุ่มเลือกปีแบบลอยตัว ---
                     html.Div([
                         html.Span("เลือกปีวิเคราะห์ย้อนหลัง:", className="me-2 small fw-bold", style={"color": "#666"}),
                         dcc.Dropdown(
-                            id='year-selector', # ใช้ ID เดิมเพื่อให้ Callback วนลูปทำงานได้
+                            id='year-selector',
                             options=[{'label': str(y), 'value': y} for y in available_years],
-                            value=selected_year,
+                            value=available_years[0],
                             clearable=False,
                             style={'width': '110px', 'fontSize': '14px'}
                         )
@@ -137,14 +110,69 @@ def update_performance_dashboard(selected_year):
 
                     # ตัวกราฟ
                     chart_card(
-                        chart_business_forecast(filtered_df, selected_year),
-                        f"คาดการณ์แนวโน้มธุรกิจ (อ้างอิงฐานข้อมูลปี {selected_year})"
+                        dcc.Loading(type="circle", color=THEME["success"], children=[
+                            dcc.Graph(id='performance-forecast-graph', config={"displayModeBar": False})
+                        ]),
+                        html.Span(id='performance-forecast-title')
                     )
                 ], style={"position": "relative"}), # ฐานสำหรับตำแหน่ง Absolute
                 width=12
             )
         ]),
-        html.Div([html.Small(f"* วิเคราะห์จากสถิติปี {selected_year}", className="text-muted")], className="text-end mt-2")
-    ]
+        html.Div([html.Small(id='performance-footnote', className="text-muted")], className="text-end mt-2"),
+        dcc.Interval(id='performance-forecast-poll', interval=FORECAST_POLL_MS, disabled=True)
+    ])
 
-layout = performance_layout()
\ No newline at end of file
+# ==================================================
+# 4. Callbacks
+# ==================================================
+@callback(
+    Output('performance-kpis', 'children'),
+    [Input('year-selector', 'value'),
+     Input('cross-filter', 'data')]
+)
+def update_performance_kpis(selected_year, filters):
+    year_start, _ = year_window(selected_year)
+    return render_performance_kpis(rollup(filter_signature(filters), "M", start=year_start))
+
+@callback(
+    [Output('performance-forecast-graph', 'figure'),
+     Output('performance-forecast-title', 'children'),
+     Output('performance-footnote', 'children'),
+     Output('performance-forecast-poll', 'disabled')],
+    [Input('year-selector', 'value'),
+     Input('cross-filter', 'data'),
+     Input('performance-forecast-graph', 'relayoutData'),
+     Input('performance-forecast-poll', 'n_intervals')]
+)
+def update_performance_forecast(selected_year, filters, relayout_data, _n_intervals):
+    # ซูม = ยอดสะสมช่วงนั้นที่ความละเอียดสูงขึ้น แนวโน้มยังคำนวณจากรายเดือนเสมอ
+    window = None
+    if ctx.triggered_id == 'performance-forecast-graph':
+        window = zoom_window(relayout_data)
+        if window is None:
+            return no_update, no_update, no_update, no_update
+        window = None if window == (None, None) else window
+    elif ctx.triggered_id == 'performance-forecast-poll':
+        window = zoom_window(relayout_data)  # คงช่วงที่ซูมไว้ตอนวาดใหม่
+        window = None if window == (None, None) else window
+
+    signature = filter_signature(filters)
+    forecast, status, backend = load_forecast("income", selected_year, FORECAST_HORIZON, signature)
+    if ctx.triggered_id == 'performance-forecast-poll' and status == PENDING:
+        return no_update, no_update, no_update, no_update
+
+    year_start, _ = year_window(selected_year)
+    start, end = window or (year_start, None)
+    actual, resolution = query(signature, "income", start, end, finest="D" if window else "M", cumulative_from=year_start)
+    footnote = f"* วิเคราะห์จากสถิติปี {selected_year}"
+    if status == PENDING:
+        footnote += " (กำลังคำนวณโมเดลละเอียดเบื้องหลัง แสดงผลแบบถ่วงน้ำหนักไปก่อน)"
+    return (
+        chart_business_forecast(forecast, actual, resolution, window),
+        f"คาดการณ์แนวโน้มธุรกิจ (อ้างอิงฐานข้อมูลปี {selected_year})",
+        footnote,
+        status != PENDING,
+    )
+
+layout = performance_layout()
@@ -0,0 +1,122 @@
+import fcntl
+import json
+import os
+import uuid
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow ไม่ได้ติดตั้ง = ใช้ข้อมูลใน process ตามเดิม
+    pa = None
+
+from .files import atomic_path, atomic_write
+
+# ==================================================
+# 1. Config
+# ==================================================
+# ตั้งเป็น tmpfs (เช่น /dev/shm/coopdash) เพื่อให้ทุก Worker memory-map ไฟล์เดียวกันจาก RAM
+SHARED_DATASET_DIR = os.getenv("SHARED_DATASET_DIR")
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+KEEP_FILES = 2  # เก็บไฟล์เวอร์ชันก่อนหน้าไว้ให้ Worker ที่ยังอ่านอยู่
+
+
+def is_enabled() -> bool:
+    return bool(SHARED_DATASET_DIR) and pa is not None
+
+# ==================================================
+# 2. Publish (Leader เขียนไฟล์ Arrow แล้วสลับ CURRENT แบบ atomic)
+# ==================================================
+def _read_current():
+    try:
+        with open(os.path.join(SHARED_DATASET_DIR, CURRENT_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _prune_old_files(keep_name):
+    files = sorted(
+        (e for e in os.scandir(SHARED_DATASET_DIR) if e.name.startswith("dataset-") and e.name.endswith(".arrow")),
+        key=lambda e: e.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in files[KEEP_FILES:]:
+        if entry.name != keep_name:
+            try:
+                # Worker ที่ยัง map ไฟล์เก่าไว้อ่านต่อได้จนปล่อย (Linux ไม่ลบข้อมูลจริงจนกว่าจะ unmap)
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def publish_dataset(df: pd.DataFrame, db_version=None) -> dict:
+    """เขียน DataFrame เป็น Arrow IPC file แล้วชี้ CURRENT ไปยังไฟล์ใหม่"""
+    os.makedirs(SHARED_DATASET_DIR, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    name = f"dataset-{uuid.uuid4().hex[:12]}.arrow"
+    path = os.path.join(SHARED_DATASET_DIR, name)
+
+    with atomic_path(path) as tmp_path:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    current = {
+        "file": name,
+        "db_version": db_version,
+        "dataset_version": df.attrs.get("dataset_version"),
+        "rows": len(df),
+    }
+    with atomic_write(os.path.join(SHARED_DATASET_DIR, CURRENT_FILE), "w", encoding="utf-8") as f:
+        json.dump(current, f)
+    _prune_old_files(name)
+    print(f"📦 publish ชุดข้อมูล {name} ({len(df):,} แถว, db version {db_version})")
+    return current
+
+# ==================================================
+# 3. Open (Worker memory-map แบบ zero-copy)
+# ==================================================
+def _string_as_arrow(arrow_type):
+    # เก็บ string เป็น Arrow array ชี้ไปยังหน่วยความจำที่ map ไว้ ไม่แตกเป็น Python object ต่อ Worker
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def open_dataset(current: dict) -> pd.DataFrame:
+    source = pa.memory_map(os.path.join(SHARED_DATASET_DIR, current["file"]), "r")
+    table = pa.ipc.open_file(source).read_all()
+    # split_blocks: คอลัมน์ตัวเลขชี้ไปยัง buffer ของไฟล์ตรงๆ (read-only) ไม่รวม block ใหม่
+    df = table.to_pandas(split_blocks=True, date_as_object=False, types_mapper=_string_as_arrow)
+    df.attrs["dataset_version"] = current.get("dataset_version")
+    return df
+
+
+def load_or_publish(loader, db_version=None) -> pd.DataFrame:
+    """เปิดชุดข้อมูลที่แชร์อยู่ ถ้ายังไม่มีหรือ version เก่า ให้ process แรกที่ได้ lock โหลดแล้ว publish"""
+    current = _read_current()
+    if current and (db_version is None or current.get("db_version") == db_version):
+        return open_dataset(current)
+
+    os.makedirs(SHARED_DATASET_DIR, exist_ok=True)
+    with open(os.path.join(SHARED_DATASET_DIR, LOCK_FILE), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            # อาจมี Worker อื่น publish ให้แล้วระหว่างรอ lock
+            current = _read_current()
+            if current and (db_version is None or current.get("db_version") == db_version):
+                return open_dataset(current)
+
+            df = loader()
+            if df.empty:
+                return df
+            try:
+                current = publish_dataset(df, db_version)
+            except (pa.ArrowException, OSError) as e:
+                print(f"[WARN] publish ชุดข้อมูลไม่สำเร็จ ใช้ข้อมูลใน process แทน: {e}")
+                return df
+            return open_dataset(current)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
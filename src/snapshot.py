@@ -0,0 +1,101 @@
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (pandas ใช้เขียน/อ่าน Parquet)
+except ImportError:
+    pyarrow = None
+
+from .files import DATA_DIR, atomic_path, atomic_write
+
+# ==================================================
+# 1. Config
+# ==================================================
+SNAPSHOT_DIR = os.getenv(
+    "SNAPSHOT_DIR",
+    os.path.join(DATA_DIR, "snapshots"),
+)
+LATEST_FILE = "latest.json"
+KEEP_SNAPSHOTS = 3
+
+
+def is_enabled() -> bool:
+    return bool(SNAPSHOT_DIR) and pyarrow is not None
+
+# ==================================================
+# 2. Save / Load Snapshot (Parquet ต่อ dataset version)
+# ==================================================
+def _latest():
+    try:
+        with open(os.path.join(SNAPSHOT_DIR, LATEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def latest_version():
+    latest = _latest()
+    return latest.get("dataset_version") if latest else None
+
+
+def latest_snapshot_path():
+    latest = _latest()
+    return os.path.join(SNAPSHOT_DIR, latest["file"]) if latest else None
+
+
+def save_snapshot(df: pd.DataFrame, name: str = "members") -> None:
+    """บันทึกชุดข้อมูลเป็น Parquet (ข้ามถ้าเวอร์ชันเดียวกันกับล่าสุด)"""
+    if not is_enabled() or df.empty:
+        return
+    version = df.attrs.get("dataset_version")
+    if version is not None and version == latest_version():
+        return
+
+    file_name = f"{name}-{version}.parquet"
+    path = os.path.join(SNAPSHOT_DIR, file_name)
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        with atomic_path(path) as tmp_path:
+            df.to_parquet(tmp_path, index=False, compression="zstd")
+
+        latest = {"file": file_name, "dataset_version": version, "rows": len(df)}
+        with atomic_write(os.path.join(SNAPSHOT_DIR, LATEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(latest, f)
+    except (OSError, ValueError, TypeError, ImportError, pyarrow.ArrowException) as e:
+        # snapshot เป็นแค่ทางสำรอง เขียนไม่ได้ (เช่น คอลัมน์ object ที่มีหลายชนิด = ArrowTypeError) ต้องไม่ทำให้ load_data ล้ม
+        print(f"[WARN] บันทึก snapshot ไม่สำเร็จ: {e}")
+        return
+
+    _prune(name, keep=file_name)
+
+
+def _prune(name, keep):
+    files = sorted(
+        (e for e in os.scandir(SNAPSHOT_DIR) if e.name.startswith(f"{name}-") and e.name.endswith(".parquet")),
+        key=lambda e: e.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in files[KEEP_SNAPSHOTS:]:
+        if entry.name != keep:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def load_snapshot():
+    """อ่าน snapshot ล่าสุด (คืน None ถ้าไม่มี)"""
+    if not is_enabled():
+        return None
+    latest = _latest()
+    if latest is None:
+        return None
+    try:
+        df = pd.read_parquet(os.path.join(SNAPSHOT_DIR, latest["file"]))
+    except (OSError, ValueError, pyarrow.ArrowException) as e:
+        print(f"[WARN] อ่าน snapshot ไม่สำเร็จ: {e}")
+        return None
+    df.attrs["dataset_version"] = latest.get("dataset_version")
+    return df
@@ -0,0 +1,135 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .analytics import daily_trend
+from .data_manager import get_dataset, register_dataset_cache
+from .filter_index import filter_frame
+
+# ==================================================
+# 1. Config
+# ==================================================
+# ความละเอียดจากละเอียดสุดไปหยาบสุด (สัปดาห์เริ่มวันจันทร์ ทุกช่วงติดป้ายด้วยวันแรกของช่วง)
+RESOLUTIONS = {"D": "D", "W": "W-MON", "M": "MS", "Y": "YS"}
+RESOLUTION_LABELS = {"D": "รายวัน", "W": "รายสัปดาห์", "M": "รายเดือน", "Y": "รายปี"}
+HOVER_FORMATS = {"D": "%d %b %Y", "W": "%d %b %Y", "M": "%b %Y", "Y": "%Y"}
+
+MAX_POINTS = int(os.getenv("TIMESERIES_MAX_POINTS", 2000))       # เกินนี้เปลี่ยนไปใช้ความละเอียดที่หยาบขึ้น
+TARGET_POINTS = int(os.getenv("TIMESERIES_TARGET_POINTS", 600))  # เกินนี้ลดจุดด้วย LTTB ก่อนส่งไปกราฟ
+
+# ==================================================
+# 2. Rollups: สมาชิกใหม่/รายได้ ต่อวัน สัปดาห์ เดือน ปี (คำนวณครั้งเดียวต่อชุดตัวกรอง)
+# ==================================================
+def build_rollups(df: pd.DataFrame) -> dict:
+    """{ความละเอียด: DataFrame(members, income) index = วันแรกของช่วง} ช่วงที่ไม่มีคนสมัครเป็น 0"""
+    daily = daily_trend(df).set_index("day")[["members", "income"]]
+    if daily.empty:
+        return {}
+    return {res: daily.resample(rule, label="left", closed="left").sum() for res, rule in RESOLUTIONS.items()}
+
+
+@register_dataset_cache
+@lru_cache(maxsize=16)
+def get_rollups(signature=()) -> dict:
+    return build_rollups(filter_frame(get_dataset(), signature))
+
+
+def _window(index, start, end):
+    """ตำแหน่ง [i, j) ของช่วงที่ทับกับ [start, end] (รวมช่วงแรกที่เริ่มก่อน start)"""
+    i = 0 if start is None else max(index.searchsorted(pd.Timestamp(start), side="right") - 1, 0)
+    j = len(index) if end is None else index.searchsorted(pd.Timestamp(end), side="right")
+    return i, j
+
+
+def pick_resolution(rollups, start=None, end=None, finest="D") -> str:
+    """ความละเอียดที่ละเอียดที่สุด (ไม่ละเอียดกว่า finest) ที่มีจุดในช่วงไม่เกิน MAX_POINTS"""
+    names = list(RESOLUTIONS)
+    for res in names[names.index(finest):]:
+        i, j = _window(rollups[res].index, start, end)
+        if j - i <= MAX_POINTS:
+            return res
+    return names[-1]
+
+
+def rollup(signature=(), resolution="M", start=None, end=None) -> pd.DataFrame:
+    """ตาราง Rollup ความละเอียดที่ระบุ ตัดเฉพาะช่วงวันที่"""
+    rollups = get_rollups(signature)
+    if not rollups:
+        return pd.DataFrame(columns=["members", "income"])
+    table = rollups[resolution]
+    i, j = _window(table.index, start, end)
+    return table.iloc[i:j]
+
+# ==================================================
+# 3. LTTB Downsampling (Largest-Triangle-Three-Buckets)
+# ==================================================
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """ตำแหน่งของจุดที่เก็บไว้ n_out จุด โดยคงรูปทรงของเส้น (จุดแรก/สุดท้ายเก็บเสมอ)"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(int) + 1
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        # พื้นที่สามเหลี่ยม (จุดที่เลือกก่อนหน้า, จุดในช่วงนี้, ค่าเฉลี่ยช่วงถัดไป) เลือกจุดที่ได้พื้นที่มากสุด
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(series: pd.Series, n_out=TARGET_POINTS) -> pd.Series:
+    if len(series) <= n_out:
+        return series
+    x = series.index.asi8.astype(float)
+    return series.iloc[lttb(x, series.to_numpy(dtype=float), n_out)]
+
+# ==================================================
+# 4. Query สำหรับกราฟแนวโน้ม
+# ==================================================
+def query(signature=(), measure="members", start=None, end=None, finest="D", cumulative_from=None):
+    """คืน (Series ของ measure ในช่วง [start, end], ความละเอียดที่ใช้)
+
+    finest = ความละเอียดสูงสุดที่ยอมให้ใช้ (มุมมองเริ่มต้นใช้ "M", ตอนซูมใช้ "D")
+    cumulative_from = คิดยอดสะสมตั้งแต่วันนี้ (ยอดสะสมไม่เปลี่ยนตามช่วงที่ซูม)
+    """
+    rollups = get_rollups(signature)
+    if not rollups:
+        return pd.Series(dtype=float), finest
+
+    resolution = pick_resolution(rollups, start, end, finest)
+    series = rollups[resolution][measure]
+    if cumulative_from is not None:
+        i, _ = _window(series.index, cumulative_from, None)
+        series = series.iloc[i:].cumsum()
+    i, j = _window(series.index, start, end)
+    return downsample(series.iloc[i:j]), resolution
+
+
+def zoom_window(relayout_data):
+    """แปลง relayoutData ของกราฟ: (start, end) เมื่อซูม, (None, None) เมื่อรีเซ็ต, None เมื่อเป็นเหตุการณ์อื่น"""
+    if not relayout_data:
+        return None
+    if relayout_data.get("xaxis.autorange"):
+        return None, None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        return relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+    if "xaxis.range" in relayout_data:
+        start, end = relayout_data["xaxis.range"]
+        return start, end
+    return None
+
+
+def year_window(year):
+    """ช่วงวันที่ของปีที่เลือก (year=None = ทุกปี)"""
+    if year is None:
+        return None, None
+    return pd.Timestamp(year=int(year), month=1, day=1), pd.Timestamp(year=int(year), month=12, day=31)
@@ -0,0 +1,76 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import analytics, data_manager
+
+pytest.importorskip("duckdb")
+
+# ฟังก์ชันที่หน้าเว็บเรียกเมื่อ ANALYTICS_BACKEND=duckdb และคอลัมน์คีย์ที่ใช้เรียงก่อนเทียบผล
+AGGREGATIONS = [
+    ("branch_summary", ["branch_no"]),
+    ("province_gen_counts", ["year", "province_name", "Gen"]),
+    ("monthly_trend", ["month"]),
+    ("daily_trend", ["day"]),
+    ("occupation_debt", ["career_name"]),
+]
+
+
+def _with_nulls(rng, values, share=0.05):
+    values = pd.Series(values, dtype=object)
+    values[rng.random(len(values)) < share] = None
+    return values
+
+
+@pytest.fixture
+def dataset(monkeypatch):
+    """ชุดข้อมูลจำลองแบบเดียวกับ load_data (วันที่เป็น datetime.date) มีค่าว่างในคอลัมน์ที่ใช้ TRY_CAST/COALESCE"""
+    rng = np.random.default_rng(3)
+    n = 5_000
+    epoch = datetime.date(1950, 1, 1)
+    birthday = [epoch + datetime.timedelta(days=int(d)) for d in rng.integers(0, 20_000, n)]
+    registered = [datetime.date(2015, 1, 1) + datetime.timedelta(days=int(d)) for d in rng.integers(0, 3_000, n)]
+    income = pd.Series(rng.integers(5_000, 80_000, n)).map("{:,}".format)
+    income[rng.random(n) < 0.02] = "-"  # รายได้ที่อ่านเป็นตัวเลขไม่ได้ = 0
+    df = pd.DataFrame({
+        "branch_no": rng.integers(1, 5, n),
+        "income": income,
+        "credit_limit": rng.uniform(10_000, 500_000, n).round(2),
+        "credit_limit_used_pct": rng.choice([0.0, 25.5, 60.0, 91.2, 100.0], n),
+        "registration_date": _with_nulls(rng, registered),
+        "birthday": _with_nulls(rng, birthday),
+        "province_name": _with_nulls(rng, rng.choice(["เชียงใหม่", "ลำพูน", "ลำปาง"], n)),
+        "career_name": _with_nulls(rng, rng.choice(["เกษตรกร", "รับจ้าง", "ค้าขาย", "รับราชการ"], n)),
+    })
+    monkeypatch.setattr(data_manager, "get_dataset", lambda: df)
+    return df
+
+
+def _sorted(frame, keys):
+    return frame.sort_values(keys, ignore_index=True)
+
+
+@pytest.mark.parametrize("name, keys", AGGREGATIONS)
+def test_backends_agree(dataset, monkeypatch, name, keys):
+    aggregate = getattr(analytics, name)
+    monkeypatch.setattr(analytics, "ANALYTICS_BACKEND", "pandas")
+    expected = _sorted(aggregate(), keys)
+    monkeypatch.setattr(analytics, "ANALYTICS_BACKEND", "duckdb")
+    result = _sorted(aggregate(), keys)
+
+    assert not result.empty
+    pd.testing.assert_frame_equal(
+        result, expected[result.columns], check_dtype=False, check_exact=False, rtol=1e-9,
+    )
+    # df=None ต้องได้ชุดข้อมูลเดียวกับที่ส่ง get_dataset() เข้าไปเอง
+    pd.testing.assert_frame_equal(_sorted(aggregate(dataset), keys), result)
+
+
+def test_null_rows_are_covered(dataset, monkeypatch):
+    monkeypatch.setattr(analytics, "ANALYTICS_BACKEND", "duckdb")
+    counts = analytics.province_gen_counts()
+    assert (counts["year"] == 0).any() and (counts["Gen"] == "Unknown").any()
+    assert counts["count"].sum() == dataset["province_name"].notna().sum()
+    assert analytics.daily_trend()["members"].sum() == dataset["registration_date"].notna().sum()
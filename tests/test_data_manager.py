@@ -0,0 +1,47 @@
+import pandas as pd
+
+from src import data_manager, shared_dataset
+
+
+def test_publish_failure_does_not_stop_the_master(monkeypatch, capsys):
+    def publish(df, db_version):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(data_manager, "load_data", lambda: pd.DataFrame({"member_id": [1]}))
+    monkeypatch.setattr(shared_dataset, "publish_dataset", publish)
+    monkeypatch.setattr(data_manager, "get_pg_engine", lambda: None)
+
+    data_manager.publish_from_database()
+    assert "[WARN]" in capsys.readouterr().out
+
+
+def _reload(monkeypatch, connected, db_frame, snap_frame, cold_start=False):
+    reads = []
+
+    def load_snapshot():
+        reads.append(1)
+        return snap_frame
+
+    monkeypatch.setattr(data_manager, "_refresh_state", {"started": not cold_start, "frame": None})
+    monkeypatch.setattr(data_manager.snapshot, "load_snapshot", load_snapshot)
+    monkeypatch.setattr(data_manager, "test_connection", lambda: connected)
+    monkeypatch.setattr(data_manager, "load_data", lambda: db_frame)
+    return data_manager.load_data_with_fallback(), len(reads)
+
+
+def test_reload_with_database_up_does_not_read_snapshot(monkeypatch):
+    db, snap = pd.DataFrame({"member_id": [1, 2]}), pd.DataFrame({"member_id": [1]})
+    df, reads = _reload(monkeypatch, True, db, snap)
+    assert df is db and reads == 0
+
+
+def test_reload_with_database_down_falls_back_to_snapshot(monkeypatch):
+    snap = pd.DataFrame({"member_id": [1]})
+    df, reads = _reload(monkeypatch, False, pd.DataFrame(), snap)
+    assert df is snap and reads == 1
+
+
+def test_cold_start_without_snapshot_reads_it_once(monkeypatch):
+    db = pd.DataFrame({"member_id": [1, 2]})
+    df, reads = _reload(monkeypatch, True, db, None, cold_start=True)
+    assert df is db and reads == 1
@@ -0,0 +1,77 @@
+"""stage_changes กับ Postgres จริง (ตั้ง TEST_DATABASE_URL เช่น postgresql+psycopg2://user@host/db)
+
+ทุกอย่างอยู่ใน schema ชั่วคราวและ Transaction ที่ rollback เมื่อจบ ไม่แตะตารางของ Dashboard
+"""
+import os
+import uuid
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.ingest.delta import changed_keys, deleted_keys, save_fingerprints, stage_changes
+from src.ingest.pg_copy import copy_frame, create_stage
+from src.ingest.schema import FINGERPRINT_DDL
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="ไม่ได้ตั้ง TEST_DATABASE_URL")
+
+COLUMNS = ["key", "name", "amount"]
+ROWS_SQL = "SELECT key, name, amount FROM stage_rows"
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine(TEST_DATABASE_URL)
+    schema = f"test_delta_{uuid.uuid4().hex[:8]}"
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+        conn.execute(text(f"SET LOCAL search_path TO {schema}, pg_temp"))
+        conn.execute(text(FINGERPRINT_DDL))
+        try:
+            yield conn
+        finally:
+            transaction.rollback()
+    engine.dispose()
+
+
+def _stage(conn, rows, name="changes", kept=()):
+    conn.execute(text("DROP TABLE IF EXISTS stage_rows"))
+    create_stage(conn, "stage_rows", {"key": "TEXT", "name": "TEXT", "amount": "NUMERIC"})
+    copy_frame(conn, "stage_rows", pd.DataFrame(rows, columns=COLUMNS))
+    return stage_changes(conn, "test", name, ROWS_SQL, "key", COLUMNS, kept)
+
+
+def _keys(conn, sql):
+    return sorted(conn.execute(text(sql)).scalars())
+
+
+def test_first_run_inserts_every_key(conn):
+    counts = _stage(conn, [("a", "x", 1), ("b", "y", 2)])
+    assert counts == {"insert": 2, "update": 0, "delete": 0}
+    assert _keys(conn, changed_keys("changes")) == ["a", "b"]
+
+
+def test_insert_update_delete_and_kept(conn):
+    _stage(conn, [("a", "x", 1), ("b", "y", 2), ("c", "z", 3), ("d", "w", 4)], "first")
+    save_fingerprints(conn, "test", "first")
+
+    # a เหมือนเดิม, b เปลี่ยน, c หายไป, d หายไปแต่แถวอยู่ใน Quarantine, e ใหม่
+    counts = _stage(conn, [("a", "x", 1), ("b", "y", 20), ("e", "v", 5)], "second", kept=["d"])
+    assert counts == {"insert": 1, "update": 1, "delete": 1}
+    assert _keys(conn, "SELECT row_key FROM second WHERE change = 'insert'") == ["e"]
+    assert _keys(conn, "SELECT row_key FROM second WHERE change = 'update'") == ["b"]
+    assert _keys(conn, deleted_keys("second")) == ["c"]
+
+    save_fingerprints(conn, "test", "second")
+    assert _keys(conn, "SELECT row_key FROM ingest_fingerprints") == ["a", "b", "d", "e"]
+    assert _stage(conn, [("a", "x", 1), ("b", "y", 20), ("d", "w", 4), ("e", "v", 5)], "third") == {
+        "insert": 0, "update": 0, "delete": 0,
+    }
+
+
+def test_null_change_counts_as_update(conn):
+    _stage(conn, [("a", "x", 1)], "first")
+    save_fingerprints(conn, "test", "first")
+    assert _stage(conn, [("a", None, 1)], "second")["update"] == 1
@@ -0,0 +1,79 @@
+import os
+import time
+
+import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
+from dash import html
+
+from src.figure_cache import FigureCache, _dumps, _loads
+
+
+def _kpi_row():
+    return dbc.Row([
+        dbc.Col(html.Div([html.I(className="fa fa-users"), html.H3("1,234")], style={"color": "#1e293b"}), lg=3),
+        dbc.Col(dbc.Alert("ไม่พบข้อมูล", color="warning"), lg=3),
+    ], className="g-3 mb-4")
+
+
+def test_component_round_trip_is_json():
+    row = _kpi_row()
+    blob = _dumps(row)
+    assert blob[:1] == b"C" and b"pickle" not in blob
+    restored = _loads(blob)
+    assert isinstance(restored, dbc.Row)
+    assert _dumps(restored) == blob
+    assert restored.children[0].children.children[1].children == "1,234"
+
+
+def test_figure_round_trip():
+    fig = go.Figure(go.Bar(x=["a", "b"], y=[1, 2]))
+    restored = _loads(_dumps(fig))
+    assert isinstance(restored, go.Figure)
+    assert list(restored.data[0].y) == [1, 2]
+
+
+def test_unsupported_values_are_not_cached():
+    cache = FigureCache(max_bytes=10_000)
+    calls = []
+    for _ in range(2):
+        cache.get_or_build("k", lambda: calls.append(1) or {"plain": "dict"}, version="v1")
+    assert len(calls) == 2
+
+
+def _fill(cache, version, count, start=0):
+    for i in range(start, start + count):
+        cache.get_or_build(f"key{i}", lambda i=i: go.Figure(go.Bar(y=list(range(50)), name=str(i))), version=version)
+
+
+def test_disk_tier_stays_within_budget(tmp_path):
+    cache = FigureCache(max_bytes=10**7, directory=str(tmp_path), disk_max_bytes=20_000)
+    _fill(cache, "v1", 60)
+    total = sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+    assert 0 < total <= 20_000
+
+
+def test_disk_eviction_removes_least_recently_used(tmp_path):
+    cache = FigureCache(max_bytes=10**7, directory=str(tmp_path), disk_max_bytes=10**7)
+    _fill(cache, "v1", 3)
+    files = {name: os.path.getmtime(tmp_path / name) for name in os.listdir(tmp_path)}
+    old = time.time() - 100
+    for name in files:
+        os.utime(tmp_path / name, (old, old))
+    cache.clear()
+    cache.get("key0", "v1")  # อ่านจากไฟล์ = ใช้ล่าสุด
+    size = os.path.getsize(tmp_path / sorted(files)[0])
+    cache.disk_max_bytes = size * 1.3  # ลบเหลือ 80% ของงบ = เหลือไฟล์เดียว
+    cache._disk_size = None
+    cache._account_disk(0)
+    remaining = os.listdir(tmp_path)
+    assert len(remaining) == 1
+    assert cache.get("key0", "v1") is not None
+
+
+def test_clear_disk_removes_other_versions_on_next_write(tmp_path):
+    cache = FigureCache(max_bytes=10**7, directory=str(tmp_path))
+    _fill(cache, "v1", 3)
+    cache.clear(disk=True)
+    assert len(os.listdir(tmp_path)) == 3  # ยังไม่รู้ version ใหม่
+    _fill(cache, "v2", 2)
+    assert sorted(name.split("-")[0] for name in os.listdir(tmp_path)) == ["v2", "v2"]
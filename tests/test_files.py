@@ -0,0 +1,60 @@
+import os
+import threading
+
+import pytest
+
+from src.files import atomic_path, atomic_write
+
+
+def test_atomic_write_replaces_target(tmp_path):
+    path = tmp_path / "result.json"
+    path.write_text("old")
+    with atomic_write(str(path), "w", encoding="utf-8") as f:
+        f.write("ใหม่")
+        assert path.read_text() == "old"  # ผู้อ่านยังเห็นไฟล์เดิมระหว่างเขียน
+    assert path.read_text(encoding="utf-8") == "ใหม่"
+    assert os.listdir(tmp_path) == ["result.json"]
+
+
+def test_failed_write_keeps_old_file_and_removes_temp(tmp_path):
+    path = tmp_path / "result.bin"
+    path.write_bytes(b"old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as f:
+            f.write(b"partial")
+            raise RuntimeError("boom")
+    assert path.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["result.bin"]
+
+
+def test_atomic_path_for_writers_that_open_the_file(tmp_path):
+    path = tmp_path / "data.csv"
+    with atomic_path(str(path)) as tmp_name:
+        assert os.path.dirname(tmp_name) == str(tmp_path)
+        with open(tmp_name, "w") as f:
+            f.write("a,b\n")
+    assert path.read_text() == "a,b\n"
+
+
+def test_threads_writing_same_key_never_share_a_temp_file(tmp_path):
+    path = str(tmp_path / "shared.bin")
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def write(n):
+        try:
+            with atomic_write(path) as f:
+                barrier.wait()
+                f.write(bytes([n]) * 100_000)
+        except Exception as e:  # pragma: no cover - ให้ assert ด้านล่างรายงาน
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    data = open(path, "rb").read()
+    assert len(data) == 100_000 and len(set(data)) == 1  # ไฟล์ของ Thread เดียวครบทั้งไฟล์
+    assert os.listdir(tmp_path) == ["shared.bin"]
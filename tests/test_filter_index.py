@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import filter_index
+from src.filter_index import GENDER_GROUPS, RISK_BINS, RISK_LABELS, BitmapIndex, filter_signature
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(7)
+    n = 2_003  # ไม่ลงตัวกับ 8 (ตรวจ bit ท้ายของ packbits)
+    dates = pd.Timestamp("2010-01-01") + pd.to_timedelta(rng.integers(0, 5000, n), unit="D")
+    return pd.DataFrame({
+        "branch_no": rng.integers(1, 6, n),
+        "province_name": rng.choice(["กรุงเทพมหานคร", "ขอนแก่น", "เชียงใหม่", None], n),
+        "career_name": rng.choice(["เกษตรกร", "ค้าขาย", "รับราชการ"], n),
+        "gender_name": rng.choice(["นาย", "นาง", "นางสาว", None], n),
+        "registration_date": pd.Series(dates.date).where(rng.random(n) > 0.05),
+        "credit_limit_used_pct": rng.uniform(0, 100, n).round(1),
+    })
+
+
+def pandas_mask(df, filters):
+    """ตัวกรองแบบเดียวกันด้วย boolean mask ของ pandas ตรงๆ"""
+    mask = pd.Series(True, index=df.index)
+    # ค่าจาก Store อาจเป็น "สาขา 2" / "2015" (dimension ตัวเลขเทียบด้วยเลขจำนวนเต็ม)
+    filters = {dim: [int("".join(filter(str.isdigit, str(v)))) for v in values] if dim in ("branch", "reg_year")
+               else values for dim, values in filters.items()}
+    dates = pd.to_datetime(df["registration_date"])
+    if "branch" in filters:
+        mask &= df["branch_no"].isin(filters["branch"])
+    if "province" in filters:
+        mask &= df["province_name"].isin(filters["province"])
+    if "career" in filters:
+        mask &= df["career_name"].isin(filters["career"])
+    if "gender" in filters:
+        mask &= df["gender_name"].map(GENDER_GROUPS).fillna("ไม่ระบุ").isin(filters["gender"])
+    if "reg_year" in filters:
+        mask &= dates.dt.year.isin(filters["reg_year"])
+    if "risk" in filters:
+        mask &= pd.cut(df["credit_limit_used_pct"], bins=RISK_BINS, labels=RISK_LABELS).isin(filters["risk"])
+    if "reg_date" in filters:
+        start, end = filters["reg_date"]
+        mask &= dates.notna()
+        if start:
+            mask &= dates >= pd.Timestamp(start)
+        if end:
+            mask &= dates <= pd.Timestamp(end)
+    return mask.to_numpy()
+
+
+CASES = [
+    {},
+    {"branch": [3]},
+    {"branch": ["สาขา 2", 4], "gender": ["หญิง"]},
+    {"province": ["ขอนแก่น", "ไม่มีจังหวัดนี้"], "career": ["ค้าขาย"]},
+    {"gender": ["ไม่ระบุ"]},
+    {"reg_year": ["2015", 2016], "risk": [RISK_LABELS[2]]},
+    {"reg_date": ["2012-01-01", "2014-06-30"]},
+    {"reg_date": [None, "2011-12-31"], "branch": [1, 5]},
+    {"reg_date": ["2020-01-01", ""], "career": ["เกษตรกร"], "risk": RISK_LABELS[:2]},
+]
+
+
+@pytest.mark.parametrize("filters", CASES)
+def test_bitmap_mask_matches_pandas(frame, filters):
+    mask = BitmapIndex(frame).mask(filter_signature(filters))
+    assert mask.dtype == bool and len(mask) == len(frame)
+    np.testing.assert_array_equal(mask, pandas_mask(frame, filters))
+
+
+def test_filter_mask_uses_dataset_index(frame, monkeypatch):
+    monkeypatch.setattr(filter_index, "get_index", lambda: BitmapIndex(frame))
+    filter_index.filter_mask.cache_clear()
+    try:
+        filters = {"branch": [2], "gender": ["ชาย"]}
+        mask = filter_index.filter_mask(filter_signature(filters))
+        np.testing.assert_array_equal(mask, pandas_mask(frame, filters))
+        assert not mask.flags.writeable
+    finally:
+        filter_index.filter_mask.cache_clear()
+
+
+def test_filter_signature_normalizes_values():
+    assert filter_signature({"branch": ["สาขา 3", 3.0], "career": [], "unknown": ["x"]}) == (("branch", (3,)),)
+    assert filter_signature({"reg_date": ["", None]}) == ()
@@ -0,0 +1,51 @@
+import os
+import time
+
+import pandas as pd
+
+from src import forecast_jobs
+
+
+def test_prune_keeps_recent_versions_of_other_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(forecast_jobs, "FORECAST_JOB_DIR", str(tmp_path))
+    for name in ("old", "newer", "current"):
+        (tmp_path / name).mkdir()
+    stale = time.time() - forecast_jobs.JOB_TIMEOUT_SEC - 60
+    os.utime(tmp_path / "old", (stale, stale))
+
+    forecast_jobs.prune("current")
+    assert sorted(os.listdir(tmp_path)) == ["current", "newer"]
+
+
+def test_prune_never_removes_current_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(forecast_jobs, "FORECAST_JOB_DIR", str(tmp_path))
+    (tmp_path / "current").mkdir()
+    stale = time.time() - forecast_jobs.JOB_TIMEOUT_SEC - 60
+    os.utime(tmp_path / "current", (stale, stale))
+
+    forecast_jobs.prune("current")
+    assert os.listdir(tmp_path) == ["current"]
+
+
+def test_job_result_round_trips_as_json(tmp_path, monkeypatch):
+    monkeypatch.setattr(forecast_jobs, "FORECAST_JOB_DIR", str(tmp_path))
+    history = pd.Series([1.0, 3.0, 4.0, 8.0], index=pd.date_range("2024-01-01", periods=4, freq="MS"))
+    path = forecast_jobs._job_path("v1", "key")
+    os.makedirs(os.path.dirname(path))
+    lock_path = forecast_jobs._job_path("v1", "key", ".lock")
+    open(lock_path, "w").close()
+
+    forecast_jobs.run_job(path, lock_path, history, 3, "weighted")
+    result = forecast_jobs.read_result("v1", "key")
+    expected = forecast_jobs.BACKENDS["weighted"](history, 3)
+    pd.testing.assert_frame_equal(result["forecast"], expected, check_freq=False)
+    assert result["error"] is None and result["backend"] == "weighted"
+    assert not os.path.exists(lock_path)
+    assert open(path, encoding="utf-8").read().startswith("{")
+
+
+def test_unreadable_result_counts_as_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(forecast_jobs, "FORECAST_JOB_DIR", str(tmp_path))
+    (tmp_path / "v1").mkdir()
+    (tmp_path / "v1" / "key.json").write_text("[]")
+    assert forecast_jobs.read_result("v1", "key") is None
@@ -0,0 +1,44 @@
+import os
+
+import dash
+import pytest
+from dash import Input, Output, html
+
+from src import metrics
+
+
+@pytest.fixture
+def client(monkeypatch):
+    for histogram in metrics.HISTOGRAMS:
+        monkeypatch.setattr(histogram, "_series", {})
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id="button"), html.Div(id="out")])
+
+    @app.callback(Output("out", "children"), Input("button", "n_clicks"))
+    def update_out(n_clicks):
+        return str(n_clicks)
+
+    metrics.install(app)
+    return app.server.test_client()
+
+
+def _post(client, payload):
+    return client.post("/_dash-update-component", json=payload)
+
+
+def test_registered_callback_is_labelled_by_function_and_worker(client):
+    _post(client, {
+        "output": "out.children", "outputs": {"id": "out", "property": "children"},
+        "inputs": [{"id": "button", "property": "n_clicks", "value": 1}], "changedPropIds": ["button.n_clicks"],
+    })
+    body = client.get(metrics.METRICS_PATH).get_data(as_text=True)
+    assert f'coopdash_callback_seconds_count{{callback="update_out",worker="{os.getpid()}"}} 1' in body
+
+
+def test_unregistered_outputs_share_one_label(client):
+    for n in range(5):
+        _post(client, {"output": f"made-up-{n}.children", "inputs": []})
+    _post(client, [1, 2, 3])  # JSON ที่ไม่ใช่ dict ต้องไม่ทำให้ after_request พัง
+    body = client.get(metrics.METRICS_PATH).get_data(as_text=True)
+    assert "made-up" not in body
+    assert f'coopdash_callback_seconds_count{{callback="unknown",worker="{os.getpid()}"}} 6' in body
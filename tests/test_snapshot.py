@@ -0,0 +1,30 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src import snapshot
+
+pytest.importorskip("pyarrow")
+
+
+def test_unwritable_frame_is_skipped_without_raising(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path))
+    df = pd.DataFrame({"mixed": [1, "x", 2.5]})  # pyarrow.ArrowTypeError (TypeError ไม่ใช่ ValueError)
+    df.attrs["dataset_version"] = "v1"
+
+    snapshot.save_snapshot(df)
+    assert "[WARN]" in capsys.readouterr().out
+    assert os.listdir(tmp_path) == []
+    assert snapshot.load_snapshot() is None
+
+
+def test_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path))
+    df = pd.DataFrame({"member_id": [1, 2], "province_name": ["ก", None]})
+    df.attrs["dataset_version"] = "v1"
+
+    snapshot.save_snapshot(df)
+    loaded = snapshot.load_snapshot()
+    pd.testing.assert_frame_equal(loaded, df)
+    assert loaded.attrs["dataset_version"] == "v1"
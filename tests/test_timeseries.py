@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from src.forecasting import FORECAST_HORIZON, linear_trend, weighted_drift
+from src.timeseries import downsample, lttb
+
+
+def test_lttb_keeps_endpoints_and_order():
+    x = np.arange(1_000, dtype=float)
+    y = np.sin(x / 50)
+    keep = lttb(x, y, 100)
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == 999
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_lttb_keeps_spike():
+    y = np.zeros(500)
+    y[321] = 100.0
+    assert 321 in lttb(np.arange(500, dtype=float), y, 20)
+
+
+def test_lttb_returns_everything_when_small():
+    x = np.arange(10, dtype=float)
+    assert lttb(x, x, 50).tolist() == list(range(10))
+    assert lttb(x, x, 2).tolist() == list(range(10))
+
+
+def test_downsample_series():
+    index = pd.date_range("2020-01-01", periods=3_000, freq="D")
+    series = pd.Series(np.arange(3_000, dtype=float), index=index)
+    result = downsample(series, 300)
+    assert len(result) == 300
+    assert result.index[0] == index[0] and result.index[-1] == index[-1]
+    assert len(downsample(series.iloc[:100], 300)) == 100
+
+
+def _monthly(values):
+    return pd.Series(values, index=pd.date_range("2023-01-01", periods=len(values), freq="MS"), dtype=float)
+
+
+def test_weighted_drift_continues_linear_growth():
+    history = _monthly(np.arange(1, 25) * 10.0)
+    result = weighted_drift(history, FORECAST_HORIZON)
+    assert len(result) == FORECAST_HORIZON + 1
+    assert result.index[0] == history.index[-1]  # จุดเชื่อมกับเส้นจริง
+    np.testing.assert_allclose(result["mean"], 240 + 10 * np.arange(FORECAST_HORIZON + 1))
+    assert (result["lower"] <= result["mean"]).all() and (result["mean"] <= result["upper"]).all()
+
+
+def test_linear_trend_exact_line_has_no_spread():
+    history = _monthly(5.0 + 3 * np.arange(18))
+    result = linear_trend(history, 6)
+    np.testing.assert_allclose(result["mean"], history.iloc[-1] + 3 * np.arange(7))
+    np.testing.assert_allclose(result["upper"] - result["lower"], 0, atol=1e-6)
+
+
+def test_linear_trend_short_history_falls_back():
+    history = _monthly([1.0, 2.0])
+    assert linear_trend(history, 3).equals(weighted_drift(history, 3))
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from src.ingest.credit import STAGE_COLUMNS, normalize_credit
+from src.ingest.members import MEMBER_COLUMNS, check_members
+from src.ingest.validate import (
+    REJECT_COLUMN, KeyTracker, reasons, reject_duplicates, reject_new_keys_below,
+)
+
+
+def _chunk(keys):
+    keys = pd.Series(keys, dtype="Int64", name="member_id")
+    return pd.DataFrame({"member_id": keys, REJECT_COLUMN: pd.Series(pd.NA, index=keys.index, dtype="string")}), keys
+
+
+# ==================================================
+# KeyTracker / reject_duplicates
+# ==================================================
+def test_duplicates_within_chunk():
+    tracker = KeyTracker()
+    assert tracker.duplicated([1, 2, 1, 3, 2]).tolist() == [False, False, True, False, True]
+
+
+def test_duplicates_across_chunks():
+    tracker = KeyTracker()
+    tracker.add([1, 2, 3])
+    tracker.add([10, 2])
+    assert tracker.duplicated([3, 4, 10, 11]).tolist() == [True, False, True, False]
+
+
+def test_reject_duplicates_against_database_and_earlier_chunks():
+    seen, existing = KeyTracker(), KeyTracker([5, 6])
+    chunk, keys = _chunk([1, 5, 2, 1])
+    chunk = reject_duplicates(chunk, keys, seen, existing)
+    assert chunk[REJECT_COLUMN].isna().tolist() == [True, False, True, False]
+    assert "มีในฐานข้อมูลแล้ว" in chunk.loc[1, REJECT_COLUMN]
+    assert "ซ้ำกับแถวก่อนหน้า" in chunk.loc[3, REJECT_COLUMN]
+
+    chunk, keys = _chunk([2, 3, None])
+    chunk = reject_duplicates(chunk, keys, seen, existing)
+    assert chunk[REJECT_COLUMN].isna().tolist() == [False, True, True]
+
+
+def test_reject_duplicates_skips_rows_already_rejected():
+    seen = KeyTracker()
+    chunk, keys = _chunk([1, 1])
+    chunk.loc[0, REJECT_COLUMN] = "ไม่มี first_name"
+    chunk = reject_duplicates(chunk, keys, seen)
+    # แถวแรกไม่ผ่านอยู่แล้ว คีย์ของมันจึงไม่ถูกจำ แถวที่สองผ่าน
+    assert chunk[REJECT_COLUMN].tolist()[1] is pd.NA
+
+
+def test_reject_new_keys_below_keeps_existing_keys():
+    existing = KeyTracker([10, 20])
+    chunk, keys = _chunk([5, 10, 21, 15])
+    chunk = reject_new_keys_below(chunk, keys, 20, existing, "ต่ำกว่า")
+    assert chunk[REJECT_COLUMN].fillna("").tolist() == ["ต่ำกว่า", "", "", "ต่ำกว่า"]
+    assert reject_new_keys_below(chunk, keys, None, existing, "x") is chunk
+
+# ==================================================
+# reasons / check_members / check_credit
+# ==================================================
+def test_reasons_joins_all_failed_rules():
+    index = pd.RangeIndex(3)
+    checks = [(np.array([True, False, False]), "a"), (np.array([True, True, False]), "b")]
+    assert reasons(index, checks).fillna("").tolist() == ["a; b", "b", ""]
+
+
+def _member(**values):
+    row = {col: None for col in MEMBER_COLUMNS}
+    row.update(member_id="500001", first_name="สมชาย", last_name="ใจดี", birthday="1980-01-02",
+               registration_date="2015-03-04", branch_no="3", income="25,000")
+    row.update(values)
+    return row
+
+
+def test_check_members_flags_bad_rows():
+    chunk = pd.DataFrame([
+        _member(),
+        _member(member_id="12a"),
+        _member(first_name=None, income="-5"),
+        _member(birthday="1980-13-40", registration_date="2090-01-01"),
+        _member(gender="x" * 11),
+    ], dtype="string")
+    result = check_members(chunk)
+    assert result.isna().tolist() == [True, False, False, False, False]
+    assert "member_id ไม่ใช่จำนวนเต็ม" in result[1]
+    assert "ไม่มี first_name" in result[2] and "income" in result[2]
+    assert "birthday ไม่ใช่วันที่" in result[3] and "registration_date เป็นวันในอนาคต" in result[3]
+    assert "gender ยาวเกิน 10" in result[4]
+
+
+def _credit(**values):
+    row = {col: None for col in STAGE_COLUMNS}
+    row.update(customer_id="C0001", national_id="1101700000011", account_number="A1", credit_limit=50000,
+               account_open_date="01/02/2020", age=40)
+    row.update(values)
+    return row
+
+
+def test_check_credit_flags_bad_rows():
+    chunk = normalize_credit(pd.DataFrame([
+        _credit(),
+        _credit(national_id=None),
+        _credit(credit_limit="หนึ่งแสน"),
+        _credit(account_open_date="not a date"),
+        _credit(age=2**31),
+    ]))
+    result = chunk[REJECT_COLUMN]
+    assert result.isna().tolist() == [True, False, False, False, False]
+    assert "ไม่มี national_id" in result[1]
+    assert "credit_limit ไม่ใช่ตัวเลข" in result[2]
+    assert "account_open_date ไม่ใช่วันที่" in result[3]
+    assert "age ต้องอยู่ระหว่าง" in result[4]